@@ -0,0 +1,123 @@
+import functools
+import logging
+import os
+import threading
+
+from dotenv import load_dotenv
+
+import config
+from state import state
+from storage import Database
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _env_ids(value: str) -> set:
+    return {int(part) for part in value.split(",") if part.strip()}
+
+
+class AdminRegistry:
+    """Adminlar: env (ADMIN_IDS) + config.ADMIN_IDS + ``admins`` jadvali, xotirada.
+
+    ``is_admin`` faqat set a'zoligini tekshiradi (I/O yo'q). To'plam
+    qo'shish/o'chirishda darhol, boshqa jarayonlardagi o'zgarishlar esa
+    umumiy backenddagi avlod hisoblagichi orqali ``check_interval`` da,
+    va har ``interval`` sekundda to'liq qayta yuklanadi.
+    """
+
+    GENERATION_KEY = "gen:admins"
+
+    def __init__(self, static_ids=(), interval: float = 300, check_interval: float = 5):
+        self.static_ids = frozenset(static_ids)
+        self.interval = interval
+        self.check_interval = check_interval
+        self._admins = self.static_ids
+        self._loaded = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_admin(self, user_id: int) -> bool:
+        if not self._loaded:
+            self.refresh()
+        return user_id in self._admins
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.is_admin(user_id)
+
+    def refresh(self):
+        with self._lock:
+            self._generation = state.counter(self.GENERATION_KEY)
+            with Database.get_connection() as conn:
+                db_ids = {row[0] for row in conn.execute("SELECT user_id FROM admins")}
+            # Yangi to'plam bir amalda almashtiriladi: o'quvchilar lock olmaydi
+            self._admins = self.static_ids | db_ids
+            self._loaded = True
+        return self._admins
+
+    def add(self, user_id: int, added_by: int):
+        Database.add_admin(user_id, added_by)
+        self._changed()
+
+    def remove(self, user_id: int) -> bool:
+        removed = Database.remove_admin(user_id)
+        self._changed()
+        return removed
+
+    def _changed(self):
+        state.incr(self.GENERATION_KEY)
+        self.refresh()
+
+    # Fon yangilanishi
+    def start(self):
+        self.refresh()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="admin-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        elapsed = 0.0
+        while not self._stop.wait(self.check_interval):
+            elapsed += self.check_interval
+            try:
+                if elapsed >= self.interval or (
+                        state.shared and state.counter(self.GENERATION_KEY) != self._generation):
+                    elapsed = 0.0
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Adminlar ro'yxatini yangilashda xato: {e}")
+
+
+admins = AdminRegistry(
+    static_ids=_env_ids(os.getenv("ADMIN_IDS", "")) | set(config.ADMIN_IDS),
+    interval=float(os.getenv("ADMIN_REFRESH_INTERVAL", 300)),
+)
+
+
+def is_admin(user_id: int) -> bool:
+    return admins.is_admin(user_id)
+
+
+def require_admin(bot, text: str = "⚠️ Sizga ruxsat yo'q!"):
+    """Message va callback handlerlar uchun ``admin_required`` dekoratorini yasash"""
+    def admin_required(fn):
+        @functools.wraps(fn)
+        def wrapper(update, *args, **kwargs):
+            if admins.is_admin(update.from_user.id):
+                return fn(update, *args, **kwargs)
+            if hasattr(update, "data"):
+                bot.answer_callback_query(update.id, text, show_alert=True)
+            else:
+                bot.reply_to(update, text)
+        return wrapper
+    return admin_required
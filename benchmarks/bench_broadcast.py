@@ -0,0 +1,81 @@
+"""Reklama yuborish (Broadcaster) ni soxta Bot API ga qarshi o'lchash.
+
+Ishga tushirish:  python benchmarks/bench_broadcast.py [foydalanuvchilar] [rate] [workers]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import TeleBot
+
+from broadcast import Broadcaster
+from db_pool import ConnectionPool
+from fake_bot_api import FakeBotAPI
+from outbound import SendScheduler
+
+ADMIN_CHAT_ID = 1
+
+
+def seed(db_name, users):
+    conn = sqlite3.connect(db_name)
+    conn.execute("""CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT,
+        join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP, last_active TIMESTAMP,
+        blocked INTEGER DEFAULT 0
+    )""")
+    conn.execute("""CREATE TABLE broadcasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, admin_chat_id INTEGER NOT NULL, text TEXT NOT NULL,
+        status TEXT DEFAULT 'running', total INTEGER DEFAULT 0, last_user_id INTEGER DEFAULT 0,
+        sent INTEGER DEFAULT 0, blocked INTEGER DEFAULT 0, failed INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, finished_at TIMESTAMP,
+        owner TEXT, lease_until REAL
+    )""")
+    conn.executemany("INSERT INTO users (user_id) VALUES (?)", ((1000 + i,) for i in range(users)))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    blocked = {1000 + i for i in range(0, users, 50)}
+    api = FakeBotAPI(latency=0.01, error_rate=0.002, retry_after=1, blocked_users=blocked)
+    api.start()
+    bot = TeleBot("123:fake", threaded=False)
+    # 429 dagi qayta urinishlar umumiy yuborish navbatida (kino.py dagidek)
+    scheduler = SendScheduler(rate=rate, workers=workers, backoff=0.1)
+    scheduler.install()
+    scheduler.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        seed(db_name, users)
+        pool = ConnectionPool(db_name)
+        broadcaster = Broadcaster(bot, pool.get, rate=rate, workers=workers,
+                                  chunk_size=200, progress_interval=1)
+
+        start = time.perf_counter()
+        broadcast_id = broadcaster.start("Reklama", ADMIN_CHAT_ID)
+        broadcaster.join()
+        elapsed = time.perf_counter() - start
+
+        job = pool.get().execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,)).fetchone()
+        marked = pool.get().execute("SELECT COUNT(*) FROM users WHERE blocked = 1").fetchone()[0]
+        print(f"Foydalanuvchilar: {users}, rate={rate}/s, workers={workers}")
+        print(f"Holat: {job['status']}, yuborildi={job['sent']}, bloklagan={job['blocked']} "
+              f"(bazada {marked}), xato={job['failed']}")
+        print(f"Vaqt: {elapsed:.2f} s, {users / elapsed:.0f} xabar/s, "
+              f"429 javoblar bilan jami so'rovlar: {api.calls['sendMessage']}")
+        pool.close_all()
+    scheduler.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Kod bo'yicha qidiruv tezligi: har chaqiruvda yangi ulanish vs ConnectionPool.
+
+Ishga tushirish:  python benchmarks/bench_db_pool.py [qatorlar_soni] [so'rovlar_soni]
+"""
+import os
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import ConnectionPool
+
+
+def seed(db_name, rows):
+    conn = sqlite3.connect(db_name)
+    conn.execute("""CREATE TABLE media (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_id TEXT NOT NULL,
+        file_type TEXT NOT NULL,
+        file_name TEXT,
+        secret_code TEXT UNIQUE NOT NULL,
+        upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        views INTEGER DEFAULT 0
+    )""")
+    conn.execute("""CREATE TABLE admins (
+        user_id INTEGER PRIMARY KEY,
+        added_by INTEGER,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    codes = [f"{i:06d}" for i in range(rows)]
+    conn.executemany(
+        "INSERT INTO media (file_id, file_type, file_name, secret_code) VALUES (?, ?, ?, ?)",
+        ((''.join(random.choices(string.ascii_letters, k=40)), "video", f"kino {c}", c) for c in codes)
+    )
+    conn.commit()
+    conn.close()
+    return codes
+
+
+def lookup(get_connection, code, user_id):
+    # Bitta kod so'rovi: is_admin_in_db + get_media_by_code + increment_views
+    with get_connection() as conn:
+        conn.execute("SELECT 1 FROM admins WHERE user_id = ?", (user_id,)).fetchone()
+    with get_connection() as conn:
+        media = conn.execute("SELECT * FROM media WHERE secret_code = ?", (code,)).fetchone()
+    with get_connection() as conn:
+        conn.execute("UPDATE media SET views = views + 1 WHERE secret_code = ?", (code,))
+    return media
+
+
+def run(name, get_connection, codes, requests):
+    sample = random.choices(codes, k=requests)
+    start = time.perf_counter()
+    for i, code in enumerate(sample):
+        lookup(get_connection, code, i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {requests / elapsed:>10.0f} qidiruv/s  ({elapsed:.2f} s)")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        codes = seed(db_name, rows)
+
+        def per_call_connect():
+            conn = sqlite3.connect(db_name)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+        run("Har safar connect", per_call_connect, codes, requests)
+
+        pool = ConnectionPool(db_name)
+        run("ConnectionPool (WAL)", pool.get, codes, requests)
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""End-to-end yuklama sinovi: soxta Bot API + to'liq kino bot (polling rejimi).
+
+Sintetik katalog va foydalanuvchilar bazasi vaqtinchalik bazaga (yoki
+``--db`` fayliga) yoziladi, so'ng ssenariylar getUpdates orqali botga
+beriladi va har bir update uchun "navbatga qo'yilgandan javob Bot API ga
+yetib kelguncha" vaqt o'lchanadi:
+
+    codes      kod so'rovlari to'lqini (mashhur kodlar ko'proq, ~5% xato kod)
+    upload     video yuklash to'lqini (handlers/media.py)
+    inline     inline qidiruv (2-3 harfli prefikslar va to'liq so'zlar)
+    broadcast  reklama: boshlanishdan har bir foydalanuvchiga yetguncha
+
+Natija JSON: throughput, p50/p95/p99, xatolar (429 va h.k.) va jarayonning
+eng katta RSS i. ``--baseline`` bilan oldingi natija bilan solishtiriladi.
+
+Ishga tushirish:
+    python benchmarks/bench_load.py --media 50000 --users 5000 --requests 5000 \\
+        --latency 20 --error-rate 0.01 --output load.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_bot_api import FakeBotAPI
+
+SCENARIOS = ("codes", "upload", "inline", "broadcast")
+ADMIN_CHAT_ID = 1
+FIRST_USER_ID = 100_000
+WORDS = ("qasoskorlar o'rgimchak odam temir yulduzlar jangi qirol sher muzlik yurak dengiz "
+         "qaroqchilari shoh tun ritsar matritsa avatar titanik gladiator terminator toshkent "
+         "samarqand sevgi oila do'stlar yo'l tog' shamol yomg'ir sirli orol oltin kumush").split()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="vergul bilan: " + ",".join(SCENARIOS))
+    parser.add_argument("--db", help="baza fayli (standart: vaqtinchalik, media_bot.db ga tegilmaydi)")
+    parser.add_argument("--media", type=int, default=20000, help="sintetik katalog hajmi")
+    parser.add_argument("--users", type=int, default=5000, help="sintetik foydalanuvchilar soni")
+    parser.add_argument("--requests", type=int, default=3000, help="har bir ssenariydagi updatelar")
+    parser.add_argument("--uploads", type=int, default=500, help="upload ssenariysidagi fayllar")
+    parser.add_argument("--rate", type=float, default=0, help="update/s (0 - hammasi birdaniga)")
+    parser.add_argument("--latency", type=float, default=20, help="Bot API kechikishi, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 javoblar ulushi")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=8, help="UPDATE_WORKERS")
+    parser.add_argument("--broadcast-rate", type=float, default=500,
+                        help="reklama xabar/s (ishlab chiqarishda 25)")
+    parser.add_argument("--send-rate", type=float, default=1000,
+                        help="yuborish navbatining umumiy limiti, xabar/s (ishlab chiqarishda 30; 0 - navbatsiz)")
+    parser.add_argument("--timeout", type=float, default=300, help="ssenariy uchun maksimal vaqt, s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON natija fayli (standart: stdout)")
+    parser.add_argument("--baseline", help="solishtirish uchun oldingi JSON natija")
+    return parser.parse_args(argv)
+
+
+# 1. JAVOBLARNI KUZATISH
+class Tracker:
+    """Kutilayotgan javoblar: kalit (chat_id yoki inline so'rov id) -> navbatga qo'yilgan vaqtlar.
+
+    Har bir update aynan bitta javob beradi, bir chat ichida tartib
+    saqlanadi (UpdateQueue), shuning uchun FIFO moslash yetarli. Yuborish
+    navbati bir chatning matnlarini ``"\n\n"`` bilan birlashtirsa, bitta
+    sendMessage unga kirgan har bir javob uchun sanaladi (bu ssenariylardagi
+    javob matnlarida ``"\n\n"`` yo'q).
+    """
+
+    def __init__(self):
+        self.pending = defaultdict(deque)
+        self.outstanding = 0
+        self.latencies = []
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+
+    def expect(self, key, at: float = None):
+        with self._lock:
+            self.pending[key].append(at or time.perf_counter())
+            self.outstanding += 1
+
+    def on_response(self, method, params, status):
+        if "inline_query_id" in params:
+            key = "iq:" + str(params["inline_query_id"])
+        elif "chat_id" in params:
+            key = int(params["chat_id"])
+        else:
+            return
+        parts = str(params.get("text", "")).count("\n\n") + 1 if method == "sendMessage" else 1
+        now = time.perf_counter()
+        with self._lock:
+            waiting = self.pending.get(key)
+            if not waiting:
+                return
+            for _ in range(min(parts, len(waiting))):
+                self.latencies.append(now - waiting.popleft())
+                if status != 200:
+                    self.errors[str(status)] += 1
+                self.outstanding -= 1
+            if not self.outstanding:
+                self._done.notify_all()
+
+    def wait(self, timeout: float) -> bool:
+        with self._lock:
+            return self._done.wait_for(lambda: not self.outstanding, timeout)
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def peak_rss_mb() -> float:
+    # Linux da ru_maxrss kilobaytda, macOS da baytda
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def report(tracker: Tracker, expected: int, elapsed: float) -> dict:
+    latencies = sorted(tracker.latencies)
+    return {
+        "requests": expected,
+        "completed": len(latencies),
+        "lost": expected - len(latencies),
+        "errors": dict(tracker.errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# 2. SINTETIK MA'LUMOTLAR
+def seed(Database, media: int, users: int, rng: random.Random) -> list:
+    """Katalog va foydalanuvchilarni yozish; bazadagi barcha kodlarni qaytarish"""
+    Database.init_db()
+
+    def catalog():
+        for n in range(media):
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+            year = rng.randint(1970, 2025)
+            # Kodlar ishlab chiqarishdagidek ketma-ketlikdan: keyingi yuklashlar to'qnashmaydi
+            yield (f"seed-{n}", "video", f"{title.title()} ({year})", Database.allocate_code(),
+                   f"{title} {year} HD", rng.randint(0, 10000))
+
+    def user_base():
+        for n in range(users):
+            yield FIRST_USER_ID + n, f"user{n}", f"User {n}"
+
+    with Database.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO media (file_id, file_type, file_name, secret_code, caption, views) "
+            "VALUES (?, ?, ?, ?, ?, ?)", catalog()
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, username, first_name) VALUES (?, ?, ?)", user_base()
+        )
+    return [row[0] for row in Database.get_connection().execute("SELECT secret_code FROM media")]
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": "User"}
+
+
+def _message(update_id: int, user_id: int, **content) -> dict:
+    message = {"message_id": update_id, "date": int(time.time()),
+               "chat": {"id": user_id, "type": "private"}, "from": _user(user_id)}
+    message.update(content)
+    return {"update_id": update_id, "message": message}
+
+
+def code_updates(count, users, codes, rng, first_id):
+    for i in range(count):
+        user_id = FIRST_USER_ID + rng.randrange(users)
+        if rng.random() < 0.05:
+            code = "ZZZZZ" + str(rng.randrange(10))      # mavjud bo'lmagan kod
+        else:
+            # Mashhurlik notekis: kodlarning boshidagi kichik qismi ko'p so'raladi
+            code = codes[int(len(codes) * rng.random() ** 3)]
+        yield user_id, _message(first_id + i, user_id, text=code)
+
+
+def upload_updates(count, users, rng, first_id):
+    for i in range(count):
+        user_id = FIRST_USER_ID + rng.randrange(users)
+        title = " ".join(rng.choice(WORDS) for _ in range(3))
+        video = {"file_id": f"upload-{first_id + i}", "file_unique_id": f"u{first_id + i}",
+                 "width": 1280, "height": 720, "duration": 5400, "file_name": f"{title}.mp4"}
+        yield user_id, _message(first_id + i, user_id, video=video, caption=title)
+
+
+def inline_updates(count, users, rng, first_id):
+    for i in range(count):
+        user_id = FIRST_USER_ID + rng.randrange(users)
+        word = rng.choice(WORDS)
+        query = word[:rng.choice((2, 3))] if rng.random() < 0.3 else word
+        if rng.random() < 0.3:
+            query += " " + rng.choice(WORDS)
+        query_id = str(first_id + i)
+        update = {"update_id": first_id + i, "inline_query": {
+            "id": query_id, "from": _user(user_id), "query": query, "offset": ""}}
+        yield "iq:" + query_id, update
+
+
+# 3. SSENARIYLAR
+class LoadTest:
+    def __init__(self, args, kino, api: FakeBotAPI, codes: list):
+        self.args = args
+        self.kino = kino
+        self.api = api
+        self.codes = codes
+        self.rng = random.Random(args.seed)
+        self.next_update_id = 1
+
+    def _feed(self, items: list, tracker: Tracker):
+        """Updatelarni getUpdates navbatiga ``--rate`` tezligida (yoki birdaniga) qo'yish"""
+        # Tezlik berilsa ~10 ms lik bo'laklar bilan
+        chunk = max(1, int(self.args.rate / 100)) if self.args.rate else len(items)
+        start = time.perf_counter()
+        for n in range(0, len(items), chunk):
+            part = items[n:n + chunk]
+            now = time.perf_counter()
+            for key, _ in part:
+                tracker.expect(key, now)
+            self.api.push_updates([update for _, update in part])
+            if self.args.rate:
+                delay = start + (n + chunk) / self.args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def run_updates(self, items: list) -> dict:
+        items = list(items)
+        self.next_update_id += len(items)
+        tracker = Tracker()
+        self.api.on_response = tracker.on_response
+        start = time.perf_counter()
+        self._feed(items, tracker)
+        tracker.wait(self.args.timeout)
+        elapsed = time.perf_counter() - start
+        self.api.on_response = None
+        return report(tracker, len(items), elapsed)
+
+    def codes_scenario(self):
+        return self.run_updates(code_updates(self.args.requests, self.args.users, self.codes,
+                                             self.rng, self.next_update_id))
+
+    def upload_scenario(self):
+        return self.run_updates(upload_updates(self.args.uploads, self.args.users,
+                                               self.rng, self.next_update_id))
+
+    def inline_scenario(self):
+        return self.run_updates(inline_updates(self.args.requests, self.args.users,
+                                               self.rng, self.next_update_id))
+
+    def broadcast_scenario(self):
+        from broadcast import Broadcaster
+
+        users = [row[0] for row in self.kino.Database.get_connection().execute(
+            "SELECT user_id FROM users WHERE blocked = 0")]
+        broadcaster = Broadcaster(self.kino.bot, self.kino.Database.get_connection,
+                                  rate=self.args.broadcast_rate, workers=self.kino.BotHandlers.WORKERS)
+        tracker = Tracker()
+        self.api.on_response = tracker.on_response
+        start = time.perf_counter()
+        for user_id in users:
+            tracker.expect(user_id, start)
+        broadcaster.start("📢 Yuklama sinovi", ADMIN_CHAT_ID)
+        broadcaster.join(self.args.timeout)
+        tracker.wait(1)
+        elapsed = time.perf_counter() - start
+        self.api.on_response = None
+        return report(tracker, len(users), elapsed)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(result: dict, baseline_path: str):
+    """Oldingi natijaga nisbatan o'zgarishlarni stderr ga chiqarish"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n{'ssenariy':<10} {'throughput':>22} {'p99 ms':>22}", file=sys.stderr)
+    for name, current in result["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+
+        def delta(key):
+            change = (current[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            return f"{old[key]:>8} -> {current[key]:<8} ({change:+.0f}%)"
+
+        print(f"{name:<10} {delta('throughput'):>22} {delta('p99_ms'):>22}", file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Noma'lum ssenariy: {', '.join(sorted(unknown))}")
+
+    # kino modul darajasida sozlamalarni o'qiydi: muhit importdan oldin tayyorlanadi
+    tmp = tempfile.mkdtemp()
+    os.environ.update(BOT_TOKEN="123:fake", USE_WEBHOOK="false", METRICS_PORT="0",
+                      DB_NAME=args.db or os.path.join(tmp, "load.db"),
+                      LOG_FILE=os.path.join(tmp, "load.log"),
+                      UPDATE_WORKERS=str(args.workers), CHANNEL_USERNAME="@fake_channel",
+                      SEND_RATE=str(args.send_rate or 30))
+    import logging
+    import kino
+    from handlers import media
+
+    logging.getLogger().setLevel(logging.WARNING)
+    api = FakeBotAPI(latency=args.latency / 1000, error_rate=args.error_rate,
+                     retry_after=args.retry_after, seed=args.seed)
+    api.start()
+
+    started = time.perf_counter()
+    codes = seed(kino.Database, args.media, args.users, random.Random(args.seed))
+    seed_seconds = time.perf_counter() - started
+
+    kino.BotHandlers.setup_handlers()
+    # Yuklash handleri; matnli kodlarni kino.handle_text oldinroq ushlaydi
+    media.register_handlers(kino.bot, kino.router)
+    if args.send_rate:
+        kino.send_scheduler.start()
+    runner = kino.polling_runner
+    runner.timeout = 1
+    polling = threading.Thread(target=runner.run, name="polling", daemon=True)
+    polling.start()
+
+    test = LoadTest(args, kino, api, codes)
+    result = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "params": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "baseline")},
+            "seed_seconds": round(seed_seconds, 2),
+            "catalog": len(codes),
+        },
+        "scenarios": {},
+    }
+    for name in scenarios:
+        result["scenarios"][name] = getattr(test, f"{name}_scenario")()
+        print(f"{name}: {result['scenarios'][name]}", file=sys.stderr)
+    result["meta"]["send"] = kino.send_scheduler.stats()
+
+    runner.stop()
+    polling.join()
+    kino.update_queue.stop()
+    kino.send_scheduler.stop()
+    kino.Database.close()
+    api.stop()
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        compare(result, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Log chaqiruvining handler threadidagi narxi: to'g'ridan-to'g'ri FileHandler va navbatli pipeline.
+
+Reklama ishchilaridek bir nechta thread har bir foydalanuvchi uchun
+``logger.error`` chaqiradi (bloklagan foydalanuvchilar). Har bir chaqiruv
+vaqti chaqiruvchi threadda o'lchanadi; faylga yozilgan qatorlar ham sanaladi.
+
+Ishga tushirish:  python benchmarks/bench_logging.py [chaqiruvlar] [threadlar]
+"""
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_pipeline import log_pipeline
+
+logger = logging.getLogger("broadcast")
+
+
+def direct_setup(log_file, devnull):
+    # Oldingi sozlama: kino.py dagi logging.basicConfig
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.FileHandler(log_file), logging.StreamHandler(devnull)],
+        force=True,
+    )
+
+
+def pipeline_setup(log_file, devnull, burst):
+    with contextlib.redirect_stderr(devnull):
+        log_pipeline.setup(log_file, burst=burst)
+
+
+def run(calls: int, threads: int, with_exc: bool) -> list:
+    per_thread = calls // threads
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(per_thread):
+            user_id = 1_000_000 + n * per_thread + i
+            start = time.perf_counter()
+            if with_exc:
+                try:
+                    raise ConnectionError("Forbidden: bot was blocked by the user")
+                except ConnectionError as e:
+                    logger.error(f"Foydalanuvchiga {user_id} reklama yuborishda xato: {e}", exc_info=True)
+            else:
+                logger.error(f"Foydalanuvchiga {user_id} reklama yuborishda xato: Forbidden")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def measure(name, setup, teardown, calls, threads, with_exc):
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        log_file = os.path.join(tmp, "bench.log")
+        setup(log_file, devnull)
+        start = time.perf_counter()
+        latencies = run(calls, threads, with_exc)
+        caller = time.perf_counter() - start
+        teardown()
+        total = time.perf_counter() - start
+        with open(log_file, encoding="utf-8") as f:
+            lines = sum(1 for line in f if line.startswith(("{", "20")))
+        stats = log_pipeline.stats() if setup is not direct_setup else {"dropped": 0, "bypassed": 0}
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    print(f"{name:<28} p50 {p50:>7.1f} us  p99 {p99:>8.1f} us  "
+          f"chaqiruvchi {caller:>5.2f} s  jami {total:>5.2f} s  yozuvlar {lines}  tashlangan {stats['dropped']}  "
+          f"navbatsiz {stats['bypassed']}")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    def direct_teardown():
+        logging.getLogger().handlers[0].flush()
+
+    print(f"Chaqiruvlar: {calls}, threadlar: {threads}")
+    for with_exc in (False, True):
+        print("\nexc_info=True (traceback bilan)" if with_exc else "\nOddiy xabar")
+        measure("FileHandler + StreamHandler", direct_setup, direct_teardown, calls, threads, with_exc)
+        measure("navbat, cheklovsiz",
+                lambda f, d: pipeline_setup(f, d, burst=calls), log_pipeline.stop, calls, threads, with_exc)
+        measure("navbat, 10/daqiqa",
+                lambda f, d: pipeline_setup(f, d, burst=10), log_pipeline.stop, calls, threads, with_exc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Yuborish navbati (outbound.SendScheduler): to'g'ridan-to'g'ri send_* bilan solishtirish.
+
+Soxta Bot API tasodifiy 429 qaytaradi. Bir vaqtda: reklama (bulk lane),
+kod so'rovlariga javoblar (har biriga matn + video, handle_code kabi) va
+bir chatga ketma-ket bir nechta matn (birlashtirish). To'g'ridan-to'g'ri
+yuborishda 429 olgan javob yo'qoladi; navbatda qayta yuboriladi.
+
+Ishga tushirish:  python benchmarks/bench_outbound.py [chatlar] [reklama] [error_rate]
+"""
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import TeleBot
+
+from fake_bot_api import FakeBotAPI
+import metrics
+import outbound
+from outbound import SendScheduler
+
+
+def run(bot, chats: int, broadcast: int, threads: int = 8) -> dict:
+    lock = threading.Lock()
+    replies, failed = [], {"reply": 0, "bulk": 0}
+
+    def reply(chat_id):
+        start = time.perf_counter()
+        try:
+            bot.send_message(chat_id, "📥 Fayl: ...")
+            bot.send_video(chat_id, f"file-{chat_id}")
+        except Exception:
+            with lock:
+                failed["reply"] += 1
+            return
+        with lock:
+            replies.append(time.perf_counter() - start)
+
+    def texts(chat_id):
+        # Handlerlardagidek natija kutilmaydi (faqat shundaylar birlashtiriladi)
+        try:
+            with outbound.detached():
+                bot.send_message(chat_id, "⏳ Juda ko'p so'rov! Biroz kuting.")
+        except Exception:
+            with lock:
+                failed["reply"] += 1
+
+    def bulk(users):
+        with outbound.bulk():
+            for user_id in users:
+                try:
+                    bot.send_message(user_id, "📢 Reklama")
+                except Exception:
+                    with lock:
+                        failed["bulk"] += 1
+
+    workers = [threading.Thread(target=bulk, args=(range(100_000 + n, 100_000 + broadcast, threads),))
+               for n in range(threads)]
+    workers += [threading.Thread(target=reply, args=(1000 + n,)) for n in range(chats)]
+    # 20 ta chatga bir vaqtda 5 tadan matn
+    workers += [threading.Thread(target=texts, args=(5000 + n % 20,)) for n in range(100)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    replies.sort()
+    return {
+        "seconds": time.perf_counter() - start,
+        "replies": len(replies),
+        "failed": failed,
+        "p50": statistics.median(replies) * 1000 if replies else 0,
+        "p99": replies[int(len(replies) * 0.99) - 1] * 1000 if replies else 0,
+    }
+
+
+def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    broadcast = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    error_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.005
+
+    logging.disable(logging.ERROR)     # har bir 429 ning logi o'lchovga aralashmasin
+    api = FakeBotAPI(latency=0.02, error_rate=error_rate, retry_after=1)
+    api.start()
+    bot = TeleBot("123:fake", threaded=False)
+    metrics.instrument_telegram_api()
+    # Fake API uchun limitlar kattalashtirilgan: solishtirish navbat mexanikasi uchun
+    scheduler = SendScheduler(rate=500, chat_rate=1, chat_burst=3, workers=32, backoff=0.1)
+    scheduler.install()
+
+    print(f"Javob chatlari: {chats}, reklama: {broadcast}, 429 ulushi: {error_rate:.0%}")
+    for name in ("to'g'ridan-to'g'ri", "SendScheduler"):
+        if name == "SendScheduler":
+            scheduler.start()
+        r = run(bot, chats, broadcast)
+        print(f"{name:<20} javoblar {r['replies']:>4}/{chats}  yo'qolgan: javob {r['failed']['reply']}, "
+              f"reklama {r['failed']['bulk']}  javob p50 {r['p50']:>6.0f} ms  p99 {r['p99']:>6.0f} ms  "
+              f"jami {r['seconds']:.1f} s")
+    print(f"  {scheduler.stats()}")
+    scheduler.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Polling: standart infinity_polling va partiyali PollingRunner.
+
+Soxta Bot API navbatiga ko'p chatdan kelgan updatelar to'lqini qo'yiladi
+va barcha javoblar yuborilguncha vaqt o'lchanadi.
+
+Ishga tushirish:  python benchmarks/bench_polling.py [updates] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp()
+os.environ.update(BOT_TOKEN="123:fake", DB_NAME=os.path.join(TMP, "bench.db"),
+                  LOG_FILE=os.path.join(TMP, "bench.log"), USE_WEBHOOK="false")
+
+from telebot import util
+
+from fake_bot_api import FakeBotAPI
+from bench_runtime import CODES, seed, wait_for
+import kino
+
+
+def make_updates(count: int, start_id: int):
+    updates = []
+    for i in range(count):
+        user_id = 10_000 + i % 500
+        updates.append({
+            "update_id": start_id + i,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+                "text": CODES[i % len(CODES)],
+            },
+        })
+    return updates
+
+
+def bench_default(api, updates):
+    # Oldingi sozlama: TeleBot(threaded=True), 2 ta ishchi, infinity_polling()
+    kino.bot.threaded = True
+    kino.bot.worker_pool = util.ThreadPool(kino.bot, num_threads=2)
+    before = api.calls["sendVideo"]
+    api.push_updates(updates)
+    start = time.perf_counter()
+    thread = threading.Thread(target=kino.bot.infinity_polling, kwargs={"timeout": 1}, daemon=True)
+    thread.start()
+    wait_for(api, before + len(updates))
+    elapsed = time.perf_counter() - start
+    kino.bot.stop_polling()
+    thread.join()
+    kino.bot.worker_pool.close()
+    kino.bot.threaded = False
+    return elapsed
+
+
+def bench_runner(api, updates):
+    runner = kino.polling_runner
+    runner.timeout = 1
+    before = api.calls["sendVideo"]
+    api.push_updates(updates)
+    start = time.perf_counter()
+    thread = threading.Thread(target=runner.run, daemon=True)
+    thread.start()
+    wait_for(api, before + len(updates))
+    elapsed = time.perf_counter() - start
+    runner.stop()
+    thread.join()
+    return elapsed, runner.stats()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    api = FakeBotAPI(latency=latency)
+    api.start()
+    seed()
+    kino.BotHandlers.setup_handlers()
+
+    print(f"Updates: {count}, API kechikishi: {latency * 1000:.0f} ms")
+    elapsed = bench_default(api, make_updates(count, 1))
+    print(f"infinity_polling  {count / elapsed:>8.0f} update/s  ({elapsed:.2f} s)")
+    elapsed, stats = bench_runner(api, make_updates(count, count + 1))
+    print(f"PollingRunner     {count / elapsed:>8.0f} update/s  ({elapsed:.2f} s)")
+    print(f"  {stats}")
+
+    kino.update_queue.stop()
+    kino.Database.close()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Eski ro'yxatli limiter va GCRALimiter: tekshiruv narxi va xotira.
+
+Ishga tushirish:  python benchmarks/bench_rate_limit.py [foydalanuvchilar]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import GCRALimiter
+
+
+class OldLimiter:
+    """Oldingi Utils.is_rate_limited (taqqoslash uchun)"""
+
+    def __init__(self):
+        self._user_requests = defaultdict(list)
+
+    def is_limited(self, user_id, limit=5, period=60):
+        now = datetime.now()
+        self._user_requests[user_id] = [t for t in self._user_requests[user_id] if (now - t).seconds < period]
+        if len(self._user_requests[user_id]) >= limit:
+            return True
+        self._user_requests[user_id].append(now)
+        return False
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def micro(name, fn, calls=300_000, users=1000):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i % users)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed / calls * 1e9:>8.0f} ns/tekshiruv")
+
+
+def memory(name, make, users):
+    tracemalloc.start()
+    limiter, check = make()
+    for user_id in range(users):
+        check(limiter, user_id)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} {users} foydalanuvchi: {current / 2**20:>7.1f} MB ({current / users:.0f} B/foyd.)")
+    return limiter
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    for limit in (5, 30):
+        print(f"1. Tekshiruv narxi (1000 faol foydalanuvchi, {limit} so'rov/min)")
+        old = OldLimiter()
+        micro("eski", lambda user_id: old.is_limited(user_id, limit=limit))
+        new = GCRALimiter(limit, 60)
+        micro("GCRA", new.is_limited)
+
+    print("\n2. Xotira")
+    memory("eski", lambda: (OldLimiter(), OldLimiter.is_limited), users)
+    clock = FakeClock()
+    limiter = memory("GCRA", lambda: (GCRALimiter(5, 60, clock=clock), GCRALimiter.is_limited), users)
+
+    print("\n3. Bo'sh yozuvlarni tozalash")
+    clock.now += 61
+    for i in range(users // 8 + 1):
+        limiter.is_limited(-1 - (i % 10))
+    print(f"GCRA: 61 s dan keyin {len(limiter)} ta yozuv qoldi ({users} tadan)")
+
+
+if __name__ == "__main__":
+    main()
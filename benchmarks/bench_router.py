@@ -0,0 +1,124 @@
+"""Handler tanlash narxi: TeleBot lambda filtrlar zanjiri va router.Router.
+
+Ikkala botda ham handlerlar bo'sh (hech narsa qilmaydi), shuning uchun
+o'lchangan vaqt faqat update ni handlerga yetkazish narxi. Update lar
+aralashmasi: kodlar, buyruqlar, callbacklar, inline so'rovlar, videolar.
+
+Ishga tushirish:  python benchmarks/bench_router.py [updates]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import TeleBot, types
+
+from router import Router
+
+
+def noop(update):
+    pass
+
+
+def filter_chain_bot() -> TeleBot:
+    # Oldingi kino.py + handlers/admin.py + handlers/inline.py tartibi
+    bot = TeleBot("123:fake", threaded=False)
+    bot.inline_handler(func=lambda q: len(q.query.strip()) >= 2)(noop)
+    bot.message_handler(commands=['start'])(noop)
+    bot.message_handler(commands=['admin'])(noop)
+    bot.message_handler(commands=['admin'])(noop)
+    bot.message_handler(commands=['del', 'delete'])(noop)
+    bot.message_handler(commands=['list'])(noop)
+    bot.message_handler(commands=['export'])(noop)
+    bot.callback_query_handler(func=lambda call: call.data.startswith('list:'))(noop)
+    bot.callback_query_handler(func=lambda call: call.data.startswith('admin_'))(noop)
+    bot.message_handler(content_types=["document", "video", "audio"])(noop)
+    bot.message_handler(func=lambda m: True, content_types=['text'])(noop)
+    bot.callback_query_handler(func=lambda call: True)(noop)
+    return bot
+
+
+def router_bot() -> tuple:
+    bot = TeleBot("123:fake", threaded=False)
+    router = Router()
+    router.attach(bot)
+    router.inline(func=lambda q: len(q.query.strip()) >= 2)(noop)
+    router.command('start')(noop)
+    router.command('admin')(noop)
+    router.command('del', 'delete')(noop)
+    router.command('list')(noop)
+    router.command('export')(noop)
+    router.callback_prefix('list')(noop)
+    router.callback('admin_stats', 'admin_delete')(noop)
+    router.callback('show_stats', 'send_ad', 'add_admin', 'delete_file')(noop)
+    router.content_type("document", "video", "audio")(noop)
+    router.code()(noop)
+    router.text()(noop)
+    return bot, router
+
+
+def make_updates(count: int, rng: random.Random) -> list:
+    user = {"id": 7, "is_bot": False, "first_name": "User"}
+    chat = {"id": 7, "type": "private"}
+
+    def message(i, **content):
+        data = {"message_id": i, "date": 0, "chat": chat, "from": user}
+        data.update(content)
+        return {"update_id": i, "message": data}
+
+    kinds = [
+        (70, lambda i: message(i, text=f"K{i % 100000:05d}")),
+        (8, lambda i: message(i, text="/list media", entities=[{"type": "bot_command", "offset": 0, "length": 5}])),
+        (4, lambda i: message(i, text="salom qalaysan")),
+        (6, lambda i: {"update_id": i, "callback_query": {"id": str(i), "from": user, "chat_instance": "c",
+                                                          "data": f"list:media:n:{i}"}}),
+        (4, lambda i: {"update_id": i, "callback_query": {"id": str(i), "from": user, "chat_instance": "c",
+                                                          "data": "show_stats"}}),
+        (6, lambda i: {"update_id": i, "inline_query": {"id": str(i), "from": user, "query": "qasos",
+                                                        "offset": ""}}),
+        (2, lambda i: message(i, video={"file_id": "f", "file_unique_id": "u", "width": 1, "height": 1,
+                                        "duration": 1})),
+    ]
+    weights = [weight for weight, _ in kinds]
+    makers = [maker for _, maker in kinds]
+    return [types.Update.de_json(rng.choices(makers, weights)[0](i + 1)) for i in range(count)]
+
+
+def measure(bot: TeleBot, updates: list) -> float:
+    bot.process_new_updates(updates[:1000])     # isitish
+    start = time.perf_counter()
+    for update in updates:
+        bot.process_new_updates([update])
+    return (time.perf_counter() - start) / len(updates) * 1e6
+
+
+def measure_router(router: Router, updates: list) -> float:
+    # TeleBot qatlamisiz: faqat marshrut tanlash va Route vaqt o'lchovi
+    handlers = {"message": router.handle_message, "callback_query": router.handle_callback,
+                "inline_query": router.handle_inline}
+    pairs = []
+    for update in updates:
+        for name, handler in handlers.items():
+            value = getattr(update, name)
+            if value is not None:
+                pairs.append((handler, value))
+    start = time.perf_counter()
+    for handler, value in pairs:
+        handler(value)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    updates = make_updates(count, random.Random(0))
+    print(f"Updates: {count} (70% kod, qolgani buyruq/callback/inline/video)")
+    print(f"lambda filtrlar  {measure(filter_chain_bot(), updates):>6.2f} us/update")
+    bot, router = router_bot()
+    print(f"Router           {measure(bot, updates):>6.2f} us/update")
+    print(f"  shundan Router {measure_router(router, updates):>6.2f} us/update (TeleBot qatlamisiz)")
+
+
+if __name__ == "__main__":
+    main()
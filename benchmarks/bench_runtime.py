@@ -0,0 +1,109 @@
+"""Threaded (TeleBot + UpdateQueue) va async (AsyncTeleBot) runtime larini solishtirish.
+
+Bir xil kod so'rovlari oqimi ikkala runtime ga beriladi va barcha javoblar
+soxta Bot API ga yetib kelguncha vaqt o'lchanadi.
+
+Ishga tushirish:  python benchmarks/bench_runtime.py [updates] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp()
+os.environ.update(BOT_TOKEN="123:fake", DB_NAME=os.path.join(TMP, "bench.db"),
+                  LOG_FILE=os.path.join(TMP, "bench.log"), USE_WEBHOOK="false")
+
+from telebot import types
+
+from fake_bot_api import FakeBotAPI
+import kino
+import kino_async
+
+CODES = [f"K{i:05d}" for i in range(1000)]
+
+
+def seed():
+    kino.Database.init_db()
+    with kino.Database.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO media (file_id, file_type, file_name, secret_code) VALUES (?, 'video', ?, ?)",
+            ((f"file-{code}", f"kino {code}", code) for code in CODES)
+        )
+
+
+def make_updates(count: int, start_id: int):
+    updates = []
+    for i in range(count):
+        user_id = 10_000 + i % 500
+        updates.append(types.Update.de_json({
+            "update_id": start_id + i,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+                "text": CODES[i % len(CODES)],
+            },
+        }))
+    return updates
+
+
+def wait_for(api: FakeBotAPI, expected: int, timeout: float = 300):
+    deadline = time.monotonic() + timeout
+    while api.calls["sendVideo"] < expected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def bench_threaded(api, updates):
+    # kino.bot threaded=False: parallellik UpdateQueue ishchilaridan (polling/webhook dagidek)
+    kino.BotHandlers.setup_handlers()
+    before = api.calls["sendVideo"]
+    start = time.perf_counter()
+    for update in updates:
+        while not kino.update_queue.submit(update, timeout=1):
+            pass
+    wait_for(api, before + len(updates))
+    elapsed = time.perf_counter() - start
+    kino.update_queue.stop()
+    return elapsed
+
+
+def bench_async(api, updates):
+    kino_async.AsyncBotHandlers.setup_handlers()
+
+    async def run():
+        await kino_async.bot.process_new_updates(updates)
+        await kino_async.bot.close_session()
+
+    before = api.calls["sendVideo"]
+    start = time.perf_counter()
+    asyncio.run(run())
+    wait_for(api, before + len(updates))
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    api = FakeBotAPI(latency=latency)
+    api.start()
+    seed()
+
+    print(f"Updates: {count}, API kechikishi: {latency * 1000:.0f} ms")
+    elapsed = bench_threaded(api, make_updates(count, 1))
+    print(f"threaded  {count / elapsed:>8.0f} update/s  ({elapsed:.2f} s)")
+    elapsed = bench_async(api, make_updates(count, count + 1))
+    print(f"async     {count / elapsed:>8.0f} update/s  ({elapsed:.2f} s)")
+
+    kino.Database.close()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
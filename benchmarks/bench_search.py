@@ -0,0 +1,98 @@
+"""Inline qidiruv: FTS5 indeks va LIKE '%...%' ni katta katalogda solishtirish.
+
+Sintetik katalog (standart 500k qator) vaqtinchalik bazaga yoziladi,
+so'ng turli uzunlikdagi so'rovlar sovuq (keshsiz) va issiq keshdan
+o'lchanadi. Telegram inline javobini ~10 s kutadi; maqsad - p99 < 100 ms.
+
+Ishga tushirish:  python benchmarks/bench_search.py [qatorlar]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp()
+os.environ.update(DB_NAME=os.path.join(TMP, "bench.db"))
+
+from cache import search_cache
+from code_allocator import encode
+from storage import Database
+
+WORDS = ("qasoskorlar o'rgimchak odam temir yulduzlar jangi qirol sher muzlik yurak dengiz "
+         "qaroqchilari shoh tun ritsar matritsa avatar titanik gladiator interstellar terminator "
+         "toshkent samarqand sevgi oila do'stlar uy yo'l tog' shamol yomg'ir kecha kunduz "
+         "sirli orol qora oq qizil yashil oltin kumush katta kichik yangi eski").split()
+
+
+def seed(rows: int, rng: random.Random):
+    Database.init_db()
+    start = time.perf_counter()
+
+    def generate():
+        for n in range(rows):
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+            year = rng.randint(1970, 2025)
+            yield (f"file-{n}", "video", f"{title.title()} ({year})", encode(n, b"bench"),
+                   f"{title} {year} HD", rng.randint(0, 10000))
+
+    with Database.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO media (file_id, file_type, file_name, secret_code, caption, views) "
+            "VALUES (?, ?, ?, ?, ?, ?)", generate()
+        )
+    print(f"Katalog: {rows} qator, {time.perf_counter() - start:.1f} s (FTS triggerlar bilan)")
+
+
+def measure(fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def like_search(text: str):
+    pattern = f"%{text}%"
+    with Database.get_connection() as conn:
+        return conn.execute(
+            "SELECT secret_code, file_name FROM media WHERE file_name LIKE ? OR caption LIKE ? "
+            "ORDER BY views DESC LIMIT 20", (pattern, pattern)
+        ).fetchall()
+
+
+def fts_cold(text: str):
+    search_cache.clear()
+    return Database.search_media(text, 0, 20)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rng = random.Random(1)
+    seed(rows, rng)
+
+    queries = {
+        "2 harf": [w[:2] for w in rng.choices(WORDS, k=100)],
+        "so'z prefiksi": [w[:4] for w in rng.choices(WORDS, k=100)],
+        "2 so'z": [f"{a} {b[:3]}" for a, b in zip(rng.choices(WORDS, k=100), rng.choices(WORDS, k=100))],
+    }
+    print(f"{'so`rov':<15}{'LIKE p50/p99':>18}{'FTS sovuq p50/p99':>22}{'FTS kesh p50/p99':>22}")
+    for name, items in queries.items():
+        like = measure(like_search, items[:20])
+        cold = measure(fts_cold, items)
+        measure(lambda q: Database.search_media(q, 0, 20), items)   # keshni to'ldirish
+        warm = measure(lambda q: Database.search_media(q, 20, 20), items)
+        print(f"{name:<15}{like[0]:>9.1f}/{like[1]:<8.1f}{cold[0]:>11.1f}/{cold[1]:<10.1f}"
+              f"{warm[0]:>11.3f}/{warm[1]:<10.3f}")
+
+    Database.close()
+
+
+if __name__ == "__main__":
+    main()
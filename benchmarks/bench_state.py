@@ -0,0 +1,74 @@
+"""State backendlari: amallar tezligi va jarayonlararo rate limit aniqligi.
+
+1) memory / sqlite / redis (FakeRedis) uchun get, set, gcra tezligi.
+2) Bir nechta jarayon bitta SQLite state faylida bitta foydalanuvchini
+   limitlaydi: jami ruxsatlar soni limitdan oshmasligi kerak.
+
+Ishga tushirish:  python benchmarks/bench_state.py [jarayonlar]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_redis import FakeRedis
+from state import MemoryBackend, SQLiteBackend, RedisBackend, StateHandlerBackend
+
+TMP = tempfile.mkdtemp()
+
+
+def ops_per_sec(fn, n: int = 20000) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - start)
+
+
+def bench_ops():
+    backends = {
+        "memory": MemoryBackend(),
+        "sqlite": SQLiteBackend(os.path.join(TMP, "ops.db")),
+        "redis*": RedisBackend(FakeRedis()),
+    }
+    print(f"{'backend':<8}{'set/s':>10}{'get/s':>10}{'gcra/s':>10}{'next-step/s':>13}")
+    for name, backend in backends.items():
+        steps = StateHandlerBackend(backend)
+        set_rate = ops_per_sec(lambda i: backend.set(f"k{i % 1000}", {"step": i}, 60))
+        get_rate = ops_per_sec(lambda i: backend.get(f"k{i % 1000}"))
+        gcra_rate = ops_per_sec(lambda i: backend.gcra(f"rl:{i % 1000}", 6, 54, 60))
+        # Oddiy xabar: next-step yo'qligini tekshirish (eng ko'p uchraydigan holat)
+        step_rate = ops_per_sec(lambda i: steps.get_handlers(i))
+        print(f"{name:<8}{set_rate:>10.0f}{get_rate:>10.0f}{gcra_rate:>10.0f}{step_rate:>13.0f}")
+        backend.close()
+
+
+def worker(path, attempts, results):
+    backend = SQLiteBackend(path)
+    allowed = sum(backend.gcra("rl:code:42", 6.0, 54.0, 60) == 0 for _ in range(attempts))
+    results.put(allowed)
+    backend.close()
+
+
+def bench_processes(processes: int):
+    path = os.path.join(TMP, "shared.db")
+    SQLiteBackend(path).close()
+    results = multiprocessing.Queue()
+    start = time.perf_counter()
+    procs = [multiprocessing.Process(target=worker, args=(path, 200, results)) for _ in range(processes)]
+    for p in procs:
+        p.start()
+    allowed = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    print(f"\n{processes} jarayon x 200 so'rov, limit 10/60s: ruxsat {sum(allowed)} {allowed} "
+          f"({processes * 200 / elapsed:.0f} gcra/s)")
+
+
+if __name__ == "__main__":
+    bench_ops()
+    bench_processes(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,111 @@
+"""Webhook javob (ack) kechikishi: inline ishlash vs UpdateQueue.
+
+Yozib olingan updatelar (JSONL, har qatorda bitta Update) yoki sintetik
+to'lqin Flask webhookga parallel POST qilinadi va har bir javobgacha
+bo'lgan vaqt o'lchanadi.
+
+Ishga tushirish:  python benchmarks/bench_webhook.py [updates.jsonl | soni] [latency_ms]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp()
+os.environ.update(BOT_TOKEN="123:fake", DB_NAME=os.path.join(TMP, "bench.db"),
+                  LOG_FILE=os.path.join(TMP, "bench.log"), USE_WEBHOOK="true")
+
+import requests
+from telebot import types
+from werkzeug.serving import make_server
+
+from fake_bot_api import FakeBotAPI
+import kino
+
+
+def synthetic_burst(count: int):
+    for i in range(count):
+        user_id = 10_000 + i % 300
+        yield {
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+                "text": f"K{i % 50:05d}",
+            },
+        }
+
+
+def load_burst(arg: str):
+    if os.path.exists(arg):
+        with open(arg) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return list(synthetic_burst(int(arg)))
+
+
+def replay(url: str, burst, concurrency: int = 32):
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def post(update):
+        start = time.perf_counter()
+        response = session.post(url, json=update)
+        return time.perf_counter() - start, response.status_code
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(post, burst))
+
+
+def report(name, results, elapsed):
+    latencies = sorted(r[0] * 1000 for r in results)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    busy = sum(1 for r in results if r[1] != 200)
+    print(f"{name:<8} p50={p50:7.1f} ms  p99={p99:7.1f} ms  "
+          f"{len(results) / elapsed:6.0f} ack/s  503={busy}")
+
+
+def main():
+    burst = load_burst(sys.argv[1] if len(sys.argv) > 1 else "1000")
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+    api = FakeBotAPI(latency=latency)
+    api.start()
+    kino.Database.init_db()
+    kino.BotHandlers.setup_handlers()
+
+    # Oldingi xatti-harakat: update javobdan oldin shu threadda ishlanadi
+    @kino.app.route('/webhook_inline', methods=['POST'])
+    def webhook_inline():
+        kino.bot.process_new_updates([types.Update.de_json(kino.request.get_json())])
+        return 'ok', 200
+
+    server = make_server("127.0.0.1", 0, kino.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"Updates: {len(burst)}, API kechikishi: {latency * 1000:.0f} ms")
+    for name, path in (("inline", "/webhook_inline"), ("queue", "/webhook")):
+        start = time.perf_counter()
+        results = replay(base + path, burst)
+        report(name, results, time.perf_counter() - start)
+    start = time.perf_counter()
+    kino.update_queue.stop()
+    print(f"Navbatni bo'shatish: {time.perf_counter() - start:.2f} s, {kino.update_queue.stats()}")
+
+    server.shutdown()
+    kino.Database.close()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Benchmark va sinovlar uchun mahalliy soxta Telegram Bot API serveri.
+
+    api = FakeBotAPI(latency=0.02, error_rate=0.01, blocked_users={42})
+    api.start()          # telebot.apihelper.API_URL shu serverga yo'naltiriladi
+    api.on_response = lambda method, params, status: ...   # ixtiyoriy kuzatuvchi
+    ...
+    api.stop()
+"""
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from telebot import apihelper, asyncio_helper
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, retry_after: int = 1,
+                 blocked_users=(), seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.blocked_users = set(blocked_users)
+        self.calls = Counter()
+        self.sent = Counter()          # chat_id -> yuborilgan xabarlar
+        self.updates = []              # getUpdates navbati
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._has_updates = threading.Condition(self._lock)
+        self._message_id = 0
+        self._server = None
+        self._thread = None
+        self._old_api_urls = None
+        self.on_response = None        # (method, params, status) - javob tayyor bo'lganda
+
+    # 1. Server
+    def start(self) -> str:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _handle(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                ctype = self.headers.get("Content-Type", "")
+                if body and ctype.startswith("application/x-www-form-urlencoded"):
+                    params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+                elif body and ctype.startswith("application/json"):
+                    params.update(json.loads(body))
+                method = url.path.rsplit("/", 1)[-1]
+                status, payload = api.handle(method, params)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._old_api_urls = (apihelper.API_URL, asyncio_helper.API_URL)
+        apihelper.API_URL = asyncio_helper.API_URL = self.url + "/bot{0}/{1}"
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        apihelper.API_URL, asyncio_helper.API_URL = self._old_api_urls
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # 2. Bot API metodlari
+    def handle(self, method: str, params: dict):
+        status, payload = self._respond(method, params)
+        if self.on_response is not None:
+            self.on_response(method, params, status)
+        return status, payload
+
+    def _respond(self, method: str, params: dict):
+        with self._lock:
+            self.calls[method] += 1
+            inject_429 = method != "getUpdates" and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if inject_429:
+            return 429, {
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }
+
+        chat_id = params.get("chat_id")
+        if chat_id is not None and int(chat_id) in self.blocked_users:
+            return 403, {"ok": False, "error_code": 403,
+                         "description": "Forbidden: bot was blocked by the user"}
+
+        handler = getattr(self, "api_" + method, None)
+        result = handler(params) if handler else True
+        return 200, {"ok": True, "result": result}
+
+    def _message(self, params: dict, **extra) -> dict:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+            self.sent[int(params["chat_id"])] += 1
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(params["chat_id"]), "type": "private"},
+        }
+        message.update(extra)
+        return message
+
+    def api_getMe(self, params):
+        return {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+    def api_sendMessage(self, params):
+        return self._message(params, text=params.get("text", ""))
+
+    def api_editMessageText(self, params):
+        return self._message(params, text=params.get("text", ""))
+
+    def api_sendVideo(self, params):
+        return self._message(params, video={"file_id": params.get("video"), "file_unique_id": "v",
+                                            "width": 1, "height": 1, "duration": 1})
+
+    def api_sendDocument(self, params):
+        return self._message(params, document={"file_id": params.get("document"), "file_unique_id": "d"})
+
+    def api_sendPhoto(self, params):
+        return self._message(params, photo=[{"file_id": params.get("photo"), "file_unique_id": "p",
+                                             "width": 1, "height": 1}])
+
+    def api_getChatMember(self, params):
+        return {"status": "member",
+                "user": {"id": int(params["user_id"]), "is_bot": False, "first_name": "User"}}
+
+    def api_answerInlineQuery(self, params):
+        with self._lock:
+            self.sent["inline"] += 1
+        return True
+
+    def push_updates(self, updates):
+        """getUpdates navbatiga update (dict) larni qo'shish"""
+        with self._lock:
+            self.updates.extend(updates)
+            self._has_updates.notify_all()
+
+    def api_getUpdates(self, params):
+        limit = int(params.get("limit", 100))
+        offset = int(params.get("offset", 0))
+        timeout = float(params.get("timeout", 0))
+        with self._lock:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            if not self.updates and timeout:
+                # Long polling: yangi update kelguncha yoki timeout gacha kutish
+                self._has_updates.wait(min(timeout, 1))
+            return self.updates[:limit]
@@ -0,0 +1,76 @@
+"""Sinov va benchmarklar uchun redis-py mijozining xotiradagi o'rinbosari.
+
+    backend = RedisBackend(FakeRedis())
+
+Faqat RedisBackend ishlatadigan buyruqlar bor; ``eval`` faqat GCRA_SCRIPT
+ni taniydi va uni Pythonda bajaradi.
+"""
+import threading
+import time
+
+from state import GCRA_SCRIPT
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}    # key -> (value: bytes, expires_at | None)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _get(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            self.calls += 1
+            item = self._get(key)
+            return None if item is None else item[0]
+
+    def set(self, key, value, px=None):
+        if isinstance(value, (int, float)):
+            value = str(value).encode()
+        with self._lock:
+            self.calls += 1
+            self._data[key] = (value, time.time() + px / 1000 if px else None)
+        return True
+
+    def getdel(self, key):
+        with self._lock:
+            self.calls += 1
+            item = self._get(key)
+            self._data.pop(key, None)
+            return None if item is None else item[0]
+
+    def delete(self, *keys):
+        with self._lock:
+            self.calls += 1
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        with self._lock:
+            self.calls += 1
+            item = self._get(key)
+            value = int(item[0]) + 1 if item else 1
+            self._data[key] = (str(value).encode(), item[1] if item else None)
+            return value
+
+    def eval(self, script, numkeys, *args):
+        if script != GCRA_SCRIPT:
+            raise NotImplementedError("FakeRedis faqat GCRA_SCRIPT ni bajaradi")
+        key = args[0]
+        now, interval, tolerance, px = (float(a) for a in args[numkeys:])
+        with self._lock:
+            self.calls += 1
+            item = self._get(key)
+            tat = max(float(item[0]) if item else now, now)
+            if tat - now > tolerance:
+                return str(tat - tolerance - now).encode()
+            self._data[key] = (str(tat + interval).encode(), time.time() + px / 1000)
+            return b"0"
+
+    def close(self):
+        pass
@@ -0,0 +1,241 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from telebot.apihelper import ApiTelegramException
+
+import outbound
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SENT, BLOCKED, FAILED = "sent", "blocked", "failed"
+
+
+class Broadcaster:
+    """Reklamani fon threadida barcha foydalanuvchilarga yuborish.
+
+    Foydalanuvchilar ``users`` jadvalidan ``user_id`` bo'yicha bo'laklab
+    o'qiladi, har bir bo'lakdan keyin ``broadcasts`` jadvaliga checkpoint
+    yoziladi, shuning uchun qayta ishga tushirilganda ``resume()`` to'xtagan
+    joyidan davom etadi.
+
+    Bir nechta jarayon bitta bazada ishlasa, reklamani faqat uni ``owner``
+    sifatida egallagan jarayon yuboradi. Egalik ``lease`` sekundlik ijara:
+    fon threadi uni ``lease / 2`` da uzaytiradi, jarayon o'lsa muddati
+    tugaydi va ``resume()`` qilgan boshqa jarayon reklamani davom ettiradi.
+    """
+
+    def __init__(self, bot, get_connection, rate: float = 25, workers: int = 8,
+                 chunk_size: int = 500, progress_interval: float = 5, max_retries: int = 3,
+                 lease: float = 120):
+        self.bot = bot
+        self.get_connection = get_connection
+        self.limiter = TokenBucket(rate)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self.max_retries = max_retries
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._threads = {}
+        self._watcher = None
+        self._resume = False
+
+    # 1. Boshqaruv
+    def start(self, text: str, admin_chat_id: int) -> int:
+        with self.get_connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM users WHERE blocked = 0").fetchone()[0]
+            cursor = conn.execute(
+                "INSERT INTO broadcasts (admin_chat_id, text, total, owner, lease_until) VALUES (?, ?, ?, ?, ?)",
+                (admin_chat_id, text, total, self.owner, time.time() + self.lease)
+            )
+            broadcast_id = cursor.lastrowid
+        self._spawn(broadcast_id)
+        return broadcast_id
+
+    def resume(self):
+        """To'xtab qolgan (status='running', ijarasi tugagan) reklamalarni davom ettirish.
+
+        Keyin ham fon threadida tekshirib turiladi: boshqa jarayon egallagan
+        reklama u to'xtab, ijarasi tugagach shu jarayonga o'tadi.
+        """
+        self._resume = True
+        self._claim_expired()
+        self._ensure_watcher()
+
+    def _ensure_watcher(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="broadcast-lease", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.lease / 2)
+            try:
+                self._renew()
+                if self._resume:
+                    self._claim_expired()
+            except Exception as e:
+                logger.error(f"Reklama ijarasini yangilashda xato: {e}")
+
+    def _renew(self):
+        active = [(time.time() + self.lease, broadcast_id, self.owner)
+                  for broadcast_id, thread in list(self._threads.items()) if thread.is_alive()]
+        if active:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    "UPDATE broadcasts SET lease_until = ? WHERE id = ? AND owner = ?", active
+                )
+
+    def _claim_expired(self):
+        now = time.time()
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT id FROM broadcasts WHERE status = 'running' "
+                "AND (owner IS NULL OR lease_until < ?)", (now,)
+            ).fetchall()
+        for row in rows:
+            if self._claim(row["id"], now):
+                logger.info(f"Reklama #{row['id']} davom ettirilmoqda")
+                self._spawn(row["id"])
+
+    def _claim(self, broadcast_id: int, now: float) -> bool:
+        """Reklamani atomar egallash: faqat egasi yo'q yoki ijarasi tugagan bo'lsa"""
+        with self.get_connection() as conn:
+            return conn.execute(
+                "UPDATE broadcasts SET owner = ?, lease_until = ? WHERE id = ? AND status = 'running' "
+                "AND (owner IS NULL OR lease_until < ?)",
+                (self.owner, now + self.lease, broadcast_id, now)
+            ).rowcount == 1
+
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self._threads.values())
+
+    def join(self, timeout: float = None):
+        for thread in list(self._threads.values()):
+            thread.join(timeout)
+
+    def _spawn(self, broadcast_id: int):
+        thread = threading.Thread(
+            target=self._run, args=(broadcast_id,), name=f"broadcast-{broadcast_id}", daemon=True
+        )
+        self._threads[broadcast_id] = thread
+        thread.start()
+        self._ensure_watcher()
+
+    # 2. Yuborish
+    def _iter_chunks(self, after_user_id: int):
+        while True:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT user_id FROM users WHERE user_id > ? AND blocked = 0 "
+                    "ORDER BY user_id LIMIT ?",
+                    (after_user_id, self.chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            chunk = [row["user_id"] for row in rows]
+            yield chunk
+            after_user_id = chunk[-1]
+
+    def _send(self, user_id: int, text: str) -> str:
+        for _ in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                # Umumiy navbatda interaktiv javoblardan keyin turadi
+                with outbound.bulk():
+                    self.bot.send_message(user_id, text)
+                return SENT
+            except ApiTelegramException as e:
+                # Navbat ishlayotgan bo'lsa 429 ni u qayta yuboradi; aks holda (async runtime) shu yerda
+                if e.error_code == 429 and not outbound.send_scheduler.running:
+                    retry_after = (e.result_json.get("parameters") or {}).get("retry_after", 1)
+                    self.limiter.pause(retry_after)
+                    continue
+                if e.error_code == 403 or "chat not found" in e.description.lower():
+                    return BLOCKED
+                logger.error(f"Foydalanuvchiga {user_id} reklama yuborishda xato: {e}")
+                return FAILED
+            except Exception as e:
+                logger.error(f"Foydalanuvchiga {user_id} reklama yuborishda xato: {e}")
+                return FAILED
+        return FAILED
+
+    def _run(self, broadcast_id: int):
+        with self.get_connection() as conn:
+            job = conn.execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,)).fetchone()
+        text, admin_chat_id, total = job["text"], job["admin_chat_id"], job["total"]
+        counts = {SENT: job["sent"], BLOCKED: job["blocked"], FAILED: job["failed"]}
+        last_user_id = job["last_user_id"]
+
+        progress = self._report(admin_chat_id, None, broadcast_id, counts, total)
+        last_report = time.monotonic()
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix=f"broadcast-{broadcast_id}") as pool:
+                for chunk in self._iter_chunks(last_user_id):
+                    results = list(pool.map(lambda uid: self._send(uid, text), chunk))
+                    blocked = []
+                    for user_id, result in zip(chunk, results):
+                        counts[result] += 1
+                        if result == BLOCKED:
+                            blocked.append((user_id,))
+                    last_user_id = chunk[-1]
+                    with self.get_connection() as conn:
+                        if blocked:
+                            conn.executemany("UPDATE users SET blocked = 1 WHERE user_id = ?", blocked)
+                        # Egalik yo'qolgan bo'lsa (ijara tugab, boshqa jarayon olgan) to'xtaymiz
+                        owned = conn.execute(
+                            "UPDATE broadcasts SET last_user_id = ?, sent = ?, blocked = ?, failed = ?, "
+                            "lease_until = ? WHERE id = ? AND owner = ?",
+                            (last_user_id, counts[SENT], counts[BLOCKED], counts[FAILED],
+                             time.time() + self.lease, broadcast_id, self.owner)
+                        ).rowcount
+                    if not owned:
+                        logger.warning(f"Reklama #{broadcast_id} boshqa jarayonga o'tdi, to'xtatildi")
+                        return
+                    if time.monotonic() - last_report >= self.progress_interval:
+                        progress = self._report(admin_chat_id, progress, broadcast_id, counts, total)
+                        last_report = time.monotonic()
+        except Exception as e:
+            logger.error(f"Reklama #{broadcast_id} jarayonida xato: {e}")
+            self._safe_send(admin_chat_id, "❌ Reklama yuborishda xatolik yuz berdi! "
+                                           "Keyinroq avtomatik davom ettiriladi.")
+            return
+
+        with self.get_connection() as conn:
+            conn.execute(
+                "UPDATE broadcasts SET status = 'done', finished_at = CURRENT_TIMESTAMP, owner = NULL "
+                "WHERE id = ? AND owner = ?",
+                (broadcast_id, self.owner)
+            )
+        self._report(admin_chat_id, progress, broadcast_id, counts, total, done=True)
+
+    # 3. Adminga hisobot
+    def _report(self, chat_id, message, broadcast_id, counts, total, done=False):
+        processed = counts[SENT] + counts[BLOCKED] + counts[FAILED]
+        header = "✅ Reklama yuborish yakunlandi!" if done else "📢 Reklama yuborilmoqda..."
+        text = (
+            f"{header} (#{broadcast_id})\n\n"
+            f"📨 Jarayon: {processed}/{total}\n"
+            f"✔️ Muvaffaqiyatli: {counts[SENT]}\n"
+            f"🚫 Bloklagan: {counts[BLOCKED]}\n"
+            f"❌ Yuborilmadi: {counts[FAILED]}"
+        )
+        try:
+            if message is None:
+                return self.bot.send_message(chat_id, text)
+            self.bot.edit_message_text(text, chat_id, message.message_id)
+        except Exception as e:
+            logger.error(f"Reklama hisobotini yuborishda xato: {e}")
+        return message
+
+    def _safe_send(self, chat_id, text):
+        try:
+            self.bot.send_message(chat_id, text)
+        except Exception as e:
+            logger.error(f"Adminga xabar yuborishda xato: {e}")
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from state import state
+
+_MISSING = object()
+INVALIDATION_TTL = 600      # umumiy backenddagi invalidatsiya yozuvlari shuncha saqlanadi
+INVALIDATION_REPLAY = 256   # bundan ko'p o'tkazib yuborilgan bo'lsa kesh to'liq tozalanadi
+
+
+class TTLCache:
+    """Hajmi cheklangan LRU kesh, har bir yozuv TTL dan keyin eskiradi.
+
+    Hit/miss/eviction hisoblagichlari ``stats()`` orqali ko'rinadi.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._loading = {}          # key -> yuklash belgisi (invalidate uni o'chiradi)
+        self._backend = None
+        self._next_check = float("inf")
+
+    def share(self, backend, name: str, check_interval: float = 1.0):
+        """Bir nechta jarayon: invalidate/clear boshqa jarayonlardagi nusxalarga ham yetib boradi.
+
+        Har bir o'zgarish umumiy backendda raqamlangan yozuv sifatida
+        qoladi (``inv:<name>:<n>`` -> kalit yoki butun kesh). Har jarayon
+        ``check_interval`` da bir marta hisoblagichni tekshirib, o'tkazib
+        yuborgan yozuvlarini qo'llaydi: faqat o'sha kalitlar o'chiriladi.
+        Yozuvlar topilmasa (muddati o'tgan, juda ko'p) kesh to'liq tozalanadi.
+        """
+        if not backend.shared:
+            return
+        self._backend = backend
+        self._gen_key = f"gen:{name}"
+        self._log_prefix = f"inv:{name}:"
+        self._generation = backend.counter(self._gen_key)
+        self._check_interval = check_interval
+        self._next_check = time.monotonic() + check_interval
+
+    def _sync(self, now: float):
+        self._next_check = now + self._check_interval
+        generation = self._backend.counter(self._gen_key)
+        if generation == self._generation:
+            return
+        missed = range(self._generation + 1, generation + 1)
+        entries = ([self._backend.get(f"{self._log_prefix}{n}") for n in missed]
+                   if len(missed) <= INVALIDATION_REPLAY else [None])
+        self._generation = generation
+        with self._lock:
+            if any(entry is None or entry[0] == "all" for entry in entries):
+                self._data.clear()
+                self._loading.clear()
+                return
+            for _, key in entries:
+                self._data.pop(key, None)
+                self._loading.pop(key, None)
+
+    def _publish(self, entry: tuple):
+        n = self._backend.incr(self._gen_key)
+        self._backend.set(f"{self._log_prefix}{n}", entry, INVALIDATION_TTL)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._sync(now)
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Read-through: keshda bo'lmasa ``loader(key)`` dan olib saqlash.
+
+        ``None`` natijalar keshlanmaydi, yangi yuklangan fayl darhol topiladi.
+        Yuklash paytida ``invalidate(key)`` chaqirilsa natija keshga
+        yozilmaydi (eski qator TTL davomida qolib ketmasin).
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            token = object()
+            with self._lock:
+                self._loading[key] = token
+            try:
+                value = loader(key)
+            except Exception:
+                with self._lock:
+                    if self._loading.get(key) is token:
+                        del self._loading[key]
+                raise
+            with self._lock:
+                if self._loading.get(key) is token:
+                    del self._loading[key]
+                    if value is not None:
+                        self._store(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._loading.pop(key, None)
+        if self._backend is not None:
+            self._publish(("key", key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._loading.clear()
+        if self._backend is not None:
+            self._publish(("all", None))
+
+    def patch(self, key, fn):
+        """Faqat shu jarayondagi nusxani yangilash (masalan ko'rishlar soni), boshqalarga tarqatilmaydi"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data[key] = (fn(item[0]), item[1])
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+# secret_code -> media qatori (file_id, file_type, ...)
+media_cache = TTLCache(
+    maxsize=int(os.getenv("MEDIA_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("MEDIA_CACHE_TTL", 600)),
+)
+
+# Inline qidiruv: normallashtirilgan so'rov -> eng mos natijalar ro'yxati
+search_cache = TTLCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", 2000)),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", 300)),
+)
+
+# (so'rov, offset) -> tayyor inline natijalar va next_offset
+inline_cache = TTLCache(
+    maxsize=int(os.getenv("INLINE_CACHE_SIZE", 5000)),
+    ttl=float(os.getenv("INLINE_CACHE_TTL", 300)),
+)
+
+# Bir nechta jarayonda o'zgarishlar (o'chirish, yangi fayl) hamma nusxalarga tarqaladi
+for _name, _cache in (("media", media_cache), ("search", search_cache), ("inline", inline_cache)):
+    _cache.share(state, _name)
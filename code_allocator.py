@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import string
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = string.digits + string.ascii_uppercase   # base-36
+CODE_LENGTH = 6
+SPACE = len(ALPHABET) ** CODE_LENGTH                # 36^6 ta kod
+
+# Kalitli Feistel shifri 32 bitli sonlar ustida (2^32 > 36^6), natija SPACE dan
+# katta chiqsa yana shifrlanadi (cycle-walking). Bu 36^6 maydonining kalitga bog'liq
+# biyeksiyasi: kodlar takrorlanmaydi, lekin kalitsiz bir koddan keyingisini topib bo'lmaydi.
+HALF_BITS = 16
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+
+
+def _round(key: bytes, i: int, half: int) -> int:
+    digest = hashlib.blake2b(bytes((i,)) + half.to_bytes(2, "big"), key=key, digest_size=2).digest()
+    return int.from_bytes(digest, "big")
+
+
+def permute(n: int, key: bytes) -> int:
+    """0..SPACE-1 oralig'idagi sonni shu oraliqdagi boshqa songa (kalit bo'yicha) o'tkazish"""
+    while True:
+        left, right = n >> HALF_BITS, n & HALF_MASK
+        for i in range(ROUNDS):
+            left, right = right, left ^ _round(key, i, right)
+        n = (left << HALF_BITS) | right
+        if n < SPACE:
+            return n
+
+
+def encode(n: int, key: bytes) -> str:
+    """Tartib raqamini 6 belgili base-36 kodga aylantirish"""
+    n = permute(n, key)
+    chars = []
+    for _ in range(CODE_LENGTH):
+        n, rem = divmod(n, len(ALPHABET))
+        chars.append(ALPHABET[rem])
+    return ''.join(reversed(chars))
+
+
+class CodeAllocator:
+    """Takrorlanmas kodlarni bazadagi ketma-ketlikdan partiyalab ajratish.
+
+    ``code_sequence`` jadvalidagi hisoblagich bitta tranzaksiyada
+    ``batch_size`` ga oshiriladi, so'ng kodlar xotiradan beriladi, ya'ni
+    har bir yuklash uchun bazaga murojaat yo'q. Bir nechta jarayon bir
+    bazadan foydalansa ham oraliqlar kesishmaydi. Raqam kodga ``secret``
+    kaliti bilan aralashtiriladi, shuning uchun kodlarni ketma-ket sanab
+    bo'lmaydi. Eski (tasodifiy)
+    kodlar bilan to'qnashuv partiya ajratilganda bitta so'rov bilan
+    chiqarib tashlanadi.
+    """
+
+    def __init__(self, get_connection, table: str, column: str, secret: str,
+                 name: str = None, batch_size: int = 100, reserved=()):
+        self.get_connection = get_connection
+        self.key = hashlib.blake2b(secret.encode()).digest()[:32]
+        self.table = table
+        self.column = column
+        self.name = name or f"{table}.{column}"
+        self.batch_size = batch_size
+        # Kod band hisoblanadigan boshqa (jadval, ustun) lar, masalan taxalluslar
+        self.sources = [(table, column), *reserved]
+        self._codes = deque()
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        with self._lock:
+            while not self._codes:
+                self._reserve()
+            return self._codes.popleft()
+
+    def _reserve(self):
+        with self.get_connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS code_sequence (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)"
+            )
+            conn.execute("INSERT OR IGNORE INTO code_sequence VALUES (?, 0)", (self.name,))
+            end = conn.execute(
+                "UPDATE code_sequence SET next_value = next_value + ? WHERE name = ? RETURNING next_value",
+                (self.batch_size, self.name)
+            ).fetchone()[0]
+            start = end - self.batch_size
+            if end > SPACE:
+                raise RuntimeError("Kodlar tugadi: 6 belgili kod maydoni to'ldi")
+
+            codes = [encode(n, self.key) for n in range(start, end)]
+            placeholders = ",".join("?" * len(codes))
+            query = " UNION ALL ".join(
+                f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})"
+                for table, column in self.sources
+            )
+            taken = {row[0] for row in conn.execute(query, codes * len(self.sources))}
+        if taken:
+            logger.info(f"{len(taken)} ta kod band, o'tkazib yuborildi")
+        self._codes.extend(code for code in codes if code not in taken)
@@ -1,8 +1,7 @@
 import os
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = [6945434529,7162596430]
-CHANNEL_ID =@tarjima_k_inolar
+CHANNEL_ID = "@tarjima_k_inolar"
 VIP_USERS = [6945434529,7162596430]  # VIP userlar ID ro'yxati
 # config.py
 ADMIN_IDS = [6945434529,7162596430]  # Admin ID lari ro'yxati
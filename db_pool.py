@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# SQLite sozlamalari (har bir yangi ulanishda qo'llaniladi)
+BUSY_TIMEOUT_MS = 5000            # Baza band bo'lsa kutish vaqti
+CACHE_SIZE_KB = 16000             # Sahifa keshi (~16 MB)
+MMAP_SIZE = 256 * 1024 * 1024     # Memory-mapped I/O (256 MB)
+STATEMENT_CACHE = 256             # Tayyorlangan so'rovlar keshi
+
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",   # Faqat yangi (bo'sh) bazada kuchga kiradi
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+class _Slot:
+    """Thread-local ulanish egasi: thread tugaganda yo'qoladi va finalizator ishlaydi"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class ConnectionPool:
+    """Har bir thread uchun bitta doimiy SQLite ulanishini saqlaydi.
+
+    Ulanish birinchi so'rovda ochiladi va thread yashaguncha qayta
+    ishlatiladi, shuning uchun ``sqlite3`` ning so'rovlar keshi
+    (``cached_statements``) ham thread ichida saqlanib qoladi. Thread
+    tugaganda uning thread-local ``_Slot`` i yo'qoladi va ulanish
+    finalizator orqali yopiladi.
+    """
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}    # ulanish -> weakref.finalize
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """Joriy thread ulanishini qaytarish (kerak bo'lsa ochish)"""
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            conn = self._connect()
+            slot = _Slot(conn)
+            self._local.slot = slot
+            with self._lock:
+                self._connections[conn] = weakref.finalize(slot, self._release, conn)
+        return slot.conn
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._connections.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Ulanishni yopishda xato: {e}")
+
+    def close_all(self):
+        """Barcha ochilgan ulanishlarni yopish (dastur to'xtaganda)"""
+        with self._lock:
+            finalizers = list(self._connections.values())
+        for finalizer in finalizers:
+            finalizer()
+        self._local = threading.local()
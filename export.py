@@ -0,0 +1,47 @@
+import csv
+import json
+import os
+import tempfile
+
+from storage import Database, BROWSE_TABLES
+
+FORMATS = ("csv", "jsonl")
+
+
+def write_csv(rows, columns, f):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(tuple(row))
+
+
+def write_jsonl(rows, columns, f):
+    for row in rows:
+        f.write(json.dumps(dict(zip(columns, tuple(row))), ensure_ascii=False, default=str))
+        f.write("\n")
+
+
+def export_table(table: str, fmt: str = "csv", chunk_size: int = 1000) -> tuple:
+    """Jadvalni vaqtinchalik faylga bo'laklab yozish.
+
+    Natija: (fayl yo'li, qatorlar soni). Faylni chaqiruvchi o'chiradi.
+    """
+    if table not in BROWSE_TABLES or fmt not in FORMATS:
+        raise ValueError(f"Noma'lum jadval yoki format: {table}, {fmt}")
+    columns = BROWSE_TABLES[table][1]
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in Database.iter_rows(table, chunk_size):
+            count += 1
+            yield row
+
+    fd, path = tempfile.mkstemp(prefix=f"{table}_", suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            (write_csv if fmt == "csv" else write_jsonl)(counted(), columns, f)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, count
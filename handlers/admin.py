@@ -1,50 +1,77 @@
-from config import ADMIN_IDS, DB_NAME
 from telebot import types
-import sqlite3
+from storage import Database, BROWSE_TABLES
+from export import export_table, FORMATS
+from auth import is_admin, require_admin
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-def register_admin_handlers(bot):
-    
-    # 1. Yordamchi funksiyalar
-    def get_db_connection():
-        """Bazaga yangi ulanish ochish"""
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        return conn
+PAGE_SIZE = 10
 
-    def is_admin(user_id: int) -> bool:
-        """Foydalanuvchi admin ekanligini tekshirish"""
-        return user_id in ADMIN_IDS
 
-    # 2. Admin komandalari
-    @bot.message_handler(commands=["admin"])
-    @admin_required
-    def admin_panel(message: types.Message):
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM media")
-            total_files = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users")
-            total_users = cursor.fetchone()[0]
-            
-        markup = types.InlineKeyboardMarkup()
-        markup.add(
-            types.InlineKeyboardButton("📊 Statistika", callback_data="admin_stats"),
-            types.InlineKeyboardButton("🗑 Fayl o'chirish", callback_data="admin_delete")
-        )
-        
-        bot.send_message(
-            message.chat.id,
-            f"👑 Admin panel\n\n"
-            f"📂 Fayllar: {total_files}\n"
-            f"👥 Foydalanuvchilar: {total_users}",
-            reply_markup=markup
+def format_row(table: str, row) -> str:
+    if table == "media":
+        return (
+            f"▫️ {row['file_name']}\n"
+            f"🔐 Kodi: {row['secret_code']}\n"
+            f"🕒 {row['upload_time']} · 👁 {row['views']}\n"
         )
+    username = f" (@{row['username']})" if row['username'] else ""
+    blocked = " 🚫" if row['blocked'] else ""
+    return f"👤 {row['first_name']}{username}{blocked}\n🆔 {row['user_id']} · 🕒 {row['last_active']}\n"
+
+
+def list_page(table: str, cursor: int = None, backward: bool = False) -> tuple:
+    """Sahifa matni va oldingi/keyingi tugmalari (callback: list:<jadval>:<p|n>:<kalit>)"""
+    rows, has_more = Database.browse(table, cursor, backward, PAGE_SIZE)
+    if not rows:
+        return "📭 Hech narsa topilmadi", None
+
+    key = BROWSE_TABLES[table][0]
+    title = "📂 Fayllar" if table == "media" else "👥 Foydalanuvchilar"
+    text = f"{title}:\n\n" + "\n".join(format_row(table, row) for row in rows)
+
+    # Orqaga yurilganda keyingi sahifa doim bor; oldinga yurilganda esa oldingisi
+    has_prev = has_more if backward else cursor is not None
+    has_next = True if backward else has_more
+    buttons = []
+    if has_prev:
+        buttons.append(types.InlineKeyboardButton("⬅️", callback_data=f"list:{table}:p:{rows[0][key]}"))
+    if has_next:
+        buttons.append(types.InlineKeyboardButton("➡️", callback_data=f"list:{table}:n:{rows[-1][key]}"))
+    markup = types.InlineKeyboardMarkup()
+    if buttons:
+        markup.row(*buttons)
+    return text, markup
+
+
+def stats_text(days: int = 7, top: int = 5) -> str:
+    """Oldindan hisoblangan statistika jadvallaridan hisobot matni"""
+    total_files, total_users = Database.get_stats()
+    lines = [
+        "📊 Bot statistikasi:\n",
+        f"• Fayllar soni: {total_files}",
+        f"• Foydalanuvchilar: {total_users}",
+    ]
+    daily = Database.get_daily_stats(days)
+    if daily:
+        lines.append("\n📅 Kunlar (yangi / faol / yuklash):")
+        lines.extend(f"{row['day']}: +{row['new_users']} / {row['active_users']} / {row['uploads']}" for row in daily)
+    codes = Database.top_codes(top)
+    if codes:
+        lines.append("\n🔥 Top kodlar:")
+        lines.extend(f"{row['secret_code']} · 👁 {row['views']} · {row['file_name']}" for row in codes)
+    return "\n".join(lines)
+
+
+def register_admin_handlers(bot, router):
+    
+    # 1. Yordamchi funksiyalar
+    admin_required = require_admin(bot)
 
-    @bot.message_handler(commands=['del', 'delete'])
+    # 2. Admin komandalari
+    @router.command("del", "delete")
     @admin_required
     def handle_delete(message: types.Message):
         if len(message.text.split()) < 2:
@@ -53,55 +80,70 @@ def register_admin_handlers(bot):
             
         code = message.text.split()[1].strip()
         
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM media WHERE secret_code=?", (code,))
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                bot.reply_to(message, f"✅ '{code}' o'chirildi")
-                logger.info(f"Admin {message.from_user.id} deleted file: {code}")
-            else:
-                bot.reply_to(message, f"❌ '{code}' topilmadi")
+        if Database.delete_media(code):
+            bot.reply_to(message, f"✅ '{code}' o'chirildi")
+            logger.info(f"Admin {message.from_user.id} deleted file: {code}")
+        else:
+            bot.reply_to(message, f"❌ '{code}' topilmadi")
 
-    @bot.message_handler(commands=['list'])
+    @router.command("retention")
+    @admin_required
+    def handle_retention(message: types.Message):
+        # /retention <code> <soat|off> - kod uchun alohida saqlash muddati
+        args = message.text.split()
+        if len(args) < 3 or not (args[2].isdigit() or args[2] == "off"):
+            bot.reply_to(message, "ℹ️ Format: /retention <code> <soat|off>")
+            return
+
+        code = args[1].strip()
+        hours = None if args[2] == "off" else int(args[2])
+        if not Database.set_retention(code, hours):
+            bot.reply_to(message, f"❌ '{code}' topilmadi")
+            return
+        when = "muddatsiz saqlanadi" if hours is None else f"yuklangandan {hours} soat keyin o'chadi"
+        bot.reply_to(message, f"✅ '{code}' {when}")
+        logger.info(f"Admin {message.from_user.id} set retention for {code}: {args[2]}")
+
+    @router.command("list")
     @admin_required
     def list_files(message: types.Message):
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT secret_code, file_name, upload_time 
-                FROM media 
-                ORDER BY upload_time DESC 
-                LIMIT 20
-            """)
-            files = cursor.fetchall()
-            
-        if not files:
-            bot.reply_to(message, "📭 Fayllar topilmadi")
+        # /list [media|users]
+        args = message.text.split()
+        table = args[1] if len(args) > 1 else "media"
+        if table not in BROWSE_TABLES:
+            bot.reply_to(message, "ℹ️ Format: /list [media|users]")
             return
-            
-        response = "📂 So'ngi 20 fayl:\n\n"
-        for file in files:
-            response += (
-                f"▫️ {file['file_name']}\n"
-                f"🔐 Kodi: {file['secret_code']}\n"
-                f"🕒 {file['upload_time']}\n\n"
-            )
-            
-        bot.reply_to(message, response)
+        text, markup = list_page(table)
+        bot.reply_to(message, text, reply_markup=markup)
+
+    @router.command("export")
+    @admin_required
+    def export_handler(message: types.Message):
+        # /export [media|users] [csv|jsonl]
+        args = message.text.split()
+        table = args[1] if len(args) > 1 else "media"
+        fmt = args[2] if len(args) > 2 else "csv"
+        if table not in BROWSE_TABLES or fmt not in FORMATS:
+            bot.reply_to(message, "ℹ️ Format: /export [media|users] [csv|jsonl]")
+            return
+
+        path, count = export_table(table, fmt)
+        try:
+            with open(path, "rb") as f:
+                bot.send_document(message.chat.id, f, visible_file_name=f"{table}.{fmt}",
+                                  caption=f"📦 {table}: {count} qator")
+        finally:
+            os.remove(path)
+        logger.info(f"Admin {message.from_user.id} exported {table} ({count} rows, {fmt})")
 
     # 3. Callback handlerlar
-    @bot.callback_query_handler(func=lambda call: call.data.startswith('admin_'))
-    def admin_callback_handler(call: types.CallbackQuery):
+    @router.callback_prefix("list")
+    def list_callback_handler(call: types.CallbackQuery):
         if not is_admin(call.from_user.id):
             bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
             return
-            
-        if call.data == 'admin_stats':
-            # Statistika logikasi
-            pass
-        elif call.data == 'admin_delete':
-            # O'chirish uchun kod so'rash
-            msg = bot.send_message(call.message.chat.id, "🗑 O'chirish uchun kod yuboring:")
-            bot.register_next_step_handler(msg, handle_delete)
\ No newline at end of file
+
+        _, table, direction, cursor = call.data.split(':')
+        text, markup = list_page(table, int(cursor), backward=direction == 'p')
+        bot.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=markup)
+        bot.answer_callback_query(call.id)
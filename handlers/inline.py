@@ -1,20 +1,65 @@
-def register_handlers(bot):
-    @bot.inline_handler(func=lambda query: len(query.query) == 6)
-    def inline_code_query(inline_query):
-        from database import get_file
-        record = get_file(inline_query.query.upper())
-        if not record:
-            return
-
-        _, _, file_id, file_type, _, caption, views, _ = record
-        from telebot.types import InlineQueryResultArticle, InputTextMessageContent
-
-        results = [
-            InlineQueryResultArticle(
-                id=inline_query.id,
-                title="📥 Faylni olish",
-                input_message_content=InputTextMessageContent(f"🆔 Kod: {inline_query.query}\n👁 Ko‘rishlar: {views}"),
-                description=caption,
-            )
-        ]
-        bot.answer_inline_query(inline_query.id, results)
+from telebot.types import (
+    InlineQueryResultCachedAudio, InlineQueryResultCachedDocument,
+    InlineQueryResultCachedPhoto, InlineQueryResultCachedVideo,
+)
+
+from cache import inline_cache
+from storage import Database
+
+INLINE_PAGE_SIZE = 20
+# Natijalar foydalanuvchiga bog'liq emas (is_personal=False), shuning uchun
+# takroriy so'rovlarni Telegramning o'z keshi qaytaradi
+INLINE_CACHE_TIME = 300
+
+
+def is_inline_search(inline_query) -> bool:
+    return len(inline_query.query.strip()) >= 2
+
+
+def media_result(media):
+    """Saqlangan file_id dan file_type ga mos tayyor (cached) inline natija"""
+    code = media['secret_code']
+    title = media['file_name'] or media['caption'] or code
+    caption = f"🆔 Kod: {code}"
+    # Hali bazaga yozilmagan ko'rishlar ham qo'shiladi
+    views = media['views'] + Database.pending_views(code)
+    description = f"🆔 {code} · 👁 {views}"
+    file_type = media['file_type']
+    if file_type == 'video':
+        return InlineQueryResultCachedVideo(code, media['file_id'], title,
+                                            description=description, caption=caption)
+    if file_type == 'audio':
+        return InlineQueryResultCachedAudio(code, media['file_id'], caption=caption)
+    if file_type == 'photo':
+        return InlineQueryResultCachedPhoto(code, media['file_id'], title=title,
+                                            description=description, caption=caption)
+    return InlineQueryResultCachedDocument(code, media['file_id'], title,
+                                           description=description, caption=caption)
+
+
+def _load_results(key: tuple) -> tuple:
+    text, offset = key
+    # Nom va izoh bo'yicha qidiruv, next_offset orqali sahifalab
+    rows, next_offset = Database.search_media(text, offset, INLINE_PAGE_SIZE)
+    results = [media_result(row) for row in rows]
+    return results, str(next_offset) if next_offset is not None else ""
+
+
+def inline_results(text: str, offset: int = 0) -> tuple:
+    """Inline so'rov natijalari va keyingi sahifa offseti ("" - oxirgi sahifa)"""
+    key = (" ".join(text.lower().split()), offset)
+    # 6 belgili so'rov avval kod sifatida tekshiriladi. Bu natija inline_cache ga
+    # tushmaydi: qator media_cache da, ko'rishlar soni esa har safar yangi
+    if len(key[0]) == 6 and offset == 0:
+        media = Database.get_media_by_code(key[0].upper())
+        if media:
+            return [media_result(media)], ""
+    return inline_cache.get_or_load(key, _load_results)
+
+
+def register_handlers(bot, router):
+    @router.inline(func=is_inline_search)
+    def inline_query_handler(inline_query):
+        results, next_offset = inline_results(inline_query.query.strip(), int(inline_query.offset or 0))
+        bot.answer_inline_query(inline_query.id, results, cache_time=INLINE_CACHE_TIME,
+                                is_personal=False, next_offset=next_offset)
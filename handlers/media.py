@@ -1,44 +1,64 @@
-import random, string
-from database import save_file, get_file, increment_views
+from storage import Database
 from telebot import types
+from rate_limit import rate_limits
+from outbound import detached
 
-def generate_code(length=6):
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-
-def register_handlers(bot):
-    @bot.message_handler(content_types=["document", "video", "audio"])
+def register_handlers(bot, router):
+    @router.content_type("document", "video", "audio")
+    @detached()
     def handle_media(msg):
+        if rate_limits.is_limited("upload", msg.from_user.id):
+            bot.send_message(msg.chat.id, "⏳ Juda ko'p yuklash! Biroz kuting.")
+            return
         file_type = msg.content_type
-        file_id = getattr(msg, file_type).file_id
+        media = getattr(msg, file_type)
+        # Qayta yuklangan yoki forward qilingan fayl: yangi qator emas, mavjud kod
+        existing = Database.get_media_by_unique_id(media.file_unique_id)
+        if existing:
+            bot.send_message(msg.chat.id, f"♻️ Bu fayl allaqachon saqlangan!\n🆔 Kod: `{existing['secret_code']}`",
+                             parse_mode="Markdown")
+            return
         caption = msg.caption or ""
-        code = generate_code()
         format = "mp4" if file_type == "video" else "mp3"
-        save_file(code, msg.from_user.id, file_id, file_type, format, caption)
+        code = Database.add_media(media.file_id, file_type, getattr(media, "file_name", None) or caption,
+                                  Database.allocate_code(), user_id=msg.from_user.id, format=format,
+                                  caption=caption, file_unique_id=media.file_unique_id)
 
         text = f"✅ Faylingiz saqlandi!\n🆔 Kod: `{code}`\n📎 Format: {format}"
         bot.send_message(msg.chat.id, text, parse_mode="Markdown")
 
-    @bot.message_handler(func=lambda m: len(m.text) == 6)
+    @router.code()
+    @detached()
     def handle_code(msg):
-        record = get_file(msg.text.upper())
-        if not record:
+        if rate_limits.is_limited("code", msg.from_user.id):
+            bot.send_message(msg.chat.id, "⏳ Juda ko'p so'rov! Biroz kuting.")
+            return
+        code = msg.text.upper()
+        media = Database.get_media_by_code(code)
+        if not media:
             bot.send_message(msg.chat.id, "❌ Fayl topilmadi yoki o‘chirilgan.")
             return
-        increment_views(msg.text.upper())
-        _, user_id, file_id, file_type, format, caption, views, _ = record
+        # Birlashtirilgan dublikat kodi bo'lsa ham ko'rishlar asosiy kodga yoziladi
+        code = media['secret_code']
+        Database.increment_views(code)
+        views = media['views'] + Database.pending_views(code)
+        format = media['format'] or "-"
 
         markup = types.InlineKeyboardMarkup()
         markup.add(types.InlineKeyboardButton("❌ O‘chirish", callback_data=f"delete:{msg.text}"))
 
         bot.send_message(
             msg.chat.id,
-            f"📥 Fayl:\n🆔 Kod: `{msg.text}`\n👁 Ko‘rishlar: {views + 1}\n📎 Format: {format}",
+            f"📥 Fayl:\n🆔 Kod: `{msg.text}`\n👁 Ko‘rishlar: {views}\n📎 Format: {format}",
             parse_mode="Markdown"
         )
 
-        getattr(bot, f"send_{file_type}")(msg.chat.id, file_id, caption=caption, reply_markup=markup)
+        getattr(bot, f"send_{media['file_type']}")(
+            msg.chat.id, media['file_id'], caption=media['caption'], reply_markup=markup
+        )
 
-    @bot.callback_query_handler(func=lambda c: c.data.startswith("delete:"))
+    @router.callback_prefix("delete")
+    @detached()
     def delete_file(call):
         code = call.data.split(":")[1]
         bot.delete_message(call.message.chat.id, call.message.message_id)
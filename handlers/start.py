@@ -1,15 +1,21 @@
 from telebot import types
 from config import CHANNEL_ID
+from subscription import subscription_cache
+from outbound import detached
 
 def check_subscription(bot, user_id):
-    try:
-        status = bot.get_chat_member(CHANNEL_ID, user_id).status
+    def fetch(channel, user_id):
+        status = bot.get_chat_member(channel, user_id).status
         return status in ["member", "administrator", "creator"]
+
+    try:
+        return subscription_cache.check(CHANNEL_ID, user_id, fetch)
     except:
         return False
 
-def register_handlers(bot):
-    @bot.message_handler(commands=["start"])
+def register_handlers(bot, router):
+    @router.command("start")
+    @detached()
     def start_handler(msg):
         if not check_subscription(bot, msg.from_user.id):
             markup = types.InlineKeyboardMarkup()
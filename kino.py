@@ -1,154 +1,89 @@
 import os
-import sqlite3
+import sys
 import logging
-from datetime import datetime
-from collections import defaultdict
 from telebot import TeleBot, types
+from telebot.handler_backends import BaseMiddleware
 from telebot.util import quick_markup
 from dotenv import load_dotenv
 from flask import Flask, request
 import time
 
+from storage import Database
+from cache import media_cache, search_cache, inline_cache
+from broadcast import Broadcaster
+from subscription import subscription_cache
+from rate_limit import rate_limits
+from update_queue import UpdateQueue
+from polling import PollingRunner
+from retention import retention_job
+from state import state, StateHandlerBackend
+from auth import admins
+from log_pipeline import log_pipeline
+import metrics
+from router import Router
+from outbound import send_scheduler, detached
+from handlers import inline
+from handlers.admin import stats_text, register_admin_handlers
+
 # 1. SOZLAMALAR
 load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = list(map(int, os.getenv("ADMIN_IDS", "").split(','))) if os.getenv("ADMIN_IDS") else []
 CHANNEL_USERNAME = os.getenv("CHANNEL_USERNAME")
 CHANNEL_LINK = os.getenv("CHANNEL_LINK")
-DB_NAME = os.getenv("DB_NAME", "media_bot.db")
 LOG_FILE = os.getenv("LOG_FILE", "bot.log")
 USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() == "true"
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+BOT_RUNTIME = os.getenv("BOT_RUNTIME", "threaded").lower()  # threaded | async
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", 8))
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", 10000))
+POLLING_LIMIT = int(os.getenv("POLLING_LIMIT", 100))
+POLLING_TIMEOUT = int(os.getenv("POLLING_TIMEOUT", 25))
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))  # polling rejimida; 0 - o'chirilgan
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")         # fayl uchun: json | text
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")       # masalan "midnight"; bo'lmasa hajm bo'yicha
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))       # to'lsa INFO tashlanadi, WARNING+ kutadi
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", 10))   # bir xil xato: daqiqasiga
 
 # 2. LOGGING
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Handler threadida faqat navbatga qo'yish; yozish, aylantirish va formatlash fon threadida
+log_pipeline.setup(LOG_FILE, fmt=LOG_FORMAT, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                   when=LOG_ROTATE_WHEN, queue_size=LOG_QUEUE_SIZE, burst=LOG_SAMPLE_BURST)
 logger = logging.getLogger(__name__)
 
 # 3. FLASK VA BOT OBEKTlARI
-bot = TeleBot(BOT_TOKEN)
+# Updatelar UpdateQueue ishchilarida ishlanadi, TeleBot o'z pooliga uzatmaydi.
+# Next-step holati STATE_BACKEND da: bir nechta jarayon va qayta ishga tushirishda saqlanadi
+bot = TeleBot(BOT_TOKEN, threaded=False, use_class_middlewares=True,
+              next_step_backend=StateHandlerBackend(state))
 app = Flask(__name__) if USE_WEBHOOK else None
-
-# 4. MA'LUMOTLAR BAZASI
-class Database:
-    @staticmethod
-    def get_connection():
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    @staticmethod
-    def init_db():
-        tables = [
-            """CREATE TABLE IF NOT EXISTS media (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_id TEXT NOT NULL,
-                file_type TEXT NOT NULL,
-                file_name TEXT,
-                secret_code TEXT UNIQUE NOT NULL,
-                upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                views INTEGER DEFAULT 0
-            )""",
-            """CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""",
-            """CREATE TABLE IF NOT EXISTS admins (
-                user_id INTEGER PRIMARY KEY,
-                added_by INTEGER,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""",
-            "CREATE INDEX IF NOT EXISTS idx_secret_code ON media(secret_code)"
-        ]
-        
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            for table in tables:
-                cursor.execute(table)
-
-    @staticmethod
-    def update_user(user: types.User):
-        with Database.get_connection() as conn:
-            conn.execute("""
-            INSERT OR REPLACE INTO users 
-            (user_id, username, first_name, last_name, last_active)
-            VALUES (?, ?, ?, ?, ?)
-            """, (
-                user.id,
-                user.username,
-                user.first_name,
-                user.last_name,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ))
-
-    @staticmethod
-    def add_media(file_id: str, file_type: str, file_name: str, secret_code: str):
-        with Database.get_connection() as conn:
-            conn.execute(
-                "INSERT INTO media (file_id, file_type, file_name, secret_code) VALUES (?, ?, ?, ?)",
-                (file_id, file_type, file_name, secret_code)
-            )
-
-    @staticmethod
-    def get_media_by_code(code: str):
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM media WHERE secret_code = ?", (code,))
-            return cursor.fetchone()
-
-    @staticmethod
-    def increment_views(code: str):
-        with Database.get_connection() as conn:
-            conn.execute("UPDATE media SET views = views + 1 WHERE secret_code = ?", (code,))
-
-    @staticmethod
-    def delete_media(code: str):
-        with Database.get_connection() as conn:
-            conn.execute("DELETE FROM media WHERE secret_code = ?", (code,))
-
-    @staticmethod
-    def get_stats():
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM media")
-            media_count = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM users")
-            users_count = cursor.fetchone()[0]
-            return media_count, users_count
-
-    @staticmethod
-    def add_admin(user_id: int, added_by: int):
-        with Database.get_connection() as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO admins (user_id, added_by) VALUES (?, ?)",
-                (user_id, added_by)
-            )
-
-    @staticmethod
-    def is_admin_in_db(user_id: int) -> bool:
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM admins WHERE user_id = ?", (user_id,))
-            return cursor.fetchone() is not None
-
-# 5. YORDAMCHI FUNKTSIYALAR
+# Handlerlar lambda filtrlar zanjiri emas, lug'atlar orqali tanlanadi (router.py)
+router = Router()
+update_queue = UpdateQueue(bot.process_new_updates, workers=UPDATE_WORKERS, maxsize=UPDATE_QUEUE_SIZE)
+polling_runner = PollingRunner(bot, update_queue, limit=POLLING_LIMIT, timeout=POLLING_TIMEOUT)
+
+metrics.instrument_telegram_api()
+# bot.send_* chaqiruvlari umumiy yuborish navbati orqali (outbound.py); start() dan oldin to'g'ridan-to'g'ri
+send_scheduler.install()
+metrics.cache_gauges({"media": media_cache, "subscription": subscription_cache,
+                      "search": search_cache, "inline": inline_cache})
+metrics.stats_gauge("bot_updates", "Update navbati va polling holati",
+                    update_queue.stats if USE_WEBHOOK else polling_runner.stats)
+metrics.stats_gauge("bot_send", "Yuborish navbati: kutayotganlar, yuborilgan, birlashtirilgan, qayta urinish",
+                    send_scheduler.stats)
+metrics.stats_gauge("bot_logging", "Log navbati, tashlangan, navbatsiz yozilgan va cheklangan yozuvlar", log_pipeline.stats)
+metrics.stats_gauge("bot_retention", "O'chirilgan qatorlar va bo'shatilgan sahifalar", retention_job.stats)
+metrics.registry.gauge("bot_rate_limit_keys", "Limiterdagi faol kalitlar",
+                       lambda: {(name, ): n for name, n in rate_limits.stats().items()}, ("command",))
+
+# 4. YORDAMCHI FUNKTSIYALAR
 class Utils:
-    _user_requests = defaultdict(list)
-
     @staticmethod
     def is_admin(user_id: int) -> bool:
-        return user_id in ADMIN_IDS or Database.is_admin_in_db(user_id)
+        # env + config + admins jadvali, xotiradagi to'plam (auth.AdminRegistry)
+        return admins.is_admin(user_id)
 
     @staticmethod
     def is_valid_code(code: str) -> bool:
@@ -156,16 +91,17 @@ class Utils:
 
     @staticmethod
     def is_code_available(code: str) -> bool:
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM media WHERE secret_code = ?", (code,))
-            return cursor.fetchone() is None
+        return Database.get_media_by_code(code) is None
+
+    @staticmethod
+    def _fetch_subscription(channel, user_id: int) -> bool:
+        chat_member = bot.get_chat_member(channel, user_id)
+        return chat_member.status in ['member', 'administrator', 'creator']
 
     @staticmethod
     def check_subscription(user_id: int) -> bool:
         try:
-            chat_member = bot.get_chat_member(CHANNEL_USERNAME, user_id)
-            return chat_member.status in ['member', 'administrator', 'creator']
+            return subscription_cache.check(CHANNEL_USERNAME, user_id, Utils._fetch_subscription)
         except Exception as e:
             logger.error(f"Obunani tekshirishda xato: {e}")
             if "chat not found" in str(e).lower():
@@ -173,27 +109,42 @@ class Utils:
             return False
 
     @staticmethod
-    def is_rate_limited(user_id: int, limit: int = 5, period: int = 60) -> bool:
-        now = datetime.now()
-        Utils._user_requests[user_id] = [t for t in Utils._user_requests[user_id] if (now - t).seconds < period]
-        if len(Utils._user_requests[user_id]) >= limit:
-            return True
-        Utils._user_requests[user_id].append(now)
-        return False
-
-# 6. BOT HANDLERLARI
+    def is_rate_limited(user_id: int, command: str = "default") -> bool:
+        return rate_limits.is_limited(command, user_id)
+
+# 5. BOT HANDLERLARI
+class ActivityMiddleware(BaseMiddleware):
+    """Botga yozgan har bir foydalanuvchini users jadvalida qayd etish"""
+
+    def __init__(self):
+        super().__init__()
+        self.update_types = ['message', 'edited_message', 'callback_query', 'inline_query']
+
+    def pre_process(self, message, data):
+        if message.from_user:
+            Database.update_user(message.from_user)
+
+    def post_process(self, message, data, exception):
+        pass
+
+
 class BotHandlers:
-    BATCH_SIZE = 30  # Telegram API limiti (30 xabar/sekund)
-    DELAY = 1        # Har bir batch orasidagi kutish vaqti
+    RATE = 25        # Telegram API limiti (~30 xabar/sekund)
+    WORKERS = 8      # Parallel yuboruvchi threadlar
+    broadcaster = Broadcaster(bot, Database.get_connection, rate=RATE, workers=WORKERS)
 
     @staticmethod
     def setup_handlers():
-        @bot.message_handler(commands=['start'])
+        bot.setup_middleware(ActivityMiddleware())
+        router.attach(bot)
+        inline.register_handlers(bot, router)
+
+        @router.command('start')
+        @detached()
         def send_welcome(message: types.Message):
-            Database.update_user(message.from_user)
             bot.reply_to(message, f"Assalomu alaykum! Botga xush kelibsiz!\n\nKanalimiz: {CHANNEL_LINK}")
 
-        @bot.message_handler(commands=['admin'])
+        @router.command('admin')
         def admin_panel(message: types.Message):
             if not Utils.is_admin(message.from_user.id):
                 bot.reply_to(message, "⚠️ Sizga ruxsat yo'q!")
@@ -208,6 +159,9 @@ class BotHandlers:
                 types.InlineKeyboardButton("👤 Admin qo'shish", callback_data="add_admin"),
                 types.InlineKeyboardButton("🗑️ Fayl o'chirish", callback_data="delete_file")
             )
+            markup.row(
+                types.InlineKeyboardButton("🚫 Admin o'chirish", callback_data="remove_admin")
+            )
             
             bot.send_message(
                 message.chat.id,
@@ -215,170 +169,213 @@ class BotHandlers:
                 reply_markup=markup
             )
 
-        @bot.message_handler(func=lambda m: True, content_types=['text'])
+        # /list, /export, /delete, /retention (handlers/admin.py)
+        register_admin_handlers(bot, router)
+
+        # Kodlar tez yo'l orqali, boshqa matn (eski formatdagi kodlar ham) fallback sifatida
+        @router.code()
+        @router.text()
+        @detached()
         def handle_text(message: types.Message):
             if message.text.startswith('/'):
                 bot.reply_to(message, "⚠️ Noma'lum buyruq!")
                 return
+
+            if Utils.is_rate_limited(message.from_user.id, "code"):
+                bot.reply_to(message, "⏳ Juda ko'p so'rov! Biroz kuting.")
+                return
             
             # Media fayllarni qidirish uchun kod
             media = Database.get_media_by_code(message.text)
             if media:
-                Database.increment_views(message.text)
+                Database.increment_views(media['secret_code'])
                 if media['file_type'] == 'photo':
                     bot.send_photo(message.chat.id, media['file_id'])
                 elif media['file_type'] == 'video':
                     bot.send_video(message.chat.id, media['file_id'])
+                elif media['file_type'] == 'audio':
+                    bot.send_audio(message.chat.id, media['file_id'])
                 else:
                     bot.send_document(message.chat.id, media['file_id'])
             else:
                 bot.reply_to(message, "❌ Topilmadi! Noto'g'ri kod yoki fayl o'chirilgan.")
 
-        @bot.callback_query_handler(func=lambda call: True)
+        callbacks = {
+            "show_stats": BotHandlers.handle_show_stats,
+            "send_ad": BotHandlers.handle_send_ad,
+            "add_admin": BotHandlers.handle_add_admin,
+            "remove_admin": BotHandlers.handle_remove_admin,
+            "delete_file": BotHandlers.handle_delete_file,
+        }
+
+        @router.callback(*callbacks)
         def handle_callbacks(call: types.CallbackQuery):
             try:
-                if call.data == "show_stats":
-                    BotHandlers.handle_show_stats(call)
-                elif call.data == "send_ad":
-                    BotHandlers.handle_send_ad(call)
-                elif call.data == "add_admin":
-                    BotHandlers.handle_add_admin(call)
-                elif call.data == "delete_file":
-                    BotHandlers.handle_delete_file(call)
-                    
+                callbacks[call.data](call)
             except Exception as e:
                 logger.error(f"Callback error: {e}")
                 bot.answer_callback_query(call.id, "❌ Xatolik yuz berdi!")
 
-        @staticmethod
-        def handle_show_stats(call: types.CallbackQuery):
-            if not Utils.is_admin(call.from_user.id):
-                bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
-                return
-                
-            media_count, users_count = Database.get_stats()
-            bot.edit_message_text(
-                f"📊 Bot statistikasi:\n\n"
-                f"• Fayllar soni: {media_count}\n"
-                f"• Foydalanuvchilar: {users_count}",
-                call.message.chat.id,
-                call.message.message_id
-            )
+    @staticmethod
+    def handle_show_stats(call: types.CallbackQuery):
+        if not Utils.is_admin(call.from_user.id):
+            bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return
+            
+        cache = media_cache.stats()
+        bot.edit_message_text(
+            f"{stats_text()}\n\n"
+            f"• Kesh: {cache['size']}/{cache['maxsize']}, "
+            f"hit {cache['hits']}, miss {cache['misses']}, "
+            f"evict {cache['evictions']} ({cache['hit_ratio']:.0%})",
+            call.message.chat.id,
+            call.message.message_id
+        )
 
-        @staticmethod
-        def handle_send_ad(call: types.CallbackQuery):
-            if not Utils.is_admin(call.from_user.id):
-                bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
-                return
-                
-            msg = bot.send_message(call.message.chat.id, "📢 Reklama matnini yuboring:")
-            bot.register_next_step_handler(msg, BotHandlers.process_ad_text)
+    @staticmethod
+    def handle_send_ad(call: types.CallbackQuery):
+        if not Utils.is_admin(call.from_user.id):
+            bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return
+            
+        msg = bot.send_message(call.message.chat.id, "📢 Reklama matnini yuboring:")
+        bot.register_next_step_handler(msg, BotHandlers.process_ad_text)
 
-        @staticmethod
-        def handle_add_admin(call: types.CallbackQuery):
-            if not Utils.is_admin(call.from_user.id):
-                bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+    @staticmethod
+    def handle_add_admin(call: types.CallbackQuery):
+        if not Utils.is_admin(call.from_user.id):
+            bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return
+            
+        msg = bot.send_message(
+            call.message.chat.id,
+            "Yangi adminning ID sini yuboring yoki uning xabarini forward qiling:"
+        )
+        bot.register_next_step_handler(msg, BotHandlers.process_new_admin)
+
+    @staticmethod
+    def handle_remove_admin(call: types.CallbackQuery):
+        if not Utils.is_admin(call.from_user.id):
+            bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return
+
+        msg = bot.send_message(
+            call.message.chat.id,
+            "O'chiriladigan adminning ID sini yuboring yoki uning xabarini forward qiling:"
+        )
+        bot.register_next_step_handler(msg, BotHandlers.process_remove_admin)
+
+    @staticmethod
+    def handle_delete_file(call: types.CallbackQuery):
+        if not Utils.is_admin(call.from_user.id):
+            bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return
+            
+        msg = bot.send_message(call.message.chat.id, "O'chirish uchun fayl kodini yuboring:")
+        bot.register_next_step_handler(msg, BotHandlers.process_delete_file)
+
+    @staticmethod
+    def process_ad_text(message: types.Message):
+        try:
+            ad_text = message.text.strip()
+            if not ad_text:
+                bot.send_message(message.chat.id, "❌ Reklama matni bo'sh bo'lishi mumkin emas!")
                 return
+
+            # Yuborish fon threadida bajariladi, handler darhol bo'shaydi
+            BotHandlers.broadcaster.start(ad_text, message.chat.id)
+
+        except Exception as e:
+            logger.error(f"Reklama jarayonida xato: {e}")
+            bot.send_message(message.chat.id, "❌ Reklama yuborishda xatolik yuz berdi!")
+
+    @staticmethod
+    def process_new_admin(message: types.Message):
+        try:
+            # Forward qilingan xabardan admin qo'shish
+            if message.forward_from:
+                new_admin_id = message.forward_from.id
+            else:
+                new_admin_id = int(message.text)
                 
-            msg = bot.send_message(
-                call.message.chat.id,
-                "Yangi adminning ID sini yuboring yoki uning xabarini forward qiling:"
+            admins.add(new_admin_id, message.from_user.id)
+            bot.send_message(
+                message.chat.id,
+                f"✅ Yangi admin qo'shildi: {new_admin_id}\n"
+                f"Endi u /admin buyrug'i orqali panelga kira oladi."
             )
-            bot.register_next_step_handler(msg, BotHandlers.process_new_admin)
+        except ValueError:
+            bot.send_message(message.chat.id, "❌ Noto'g'ri ID formati!")
+        except Exception as e:
+            logger.error(f"Admin qo'shishda xato: {e}")
+            bot.send_message(message.chat.id, "❌ Xatolik yuz berdi!")
 
-        @staticmethod
-        def handle_delete_file(call: types.CallbackQuery):
-            if not Utils.is_admin(call.from_user.id):
-                bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
-                return
-                
-            msg = bot.send_message(call.message.chat.id, "O'chirish uchun fayl kodini yuboring:")
-            bot.register_next_step_handler(msg, BotHandlers.process_delete_file)
+    @staticmethod
+    def process_remove_admin(message: types.Message):
+        try:
+            if message.forward_from:
+                admin_id = message.forward_from.id
+            else:
+                admin_id = int(message.text)
 
-        @staticmethod
-        def process_ad_text(message: types.Message):
-            try:
-                ad_text = message.text.strip()
-                if not ad_text:
-                    bot.send_message(message.chat.id, "❌ Reklama matni bo'sh bo'lishi mumkin emas!")
-                    return
-                    
-                users = Database.get_connection().execute("SELECT user_id FROM users").fetchall()
-                success, failures = 0, 0
-                
-                for i, user in enumerate(users):
-                    try:
-                        if i % BotHandlers.BATCH_SIZE == 0 and i != 0:
-                            time.sleep(BotHandlers.DELAY)
-                        bot.send_message(user['user_id'], ad_text)
-                        success += 1
-                    except Exception as e:
-                        logger.error(f"Foydalanuvchiga {user['user_id']} reklama yuborishda xato: {e}")
-                        failures += 1
-                        
-                bot.send_message(
-                    message.chat.id,
-                    f"✅ Reklama yuborish yakunlandi!\n\n"
-                    f"✔️ Muvaffaqiyatli: {success}\n"
-                    f"❌ Yuborilmadi: {failures}"
-                )
-                
-            except Exception as e:
-                logger.error(f"Reklama jarayonida xato: {e}")
-                bot.send_message(message.chat.id, "❌ Reklama yuborishda xatolik yuz berdi!")
+            # Env/config dagi adminlar jadvalda emas, ularni faqat konfiguratsiyadan olib tashlash mumkin
+            if admin_id in admins.static_ids:
+                bot.send_message(message.chat.id, f"⚠️ {admin_id} konfiguratsiyadagi admin, uni bu yerdan o'chirib bo'lmaydi!")
+                return
 
-        @staticmethod
-        def process_new_admin(message: types.Message):
-            try:
-                # Forward qilingan xabardan admin qo'shish
-                if message.forward_from:
-                    new_admin_id = message.forward_from.id
-                else:
-                    new_admin_id = int(message.text)
-                    
-                Database.add_admin(new_admin_id, message.from_user.id)
-                bot.send_message(
-                    message.chat.id,
-                    f"✅ Yangi admin qo'shildi: {new_admin_id}\n"
-                    f"Endi u /admin buyrug'i orqali panelga kira oladi."
-                )
-            except ValueError:
-                bot.send_message(message.chat.id, "❌ Noto'g'ri ID formati!")
-            except Exception as e:
-                logger.error(f"Admin qo'shishda xato: {e}")
-                bot.send_message(message.chat.id, "❌ Xatolik yuz berdi!")
+            if admins.remove(admin_id):
+                bot.send_message(message.chat.id, f"✅ Admin o'chirildi: {admin_id}")
+                logger.info(f"Admin {message.from_user.id} removed admin {admin_id}")
+            else:
+                bot.send_message(message.chat.id, f"❌ {admin_id} adminlar ro'yxatida topilmadi!")
+        except ValueError:
+            bot.send_message(message.chat.id, "❌ Noto'g'ri ID formati!")
+        except Exception as e:
+            logger.error(f"Adminni o'chirishda xato: {e}")
+            bot.send_message(message.chat.id, "❌ Xatolik yuz berdi!")
 
-        @staticmethod
-        def process_delete_file(message: types.Message):
-            try:
-                code = message.text.strip()
-                if not code:
-                    bot.send_message(message.chat.id, "❌ Kod kiritilmadi!")
-                    return
-                    
-                Database.delete_media(code)
-                bot.send_message(message.chat.id, f"✅ '{code}' kodi bilan fayl o'chirildi!")
-            except Exception as e:
-                logger.error(f"Fayl o'chirishda xato: {e}")
-                bot.send_message(message.chat.id, "❌ Fayl o'chirishda xatolik!")
+    @staticmethod
+    def process_delete_file(message: types.Message):
+        try:
+            code = message.text.strip()
+            if not code:
+                bot.send_message(message.chat.id, "❌ Kod kiritilmadi!")
+                return
+                
+            Database.delete_media(code)
+            bot.send_message(message.chat.id, f"✅ '{code}' kodi bilan fayl o'chirildi!")
+        except Exception as e:
+            logger.error(f"Fayl o'chirishda xato: {e}")
+            bot.send_message(message.chat.id, "❌ Fayl o'chirishda xatolik!")
 
-# 7. WEBHOOK SOZLAMALARI
+# 6. WEBHOOK SOZLAMALARI
 if USE_WEBHOOK:
     @app.route('/webhook', methods=['POST'])
     def webhook():
         if request.headers.get('content-type') == 'application/json':
             json_data = request.get_json()
             update = types.Update.de_json(json_data)
-            bot.process_new_updates([update])
+            # Darhol javob qaytariladi; navbat to'la bo'lsa Telegram keyinroq qayta yuboradi
+            if not update_queue.submit(update):
+                return 'Busy', 503
             return 'ok', 200
         return 'Bad request', 400
 
-# 8. DASTURNI ISHGA TUSHIRISH
-if __name__ == "__main__":
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        return metrics.registry.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+# 7. DASTURNI ISHGA TUSHIRISH
+def main():
     try:
         logger.info("Bot ishga tushmoqda...")
         Database.init_db()
-        BotHandlers.setup_handlers()
+        BotHandlers.setup_handlers()   # marshrut vaqtlari router.Route da yoziladi
+        send_scheduler.start()
+        BotHandlers.broadcaster.resume()
+        retention_job.start()
+        admins.start()
+        subscription_cache.start(Utils._fetch_subscription)
 
         if USE_WEBHOOK:
             logger.info("Webhook rejimida ishga tushirilmoqda...")
@@ -386,10 +383,35 @@ if __name__ == "__main__":
             time.sleep(1)
             bot.set_webhook(url=WEBHOOK_URL)
             port = int(os.environ.get("PORT", 10000))
-            app.run(host='0.0.0.0', port=port)
+            update_queue.start()
+            app.run(host='0.0.0.0', port=port, threaded=True)
         else:
             logger.info("Polling rejimida ishga tushirilmoqda...")
-            bot.infinity_polling()
+            bot.remove_webhook()
+            if METRICS_PORT:
+                metrics.serve(METRICS_PORT, os.getenv("METRICS_HOST", "127.0.0.1"))
+            polling_runner.run()
 
     except Exception as e:
-        logger.critical(f"Bot ishga tushirishda xato: {e}", exc_info=True)
\ No newline at end of file
+        logger.critical(f"Bot ishga tushirishda xato: {e}", exc_info=True)
+    finally:
+        update_queue.stop()
+        send_scheduler.stop()
+        retention_job.stop()
+        admins.stop()
+        subscription_cache.stop()
+        Database.close()
+
+
+def run_async_runtime():
+    # kino_async shu modulni qayta yuklamasligi uchun
+    sys.modules.setdefault("kino", sys.modules[__name__])
+    import kino_async
+    kino_async.main()
+
+
+if __name__ == "__main__":
+    if BOT_RUNTIME == "async":
+        run_async_runtime()
+    else:
+        main()
@@ -0,0 +1,367 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware
+
+from kino import BOT_TOKEN, CHANNEL_LINK, USE_WEBHOOK, WEBHOOK_URL, METRICS_PORT, Utils, BotHandlers
+from storage import Database
+from cache import media_cache
+import metrics
+from handlers import inline
+from handlers.admin import stats_text
+from retention import retention_job
+from state import state
+from auth import admins
+
+logger = logging.getLogger(__name__)
+
+# 1. SOZLAMALAR
+DB_WORKERS = int(os.getenv("DB_WORKERS", 4))  # Baza so'rovlari uchun threadlar
+
+# 2. BOT OBEKTI (barcha so'rovlar bitta aiohttp sessiyasi orqali)
+bot = AsyncTeleBot(BOT_TOKEN)
+
+
+# 3. ASINXRON BAZA
+class AsyncDatabase:
+    """``Database`` metodlarini alohida thread poolda bajaradi (aiosqlite uslubida).
+
+    Har bir pool threadi ``ConnectionPool`` dan o'z ulanishini oladi,
+    event loop esa hech qachon SQLite kutib qolmaydi.
+    """
+    executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+
+    @staticmethod
+    async def run(fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(AsyncDatabase.executor, functools.partial(fn, *args))
+
+    @staticmethod
+    async def get_media_by_code(code: str):
+        # Umumiy keshning sinxronlash (_sync) so'rovlari ham event loopdan tashqarida
+        # get_or_load: yuklash paytidagi delete_media o'chirilgan qatorni keshga qaytarmaydi
+        return await AsyncDatabase.run(Database.get_media_by_code, code)
+
+    @staticmethod
+    async def shared_state(fn, *args):
+        """Holat backendi chaqiruvi: sqlite/redis bo'lsa (I/O) pool threadida, xotirada bo'lsa shu yerda"""
+        if not state.shared:
+            return fn(*args)
+        return await AsyncDatabase.run(fn, *args)
+
+    @staticmethod
+    async def add_admin(user_id: int, added_by: int):
+        await AsyncDatabase.run(admins.add, user_id, added_by)
+
+    @staticmethod
+    async def delete_media(code: str):
+        await AsyncDatabase.run(Database.delete_media, code)
+
+
+# 4. BOT HANDLERLARI
+class ActivityMiddleware(BaseMiddleware):
+    """Botga yozgan har bir foydalanuvchini users jadvalida qayd etish"""
+
+    def __init__(self):
+        super().__init__()
+        self.update_types = ['message', 'edited_message', 'callback_query', 'inline_query']
+
+    async def pre_process(self, message, data):
+        # Faqat xotiradagi buferga yoziladi, I/O yo'q
+        if message.from_user:
+            Database.update_user(message.from_user)
+
+    async def post_process(self, message, data, exception):
+        pass
+
+
+class AsyncBotHandlers:
+    # astep:<chat_id> -> keyingi xabarni qabul qiluvchi metod nomi (state backendda)
+    NEXT_STEP_TTL = 3600
+
+    @staticmethod
+    async def register_next_step(chat_id: int, handler):
+        await AsyncDatabase.shared_state(
+            state.set, f"astep:{chat_id}", handler.__name__, AsyncBotHandlers.NEXT_STEP_TTL
+        )
+
+    @staticmethod
+    async def has_next_step(message: types.Message) -> bool:
+        return await AsyncDatabase.shared_state(state.get, f"astep:{message.chat.id}") is not None
+
+    @staticmethod
+    def setup_handlers():
+        bot.setup_middleware(ActivityMiddleware())
+
+        @bot.message_handler(func=AsyncBotHandlers.has_next_step, content_types=['text'])
+        async def next_step(message: types.Message):
+            name = await AsyncDatabase.shared_state(state.pop, f"astep:{message.chat.id}")
+            if name:
+                await getattr(AsyncBotHandlers, name)(message)
+
+        @bot.message_handler(commands=['start'])
+        async def send_welcome(message: types.Message):
+            await bot.reply_to(message, f"Assalomu alaykum! Botga xush kelibsiz!\n\nKanalimiz: {CHANNEL_LINK}")
+
+        @bot.message_handler(commands=['admin'])
+        async def admin_panel(message: types.Message):
+            if not Utils.is_admin(message.from_user.id):
+                await bot.reply_to(message, "⚠️ Sizga ruxsat yo'q!")
+                return
+
+            markup = types.InlineKeyboardMarkup()
+            markup.row(
+                types.InlineKeyboardButton("📊 Statistika", callback_data="show_stats"),
+                types.InlineKeyboardButton("📢 Reklama", callback_data="send_ad")
+            )
+            markup.row(
+                types.InlineKeyboardButton("👤 Admin qo'shish", callback_data="add_admin"),
+                types.InlineKeyboardButton("🗑️ Fayl o'chirish", callback_data="delete_file")
+            )
+
+            await bot.send_message(
+                message.chat.id,
+                "🔐 Admin panelga xush kelibsiz:",
+                reply_markup=markup
+            )
+
+        @bot.message_handler(func=lambda m: True, content_types=['text'])
+        async def handle_text(message: types.Message):
+            if message.text.startswith('/'):
+                await bot.reply_to(message, "⚠️ Noma'lum buyruq!")
+                return
+
+            if await AsyncDatabase.shared_state(Utils.is_rate_limited, message.from_user.id, "code"):
+                await bot.reply_to(message, "⏳ Juda ko'p so'rov! Biroz kuting.")
+                return
+
+            media = await AsyncDatabase.get_media_by_code(message.text)
+            if media:
+                Database.increment_views(media['secret_code'])
+                if media['file_type'] == 'photo':
+                    await bot.send_photo(message.chat.id, media['file_id'])
+                elif media['file_type'] == 'video':
+                    await bot.send_video(message.chat.id, media['file_id'])
+                elif media['file_type'] == 'audio':
+                    await bot.send_audio(message.chat.id, media['file_id'])
+                else:
+                    await bot.send_document(message.chat.id, media['file_id'])
+            else:
+                await bot.reply_to(message, "❌ Topilmadi! Noto'g'ri kod yoki fayl o'chirilgan.")
+
+        @bot.inline_handler(func=inline.is_inline_search)
+        async def inline_query_handler(inline_query: types.InlineQuery):
+            results, next_offset = await AsyncDatabase.run(
+                inline.inline_results, inline_query.query.strip(), int(inline_query.offset or 0)
+            )
+            await bot.answer_inline_query(inline_query.id, results, cache_time=inline.INLINE_CACHE_TIME,
+                                          is_personal=False, next_offset=next_offset)
+
+        @bot.callback_query_handler(func=lambda call: True)
+        async def handle_callbacks(call: types.CallbackQuery):
+            handlers = {
+                "show_stats": AsyncBotHandlers.handle_show_stats,
+                "send_ad": AsyncBotHandlers.handle_send_ad,
+                "add_admin": AsyncBotHandlers.handle_add_admin,
+                "delete_file": AsyncBotHandlers.handle_delete_file,
+            }
+            try:
+                handler = handlers.get(call.data)
+                if handler:
+                    await handler(call)
+            except Exception as e:
+                logger.error(f"Callback error: {e}")
+                await bot.answer_callback_query(call.id, "❌ Xatolik yuz berdi!")
+
+    @staticmethod
+    async def _check_admin(call: types.CallbackQuery) -> bool:
+        if not Utils.is_admin(call.from_user.id):
+            await bot.answer_callback_query(call.id, "⚠️ Ruxsat yo'q!", show_alert=True)
+            return False
+        return True
+
+    @staticmethod
+    async def handle_show_stats(call: types.CallbackQuery):
+        if not await AsyncBotHandlers._check_admin(call):
+            return
+
+        text = await AsyncDatabase.run(stats_text)
+        cache = media_cache.stats()
+        await bot.edit_message_text(
+            f"{text}\n\n"
+            f"• Kesh: {cache['size']}/{cache['maxsize']}, "
+            f"hit {cache['hits']}, miss {cache['misses']}, "
+            f"evict {cache['evictions']} ({cache['hit_ratio']:.0%})",
+            call.message.chat.id,
+            call.message.message_id
+        )
+
+    @staticmethod
+    async def handle_send_ad(call: types.CallbackQuery):
+        if not await AsyncBotHandlers._check_admin(call):
+            return
+
+        await bot.send_message(call.message.chat.id, "📢 Reklama matnini yuboring:")
+        await AsyncBotHandlers.register_next_step(call.message.chat.id, AsyncBotHandlers.process_ad_text)
+
+    @staticmethod
+    async def handle_add_admin(call: types.CallbackQuery):
+        if not await AsyncBotHandlers._check_admin(call):
+            return
+
+        await bot.send_message(
+            call.message.chat.id,
+            "Yangi adminning ID sini yuboring yoki uning xabarini forward qiling:"
+        )
+        await AsyncBotHandlers.register_next_step(call.message.chat.id, AsyncBotHandlers.process_new_admin)
+
+    @staticmethod
+    async def handle_delete_file(call: types.CallbackQuery):
+        if not await AsyncBotHandlers._check_admin(call):
+            return
+
+        await bot.send_message(call.message.chat.id, "O'chirish uchun fayl kodini yuboring:")
+        await AsyncBotHandlers.register_next_step(call.message.chat.id, AsyncBotHandlers.process_delete_file)
+
+    @staticmethod
+    async def process_ad_text(message: types.Message):
+        try:
+            ad_text = message.text.strip()
+            if not ad_text:
+                await bot.send_message(message.chat.id, "❌ Reklama matni bo'sh bo'lishi mumkin emas!")
+                return
+
+            # Reklama o'z fon threadida yuboriladi (sinxron Broadcaster)
+            await AsyncDatabase.run(BotHandlers.broadcaster.start, ad_text, message.chat.id)
+
+        except Exception as e:
+            logger.error(f"Reklama jarayonida xato: {e}")
+            await bot.send_message(message.chat.id, "❌ Reklama yuborishda xatolik yuz berdi!")
+
+    @staticmethod
+    async def process_new_admin(message: types.Message):
+        try:
+            # Forward qilingan xabardan admin qo'shish
+            if message.forward_from:
+                new_admin_id = message.forward_from.id
+            else:
+                new_admin_id = int(message.text)
+
+            await AsyncDatabase.add_admin(new_admin_id, message.from_user.id)
+            await bot.send_message(
+                message.chat.id,
+                f"✅ Yangi admin qo'shildi: {new_admin_id}\n"
+                f"Endi u /admin buyrug'i orqali panelga kira oladi."
+            )
+        except ValueError:
+            await bot.send_message(message.chat.id, "❌ Noto'g'ri ID formati!")
+        except Exception as e:
+            logger.error(f"Admin qo'shishda xato: {e}")
+            await bot.send_message(message.chat.id, "❌ Xatolik yuz berdi!")
+
+    @staticmethod
+    async def process_delete_file(message: types.Message):
+        try:
+            code = message.text.strip()
+            if not code:
+                await bot.send_message(message.chat.id, "❌ Kod kiritilmadi!")
+                return
+
+            await AsyncDatabase.delete_media(code)
+            await bot.send_message(message.chat.id, f"✅ '{code}' kodi bilan fayl o'chirildi!")
+        except Exception as e:
+            logger.error(f"Fayl o'chirishda xato: {e}")
+            await bot.send_message(message.chat.id, "❌ Fayl o'chirishda xatolik!")
+
+
+# 5. WEBHOOK (aiohttp)
+# Ishlanayotgan update tasklari: havola saqlanmasa task GC tomonidan yo'qotilishi mumkin
+_update_tasks = set()
+
+
+def _task_done(task: asyncio.Task):
+    _update_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Update ni qayta ishlashda xato: {task.exception()}")
+
+
+async def drain_updates(timeout: float = 30):
+    """To'xtashdan oldin boshlangan updatelarni ishlab bo'lish"""
+    if _update_tasks:
+        _, pending = await asyncio.wait(set(_update_tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+
+async def run_webhook(port: int):
+    from aiohttp import web
+
+    async def webhook(request: web.Request):
+        if request.content_type != 'application/json':
+            return web.Response(text='Bad request', status=400)
+        update = types.Update.de_json(await request.json())
+        task = asyncio.create_task(bot.process_new_updates([update]))
+        _update_tasks.add(task)
+        task.add_done_callback(_task_done)
+        return web.Response(text='ok')
+
+    async def metrics_endpoint(request: web.Request):
+        return web.Response(body=metrics.registry.render().encode(),
+                            headers={'Content-Type': metrics.CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_post('/webhook', webhook)
+    app.router.add_get('/metrics', metrics_endpoint)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', port).start()
+    await bot.remove_webhook()
+    await bot.set_webhook(url=WEBHOOK_URL)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await drain_updates()
+
+
+# 6. DASTURNI ISHGA TUSHIRISH
+async def run():
+    await AsyncDatabase.run(Database.init_db)
+    AsyncBotHandlers.setup_handlers()
+    metrics.instrument_handlers(bot)
+    BotHandlers.broadcaster.resume()
+    retention_job.start()
+    admins.start()
+    try:
+        if USE_WEBHOOK:
+            logger.info("Async webhook rejimida ishga tushirilmoqda...")
+            await run_webhook(int(os.environ.get("PORT", 10000)))
+        else:
+            logger.info("Async polling rejimida ishga tushirilmoqda...")
+            if METRICS_PORT:
+                metrics.serve(METRICS_PORT, os.getenv("METRICS_HOST", "127.0.0.1"))
+            await bot.infinity_polling()
+    finally:
+        await bot.close_session()
+
+
+def main():
+    try:
+        logger.info("Bot (async) ishga tushmoqda...")
+        asyncio.run(run())
+    except Exception as e:
+        logger.critical(f"Bot ishga tushirishda xato: {e}", exc_info=True)
+    finally:
+        AsyncDatabase.executor.shutdown()
+        retention_job.stop()
+        admins.stop()
+        Database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+import time
+
+# Takroriy xabarlarni guruhlash: raqamlar (user_id, kod, vaqt) bitta kalitga tushadi
+_NUMBERS = re.compile(r"\d+")
+
+
+class SamplingFilter(logging.Filter):
+    """Bir xil (raqamlari farq qiladigan) xabarlarni cheklash.
+
+    Har bir kalit uchun ``period`` sekundda ``burst`` tagacha yozuv
+    o'tkaziladi, qolganlari tashlanadi va keyingi o'tgan yozuvga
+    ``suppressed`` maydoni sifatida qo'shiladi. ``min_level`` dan past
+    yozuvlar cheklanmaydi.
+    """
+
+    def __init__(self, burst: int = 10, period: float = 60, min_level: int = logging.WARNING,
+                 max_keys: int = 10000):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self.suppressed = 0
+        self._windows = {}     # kalit -> [oyna boshi, o'tganlar, tashlanganlar]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.name, record.levelno, _NUMBERS.sub("#", str(record.msg)))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                dropped = window[2] if window else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                dropped = 0
+            else:
+                window[2] += 1
+                self.suppressed += 1
+                return False
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Bir qator - bitta JSON obyekt"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" (+{record.suppressed} o'xshash xabar o'tkazib yuborildi)"
+        return text
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Chaqiruvchi threadda faqat xabarni yig'ish va navbatga qo'yish.
+
+    Formatlash (traceback ham) va fayl I/O fon threadida bajariladi.
+    Navbat to'lsa INFO/DEBUG yozuvlar kutmasdan tashlanadi (``dropped``).
+    WARNING va undan yuqorisi hech qachon tashlanmaydi: ``block_timeout``
+    gacha kutiladi, baribir joy bo'lmasa ``fallback`` handlerlar orqali
+    shu threadda yoziladi (``bypassed``).
+    """
+
+    def __init__(self, q: queue.Queue, block_timeout: float = 0.1):
+        super().__init__(q)
+        self.block_timeout = block_timeout
+        self.fallback = []
+        self.dropped = 0
+        self.bypassed = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Navbat shu jarayon ichida: exc_info ni pickle qilish shart emas
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            self.bypassed += 1
+            for handler in self.fallback:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Navbat to'la bo'lsa ham to'xtash belgisi yo'qolmasin
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.sampler = None
+
+    def setup(self, log_file: str, level: int = logging.INFO, fmt: str = "json",
+              max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, when: str = None,
+              queue_size: int = 10000, burst: int = 10, period: float = 60):
+        """Root logger ni navbat orqali ishlaydigan qilib sozlash (oldingi handlerlar olib tashlanadi).
+
+        ``when`` berilsa (masalan "midnight") vaqt bo'yicha, aks holda
+        ``max_bytes`` hajm bo'yicha aylantiriladi.
+        """
+        self.stop()
+        if when:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_file, when=when, backupCount=backup_count, encoding="utf-8")
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        text = TextFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        file_handler.setFormatter(JsonFormatter() if fmt == "json" else text)
+        console = logging.StreamHandler()
+        console.setFormatter(text)
+
+        self.sampler = SamplingFilter(burst=burst, period=period)
+        self.handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        self.handler.fallback = [file_handler, console]
+        self.handler.addFilter(self.sampler)
+        self.listener = _Listener(
+            self.handler.queue, file_handler, console, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+            old.close()
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """Navbatdagi yozuvlarni yozib bo'lib, fon threadini to'xtatish"""
+        if self.listener is not None:
+            logging.getLogger().removeHandler(self.handler)
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+    def stats(self) -> dict:
+        if self.handler is None:
+            return {"queued": 0, "dropped": 0, "bypassed": 0, "suppressed": 0}
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "bypassed": self.handler.bypassed,
+            "suppressed": self.sampler.suppressed,
+        }
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
@@ -0,0 +1,325 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot import apihelper, asyncio_helper
+
+logger = logging.getLogger(__name__)
+
+# Sekundlarda; Telegram so'rovlari va handlerlar uchun yetarli oraliq
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+# 1. METRIKA TURLARI
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames=()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    """Qat'iy bucketli histogram: ``observe`` bitta bisect va lock"""
+
+    def __init__(self, name: str, doc: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket hisoblari..., +Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge:
+    """Qiymati scrape paytida ``collect()`` orqali olinadi: ``{labels: qiymat}``"""
+
+    def __init__(self, name: str, doc: str, collect, labelnames=()):
+        self.name = name
+        self.doc = doc
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} gauge"
+        try:
+            values = self.collect()
+        except Exception as e:
+            logger.error(f"{self.name} metrikasini olishda xato: {e}")
+            return
+        for labels, value in values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, doc, labelnames=()):
+        return self.register(Counter(name, doc, labelnames))
+
+    def histogram(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, doc, labelnames, buckets))
+
+    def gauge(self, name, doc, collect, labelnames=()):
+        return self.register(Gauge(name, doc, collect, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+handler_latency = registry.histogram(
+    "bot_handler_seconds", "Handler bajarilish vaqti", ("handler",))
+handler_errors = registry.counter(
+    "bot_handler_errors_total", "Handlerdan chiqqan xatolar", ("handler",))
+db_latency = registry.histogram(
+    "bot_db_seconds", "Database metodlari vaqti", ("method",))
+api_latency = registry.histogram(
+    "bot_telegram_api_seconds", "Telegram Bot API so'rovlari vaqti", ("method",))
+api_errors = registry.counter(
+    "bot_telegram_api_errors_total", "Telegram Bot API xatolari", ("method", "code"))
+send_latency = registry.histogram(
+    "bot_send_seconds", "Xabar navbatga qo'yilgandan yuborilguncha (retry_after bilan)", ("lane",),
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# 2. INSTRUMENTATSIYA
+def timed(histogram: Histogram, label: str):
+    """Funksiya (sync yoki async) vaqtini ``histogram`` ga yozuvchi dekorator"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, label)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, label)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls, histogram: Histogram, exclude=()):
+    """Klassdagi barcha staticmethodlarni vaqt o'lchovchi o'ramga almashtirish"""
+    for name, attr in list(vars(cls).items()):
+        if isinstance(attr, staticmethod) and not name.startswith("__") and name not in exclude:
+            setattr(cls, name, staticmethod(timed(histogram, name)(attr.__func__)))
+
+
+_HANDLER_LISTS = (
+    "message_handlers", "edited_message_handlers", "channel_post_handlers",
+    "callback_query_handlers", "inline_handlers", "chosen_inline_handlers",
+)
+
+
+def instrument_handlers(bot):
+    """Ro'yxatdan o'tgan handlerlarni vaqt va xato hisoblagichi bilan o'rash.
+
+    ``setup_handlers`` dan keyin chaqiriladi; qayta chaqirilsa o'ralganlar
+    o'tkazib yuboriladi.
+    """
+    for list_name in _HANDLER_LISTS:
+        for handler in getattr(bot, list_name, ()):
+            fn = handler['function']
+            if getattr(fn, "_instrumented", False):
+                continue
+            handler['function'] = _wrap_handler(fn)
+
+
+def _wrap_handler(fn):
+    name = fn.__name__
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                handler_errors.inc(name)
+                raise
+            finally:
+                handler_latency.observe(time.perf_counter() - start, name)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                handler_errors.inc(name)
+                raise
+            finally:
+                handler_latency.observe(time.perf_counter() - start, name)
+    wrapper._instrumented = True
+    return wrapper
+
+
+def instrument_telegram_api():
+    """Bot API so'rovlarini (sync va async) metod bo'yicha vaqt va xatolar bilan o'rash"""
+    make_request = apihelper._make_request
+    if not getattr(make_request, "_instrumented", False):
+        @functools.wraps(make_request)
+        def wrapper(token, method_name, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return make_request(token, method_name, *args, **kwargs)
+            except Exception as e:
+                api_errors.inc(method_name, getattr(e, "error_code", "network"))
+                raise
+            finally:
+                api_latency.observe(time.perf_counter() - start, method_name)
+
+        wrapper._instrumented = True
+        apihelper._make_request = wrapper
+
+    process_request = asyncio_helper._process_request
+    if not getattr(process_request, "_instrumented", False):
+        @functools.wraps(process_request)
+        async def async_wrapper(token, method_name, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await process_request(token, method_name, *args, **kwargs)
+            except Exception as e:
+                api_errors.inc(method_name, getattr(e, "error_code", "network"))
+                raise
+            finally:
+                api_latency.observe(time.perf_counter() - start, method_name)
+
+        async_wrapper._instrumented = True
+        asyncio_helper._process_request = async_wrapper
+
+
+def cache_gauges(caches: dict):
+    """``{"media": media_cache, ...}`` keshlarining stats() qiymatlarini eksport qilish"""
+    def collect(key):
+        return lambda: {(name, ): cache.stats().get(key, 0) for name, cache in caches.items()}
+
+    for key in ("size", "hits", "misses", "stale_hits", "evictions"):
+        registry.gauge(f"bot_cache_{key}", f"Kesh: {key}", collect(key), ("cache",))
+
+    def hit_ratio():
+        ratios = {}
+        for name, cache in caches.items():
+            stats = cache.stats()
+            total = stats.get("hits", 0) + stats.get("stale_hits", 0) + stats.get("misses", 0)
+            ratios[(name, )] = (stats.get("hits", 0) + stats.get("stale_hits", 0)) / total if total else 0.0
+        return ratios
+
+    registry.gauge("bot_cache_hit_ratio", "Kesh hit ulushi", hit_ratio, ("cache",))
+
+
+def stats_gauge(name: str, doc: str, stats_fn):
+    """``stats_fn()`` dagi sonli maydonlarni ``name{field=...}`` sifatida eksport qilish"""
+    def collect():
+        return {(key, ): value for key, value in stats_fn().items() if isinstance(value, (int, float))}
+    return registry.gauge(name, doc, collect, ("field",))
+
+
+# 3. ALOHIDA HTTP SERVER (polling rejimi uchun)
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            data = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Metrikalar: http://{host}:{server.server_address[1]}/metrics")
+    return server
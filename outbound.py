@@ -0,0 +1,392 @@
+import contextlib
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from telebot import apihelper
+from telebot.apihelper import ApiTelegramException
+
+from rate_limit import TokenBucket
+from metrics import send_latency
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, BULK = 0, 1
+LANES = ("interactive", "bulk")
+SEND_METHODS = frozenset({
+    "sendMessage", "sendPhoto", "sendVideo", "sendAudio", "sendDocument", "sendAnimation",
+    "sendVoice", "sendVideoNote", "sendSticker", "sendMediaGroup", "copyMessage", "forwardMessage",
+})
+MAX_TEXT = 4096
+
+_context = threading.local()
+_MISSING = object()
+
+
+@contextlib.contextmanager
+def bulk():
+    """Shu blok ichidagi yuborishlar past ustuvorlikdagi navbatga tushadi (reklama)"""
+    previous = getattr(_context, "lane", INTERACTIVE)
+    _context.lane = BULK
+    try:
+        yield
+    finally:
+        _context.lane = previous
+
+
+@contextlib.contextmanager
+def detached():
+    """Natijasi kerak bo'lmagan yuborishlar: navbatga qo'yiladi, handler kutmaydi.
+
+    ``bot.send_*`` ``None`` qaytaradi, xatolar logga yoziladi. Handler
+    dekoratori sifatida ham ishlatiladi (``@outbound.detached()``), shunda
+    bir chatning per-chat limiti shu ishchidagi boshqa chatlarni ushlab
+    turmaydi.
+    """
+    previous = getattr(_context, "detached", False)
+    _context.detached = True
+    try:
+        yield
+    finally:
+        _context.detached = previous
+
+
+def _log_failure(method_name, future):
+    error = future.exception()
+    if error is not None:
+        logger.warning(f"{method_name} yuborilmadi: {error}")
+
+
+class _Send:
+    __slots__ = ("token", "method_name", "http_method", "params", "files", "future",
+                 "lane", "detached", "enqueued", "attempts")
+
+    def __init__(self, token, method_name, http_method, params, files, lane, detached=False):
+        self.token = token
+        self.method_name = method_name
+        self.http_method = http_method
+        self.params = params or {}
+        self.files = files
+        self.future = Future()
+        self.lane = lane
+        self.detached = detached
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+
+    def coalescable(self) -> bool:
+        # Faqat natijasi kutilmaydigan oddiy matn: tugma, javob (reply) va entities bo'lmasa
+        return (self.detached and self.method_name == "sendMessage" and not self.files
+                and not any(key in self.params for key in
+                            ("reply_markup", "reply_parameters", "reply_to_message_id", "entities")))
+
+    def same_options(self, other) -> bool:
+        """``text`` dan boshqa barcha parametrlar (parse_mode, disable_notification, ...) bir xil"""
+        return (len(self.params) == len(other.params)
+                and all(other.params.get(key, _MISSING) == value
+                        for key, value in self.params.items() if key != "text"))
+
+
+class SendScheduler:
+    """Barcha chiquvchi xabarlar uchun yagona navbat.
+
+    Umumiy (``rate``/s) va har bir chat uchun (``chat_rate``/s,
+    ``chat_burst`` gacha) token chelaklari. Interaktiv javoblar reklamadan
+    oldin yuboriladi; bir chatga bir vaqtda bitta so'rov ketadi, shuning
+    uchun tartib saqlanadi. 429 da o'sha chat ``retry_after`` ga
+    to'xtatiladi; butun navbat faqat flood-wait umumiy bo'lsa to'xtaydi
+    (oxirgi ``flood_window`` sekunddagi javoblarning kamida ``flood_share``
+    qismi va ``flood_min`` tadan ko'pi 429 bo'lsa). Tarmoq va 5xx
+    xatolarida eksponensial kutish bilan qayta uriniladi. Chatga ketma-ket
+    navbatda turgan oddiy matnlar bitta xabarga birlashtiriladi.
+
+    ``install()`` ``apihelper._make_request`` ni o'raydi: ``bot.send_*``
+    chaqiruvlari o'zgarmaydi, faqat navbat orqali o'tadi va natijani kutadi
+    (``detached()`` ichida kutmaydi).
+    """
+
+    def __init__(self, rate: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 workers: int = 8, max_retries: int = 3, backoff: float = 0.5,
+                 coalesce: bool = True, flood_window: float = 1.0, flood_min: int = 3,
+                 flood_share: float = 0.5):
+        self.limiter = TokenBucket(rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.coalesce = coalesce
+        self.flood_window = flood_window
+        self.flood_min = flood_min
+        self.flood_share = flood_share
+        self._outcomes = deque()              # (vaqt, 429 mi) - oxirgi flood_window dagi javoblar
+        self._floods = 0
+        self.make_request = None
+        self.running = False
+        self._queues = {}                     # (lane, chat_id) -> deque[_Send]
+        self._ready = [deque(), deque()]      # har bir lane: navbati bor kalitlar
+        self._buckets = {}                    # chat_id -> TokenBucket
+        self._busy = set()                    # so'rovi ketayotgan chatlar
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._picks = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+        self.global_pauses = 0
+
+    # 1. Ulash
+    def install(self):
+        """``apihelper._make_request`` ni o'rash (metrics o'ramidan keyin chaqiriladi)"""
+        if getattr(apihelper._make_request, "_scheduled", False):
+            return
+        self.make_request = make_request = apihelper._make_request
+
+        @functools.wraps(make_request)
+        def wrapper(token, method_name, method="get", params=None, files=None):
+            if not self.running or method_name not in SEND_METHODS:
+                return make_request(token, method_name, method=method, params=params, files=files)
+            lane = getattr(_context, "lane", INTERACTIVE)
+            is_detached = getattr(_context, "detached", False)
+            future = self.submit(token, method_name, method, params, files, lane, is_detached)
+            if is_detached:
+                future.add_done_callback(functools.partial(_log_failure, method_name))
+                return None
+            return future.result()
+
+        wrapper._scheduled = True
+        apihelper._make_request = wrapper
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="send")
+            self._thread = threading.Thread(target=self._run, name="send-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Navbatdagilarni ``timeout`` gacha yuborib, qolganlarini xato bilan yakunlash"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queues and not self._busy,
+                                max(0.0, deadline - time.monotonic()))
+            self.running = False
+            pending = [item for q in self._queues.values() for item in q]
+            self._queues.clear()
+            for ready in self._ready:
+                ready.clear()
+            self._cond.notify_all()
+        for item in pending:
+            item.future.set_exception(RuntimeError("Yuborish navbati to'xtatildi"))
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # 2. Navbat
+    def submit(self, token, method_name, http_method="post", params=None, files=None,
+               lane: int = INTERACTIVE, detached: bool = False) -> Future:
+        item = _Send(token, method_name, http_method, params, files, lane, detached)
+        with self._cond:
+            if not self.running:
+                item.future.set_exception(RuntimeError("Yuborish navbati to'xtatildi"))
+                return item.future
+            self._enqueue((lane, item.params.get("chat_id")), [item])
+        return item.future
+
+    def _enqueue(self, key, items, front: bool = False):
+        q = self._queues.get(key)
+        if q is None:
+            q = self._queues[key] = deque()
+            self._ready[key[0]].append(key)
+        if front:
+            q.extendleft(reversed(items))
+        else:
+            q.extend(items)
+        self._cond.notify()
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _pick(self):
+        """Yuborishga tayyor partiya yoki (None, kutish vaqti)"""
+        wait = self.limiter.available_in()
+        if wait:
+            return None, wait
+        for ready in self._ready:
+            for _ in range(len(ready)):
+                key = ready[0]
+                chat_id = key[1]
+                if chat_id in self._busy:
+                    ready.rotate(-1)
+                    continue
+                chat_wait = self._bucket(chat_id).try_acquire()
+                if chat_wait:
+                    wait = min(wait or chat_wait, chat_wait)
+                    ready.rotate(-1)
+                    continue
+                self.limiter.try_acquire()
+                q = self._queues[key]
+                batch = self._take(q)
+                if q:
+                    ready.rotate(-1)
+                else:
+                    ready.popleft()
+                    del self._queues[key]
+                self._busy.add(chat_id)
+                return (key, batch), None
+        return None, wait or None
+
+    def _take(self, q: deque) -> list:
+        batch = [q.popleft()]
+        first = batch[0]
+        if self.coalesce and first.coalescable():
+            length = len(first.params.get("text", ""))
+            while q and q[0].coalescable() and q[0].same_options(first):
+                length += 2 + len(q[0].params.get("text", ""))
+                if length > MAX_TEXT:
+                    break
+                batch.append(q.popleft())
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self.running:
+                        return
+                    picked, wait = self._pick()
+                    if picked:
+                        break
+                    self._cond.wait(wait)
+                self._picks += 1
+                if self._picks % 1000 == 0:
+                    self._evict_buckets()
+            self._executor.submit(self._send, *picked)
+
+    def _evict_buckets(self):
+        idle = [chat_id for chat_id, bucket in self._buckets.items()
+                if chat_id not in self._busy and bucket.is_idle()]
+        for chat_id in idle:
+            del self._buckets[chat_id]
+
+    # 3. Yuborish
+    def _send(self, key, batch):
+        first = batch[0]
+        params = first.params
+        if len(batch) > 1:
+            params = dict(params, text="\n\n".join(item.params.get("text", "") for item in batch))
+        retry_in = None
+        try:
+            result = self.make_request(first.token, first.method_name, method=first.http_method,
+                                       params=params, files=first.files)
+        except ApiTelegramException as e:
+            if e.error_code == 429:
+                retry_in = (e.result_json.get("parameters") or {}).get("retry_after", 1)
+                if self._global_flood(True):
+                    logger.warning(f"429: umumiy flood-wait, navbat {retry_in} s to'xtatiladi")
+                    self.limiter.pause(retry_in)
+                else:
+                    logger.warning(f"429: chat {key[1]}, {retry_in} s kutiladi")
+            elif e.error_code >= 500:
+                retry_in = self.backoff * 2 ** first.attempts * (1 + random.random())
+            if retry_in is None or first.attempts >= self.max_retries:
+                self._fail(batch, e)
+                retry_in = None
+        except requests.RequestException as e:
+            retry_in = self.backoff * 2 ** first.attempts * (1 + random.random())
+            if first.attempts >= self.max_retries:
+                self._fail(batch, e)
+                retry_in = None
+        except Exception as e:
+            self._fail(batch, e)
+        else:
+            self._global_flood(False)
+            now = time.monotonic()
+            for item in batch:
+                send_latency.observe(now - item.enqueued, LANES[item.lane])
+                item.future.set_result(result)
+            with self._cond:
+                self.sent += 1
+                self.coalesced += len(batch) - 1
+        finally:
+            with self._cond:
+                self._busy.discard(key[1])
+                stopped = retry_in is not None and not self.running
+                if retry_in is not None and not stopped:
+                    self.retried += 1
+                    for item in batch:
+                        item.attempts += 1
+                        _rewind(item.files)
+                    # Chat chelagi kutish vaqtiga "qarzga" tushiriladi
+                    self._bucket(key[1]).pause(retry_in)
+                    self._enqueue(key, batch, front=True)
+                self._cond.notify_all()
+            if stopped:
+                # stop() navbatni tozalab bo'lgan: qayta urinish endi hech qachon yuborilmaydi
+                self._fail(batch, RuntimeError("Yuborish navbati to'xtatildi"))
+
+    def _global_flood(self, flooded: bool) -> bool:
+        """Javobni qayd etish; 429 lar bitta chatniki emas, umumiy bo'lsa True"""
+        now = time.monotonic()
+        with self._cond:
+            self._outcomes.append((now, flooded))
+            self._floods += flooded
+            while self._outcomes[0][0] < now - self.flood_window:
+                self._floods -= self._outcomes.popleft()[1]
+            if (flooded and self._floods >= self.flood_min
+                    and self._floods >= len(self._outcomes) * self.flood_share):
+                self.global_pauses += 1
+                return True
+            return False
+
+    def _fail(self, batch, error):
+        with self._cond:
+            self.failed += len(batch)
+        for item in batch:
+            item.future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = [0, 0]
+            for (lane, _), q in self._queues.items():
+                queued[lane] += len(q)
+            return {
+                "queued_interactive": queued[INTERACTIVE],
+                "queued_bulk": queued[BULK],
+                "in_flight": len(self._busy),
+                "chats": len(self._buckets),
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "retried": self.retried,
+                "failed": self.failed,
+                "global_pauses": self.global_pauses,
+            }
+
+
+def _rewind(files):
+    # Qayta urinishda yuklanayotgan fayl boshidan o'qilsin
+    for value in (files or {}).values():
+        f = value[1] if isinstance(value, tuple) else value
+        if hasattr(f, "seek"):
+            f.seek(0)
+
+
+send_scheduler = SendScheduler(
+    rate=float(os.getenv("SEND_RATE", 30)),              # Telegram: ~30 xabar/s
+    chat_rate=float(os.getenv("SEND_CHAT_RATE", 1)),     # bitta chatga ~1 xabar/s
+    chat_burst=float(os.getenv("SEND_CHAT_BURST", 3)),
+    workers=int(os.getenv("SEND_WORKERS", 8)),
+    coalesce=os.getenv("SEND_COALESCE", "true").lower() == "true",
+)
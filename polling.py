@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PollingRunner:
+    """getUpdates orqali partiyalab o'qib, updatelarni UpdateQueue ga uzatish.
+
+    Bir so'rovda ``limit`` tagacha update olinadi. Ular chat bo'yicha
+    ishchilarga taqsimlanadi: bir chat ichidagi tartib saqlanadi, turli
+    chatlar parallel ishlanadi. Navbat to'lsa keyingi getUpdates kutib
+    turadi, shuning uchun to'planib qolgan updatelar Telegram tomonida
+    qoladi, xotirada emas.
+    """
+
+    def __init__(self, bot, update_queue, limit: int = 100, timeout: int = 25,
+                 allowed_updates=None, error_delay: float = 3):
+        self.bot = bot
+        self.update_queue = update_queue
+        self.limit = limit
+        self.timeout = timeout
+        self.allowed_updates = allowed_updates
+        self.error_delay = error_delay
+        self.offset = None
+        self._stop = threading.Event()
+        self.batches = 0
+        self.received = 0
+        self.last_batch_size = 0
+        self.last_update_age = 0.0
+
+    def run(self):
+        """Polling tsikli (stop() chaqirilguncha bloklaydi)"""
+        self._stop.clear()
+        self.update_queue.start()
+        logger.info(f"Polling: limit={self.limit}, timeout={self.timeout}, "
+                    f"ishchilar={self.update_queue.workers}")
+        while not self._stop.is_set():
+            try:
+                updates = self.bot.get_updates(
+                    offset=self.offset, limit=self.limit, allowed_updates=self.allowed_updates,
+                    # long_polling_timeout - Telegram tomonida kutish, timeout - HTTP o'qish chegarasi
+                    long_polling_timeout=self.timeout, timeout=self.timeout + 5
+                )
+            except Exception as e:
+                logger.error(f"getUpdates xatosi: {e}")
+                self._stop.wait(self.error_delay)
+                continue
+            if updates:
+                self._dispatch(updates)
+
+    def _dispatch(self, updates):
+        self.batches += 1
+        self.received += len(updates)
+        self.last_batch_size = len(updates)
+        self.last_update_age = max(0.0, time.time() - _update_date(updates[-1]))
+        for update in updates:
+            # Navbat bo'shaguncha kutiladi: offset faqat qabul qilingan updatedan keyin suriladi
+            while not self.update_queue.submit(update, timeout=1):
+                if self._stop.is_set():
+                    return
+            self.offset = update.update_id + 1
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        stats = self.update_queue.stats()
+        stats.update({
+            "batches": self.batches,
+            "received": self.received,
+            "last_batch_size": self.last_batch_size,
+            "update_age": self.last_update_age,
+        })
+        return stats
+
+
+def _update_date(update) -> float:
+    for name in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        message = getattr(update, name, None)
+        if message is not None:
+            return message.date
+    callback = getattr(update, "callback_query", None)
+    if callback is not None and callback.message is not None:
+        return callback.message.date
+    return time.time()
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from state import state
+
+
+class GCRALimiter:
+    """GCRA (Generic Cell Rate Algorithm) asosidagi limiter.
+
+    Har bir kalit uchun faqat bitta son (TAT - keyingi ruxsat vaqti)
+    saqlanadi, tekshiruv O(1). ``period`` ichida ``limit`` tagacha so'rov
+    ketma-ket o'tishi mumkin. Muddati o'tgan yozuvlar har tekshiruvda
+    navbat boshidan o'chiriladi, shuning uchun xotira faqat faol
+    foydalanuvchilar soniga bog'liq.
+    """
+
+    def __init__(self, limit: int, period: float, clock=time.monotonic):
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.tolerance = period - self.interval
+        self.clock = clock
+        self._tat = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_limited(self, key) -> bool:
+        now = self.clock()
+        tats = self._tat
+        with self._lock:
+            if tats and tats[next(iter(tats))] <= now:
+                self._evict(now)
+            tat = tats.get(key, now)
+            if tat < now:
+                tat = now
+            elif tat - now > self.tolerance:
+                return True
+            tats[key] = tat + self.interval
+            tats.move_to_end(key)
+            return False
+
+    def retry_after(self, key) -> float:
+        """Keyingi so'rov qachon o'tishi mumkin (sekund)"""
+        now = self.clock()
+        with self._lock:
+            tat = self._tat.get(key, now)
+        return max(0.0, tat - self.tolerance - now)
+
+    def _evict(self, now: float, max_items: int = 8):
+        # Eng eski yangilangan yozuvlardan bir nechtasini o'chirish (amortized O(1))
+        tats = self._tat
+        for _ in range(max_items):
+            if not tats:
+                return
+            key = next(iter(tats))
+            if tats[key] > now:
+                return
+            del tats[key]
+
+    def __len__(self):
+        return len(self._tat)
+
+
+class SharedGCRALimiter:
+    """GCRALimiter bilan bir xil interfeys, TAT lar umumiy StateBackend da.
+
+    Bir nechta bot jarayoni bir foydalanuvchi uchun bitta limitni bo'lishadi.
+    """
+
+    def __init__(self, backend, name: str, limit: int, period: float):
+        self.backend = backend
+        self.prefix = f"rl:{name}:"
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.tolerance = period - self.interval
+
+    def is_limited(self, key) -> bool:
+        return self.backend.gcra(self.prefix + str(key), self.interval, self.tolerance, self.period) > 0
+
+    def __len__(self):
+        # Kalitlar backendda TTL bilan saqlanadi, mahalliy hisob yo'q
+        return 0
+
+
+class TokenBucket:
+    """Sekundiga ``rate`` ta ruxsat beruvchi, threadlar uchun xavfsiz limiter"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """Kutmasdan: ruxsat olinsa 0, aks holda necha sekunddan keyin bo'ladi"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def available_in(self) -> float:
+        """Ruxsatni olmasdan, keyingi ruxsatgacha qolgan vaqt"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def is_idle(self) -> bool:
+        """To'la (uzoq vaqt ishlatilmagan) chelak: o'chirib yuborish mumkin"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens >= self.capacity
+
+    def pause(self, seconds: float):
+        """429 ``retry_after``: barcha ishchilarni ``seconds`` davomida to'xtatish"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RateLimits:
+    """Buyruqlar bo'yicha alohida limitlar: ``{"code": (limit, period), ...}``
+
+    ``backend`` umumiy (shared) bo'lsa limitlar jarayonlar o'rtasida
+    bo'lishiladi, aks holda tezroq mahalliy GCRALimiter ishlatiladi.
+    """
+
+    def __init__(self, limits: dict, default=(5, 60), backend=None):
+        self._backend = backend if backend is not None and backend.shared else None
+        self._limiters = {name: self._create(name, *spec) for name, spec in limits.items()}
+        self._default = default
+        self._lock = threading.Lock()
+
+    def _create(self, name: str, limit: int, period: float):
+        if self._backend is not None:
+            return SharedGCRALimiter(self._backend, name, limit, period)
+        return GCRALimiter(limit, period)
+
+    def get(self, command: str):
+        limiter = self._limiters.get(command)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(command)
+                if limiter is None:
+                    limiter = self._limiters[command] = self._create(command, *self._default)
+        return limiter
+
+    def is_limited(self, command: str, user_id: int) -> bool:
+        return self.get(command).is_limited(user_id)
+
+    def stats(self) -> dict:
+        return {name: len(limiter) for name, limiter in self._limiters.items()}
+
+
+rate_limits = RateLimits({
+    "code": (int(os.getenv("CODE_RATE_LIMIT", 10)), 60),
+    "upload": (int(os.getenv("UPLOAD_RATE_LIMIT", 5)), 60),
+}, backend=state)
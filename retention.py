@@ -0,0 +1,154 @@
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+
+def _hours(spec: str) -> tuple:
+    """"3-6" -> (3, 6): off-peak soatlar oralig'i (mahalliy vaqt)"""
+    start, end = spec.split("-")
+    return int(start), int(end)
+
+
+class RetentionJob:
+    """Muddati o'tgan media ni fon threadida partiyalab o'chirish.
+
+    Har ``interval`` sekundda ``batch_size`` tadan o'chiriladi, partiyalar
+    orasida ``pause`` kutiladi: yozish qulfi qisqa ushlanadi, WAL rejimida
+    o'quvchilar (kod qidirish) esa umuman kutmaydi. ``offpeak`` soatlarida
+    bir marta ``incremental_vacuum`` va ``PRAGMA optimize`` bajariladi.
+    """
+
+    def __init__(self, default_hours: int = 0, interval: float = 600, batch_size: int = 500,
+                 pause: float = 0.05, offpeak: str = "3-6", vacuum_pages: int = 1000):
+        self.default_hours = default_hours
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.offpeak = _hours(offpeak)
+        self.vacuum_pages = vacuum_pages
+        self.last_report = {}
+        self.total_rows = 0
+        self.total_pages = 0
+        self._last_compact_day = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Retention xatosi: {e}")
+
+    def is_offpeak(self, now: datetime = None) -> bool:
+        start, end = self.offpeak
+        hour = (now or datetime.now()).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def run_once(self, compact: bool = None) -> dict:
+        started = time.perf_counter()
+        rows = self.purge()
+        if compact is None:
+            today = datetime.now().date()
+            compact = self.is_offpeak() and self._last_compact_day != today
+            if compact:
+                self._last_compact_day = today
+        pages = self.compact() if compact else 0
+
+        self.total_rows += rows
+        self.total_pages += pages
+        self.last_report = {
+            "rows": rows,
+            "pages": pages,
+            "seconds": round(time.perf_counter() - started, 3),
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if rows or pages:
+            logger.info(f"Retention: {rows} ta qator o'chirildi, {pages} sahifa bo'shatildi")
+        return self.last_report
+
+    def purge(self) -> int:
+        deleted = 0
+        while not self._stop.is_set():
+            codes = Database.delete_expired_batch(self.default_hours, self.batch_size)
+            deleted += len(codes)
+            if len(codes) < self.batch_size:
+                break
+            # Boshqa yozuvchilar (views, users) ham navbat olsin
+            time.sleep(self.pause)
+        return deleted
+
+    def compact(self) -> int:
+        """Bo'sh sahifalarni faylga qaytarish; bo'shatilgan sahifalar soni"""
+        conn = Database.get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Eski bazalar: bir martalik "python retention.py vacuum" kerak
+            conn.execute("PRAGMA optimize")
+            return 0
+        before = conn.execute("PRAGMA page_count").fetchone()[0]
+        while not self._stop.is_set():
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not freelist:
+                break
+            # executescript: sqlite3 modulida execute bu pragmani faqat bir qadam (1 sahifa) bajaradi
+            conn.executescript(f"PRAGMA incremental_vacuum({min(freelist, self.vacuum_pages)})")
+            time.sleep(self.pause)
+        reclaimed = before - conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("PRAGMA optimize")
+        return reclaimed
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.total_rows,
+            "pages": self.total_pages,
+            "last_rows": self.last_report.get("rows", 0),
+            "last_pages": self.last_report.get("pages", 0),
+        }
+
+
+retention_job = RetentionJob(
+    default_hours=int(os.getenv("RETENTION_HOURS", 0)),    # 0 - faqat alohida muddatli kodlar
+    interval=float(os.getenv("RETENTION_INTERVAL", 600)),
+    offpeak=os.getenv("RETENTION_OFFPEAK", "3-6"),
+)
+
+
+def enable_incremental_vacuum():
+    """Mavjud bazani auto_vacuum=INCREMENTAL ga o'tkazish (to'liq VACUUM, bot to'xtatilgan holda)"""
+    conn = Database.get_connection()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+if __name__ == "__main__":
+    # python retention.py run | vacuum
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    Database.init_db()
+    if command == "vacuum":
+        print("auto_vacuum=INCREMENTAL" if enable_incremental_vacuum() else "O'tkazib bo'lmadi")
+    elif command == "run":
+        print(retention_job.run_once(compact=True))
+    else:
+        print("Foydalanish: python retention.py [run | vacuum]")
+    Database.close()
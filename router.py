@@ -0,0 +1,173 @@
+import logging
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CODE_LENGTH = 6
+# TeleBot ning yagona kirish handleri barcha turdagi xabarlarni qabul qilsin
+CONTENT_TYPES = [
+    "text", "audio", "document", "photo", "sticker", "video", "video_note", "voice", "location",
+    "contact", "animation", "venue", "dice", "poll",
+]
+
+
+def is_code(text: str) -> bool:
+    """6 belgili lotin harf/raqam: regex siz, bitta o'tishda"""
+    return len(text) == CODE_LENGTH and text.isascii() and text.isalnum()
+
+
+class Route:
+    __slots__ = ("kind", "name", "fn", "func", "calls", "errors", "seconds")
+
+    def __init__(self, kind: str, fn, func=None):
+        self.kind = kind
+        self.name = fn.__name__
+        self.fn = fn
+        self.func = func          # qo'shimcha shart (ixtiyoriy)
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def __call__(self, update):
+        start = time.perf_counter()
+        try:
+            return self.fn(update)
+        except Exception:
+            self.errors += 1
+            metrics.handler_errors.inc(self.name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.calls += 1
+            self.seconds += elapsed
+            metrics.handler_latency.observe(elapsed, self.name)
+
+
+class Router:
+    """Updatelarni lambda filtrlar ro'yxati o'rniga lug'atlar orqali yo'naltirish.
+
+    Xabar: buyruq -> ``commands``, 6 belgili kod -> ``code`` (tez yo'l),
+    boshqa matn -> ``text``, media -> ``content`` (content_type bo'yicha).
+    Callback: avval to'liq ``data``, so'ng ``:`` gacha bo'lgan prefiks.
+    TeleBot da bitta handler qoladi, shuning uchun next-step handlerlar va
+    middleware lar avvalgidek ishlaydi. Bir kalit ikki marta ro'yxatdan
+    o'tkazilsa birinchisi qoladi (TeleBot dagi kabi).
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.content = {}
+        self.callbacks = {}           # to'liq data
+        self.callback_prefixes = {}   # "list:..." -> "list"
+        self.code_route = None
+        self.text_route = None
+        self.unknown_command = None
+        self.inline_route = None
+        self.routes = []
+
+    # 1. Ro'yxatdan o'tkazish (dekoratorlar)
+    def _add(self, kind: str, table: dict, keys, fn):
+        route = Route(kind, fn)
+        for key in keys:
+            if key in table:
+                logger.info(f"Marshrut '{key}' allaqachon {table[key].name} ga bog'langan, "
+                            f"{route.name} e'tiborsiz qoldirildi")
+                continue
+            table[key] = route
+        self.routes.append(route)
+        return fn
+
+    def _set(self, attr: str, fn, func=None):
+        if getattr(self, attr) is not None:
+            logger.info(f"{attr} allaqachon {getattr(self, attr).name} ga bog'langan, "
+                        f"{fn.__name__} e'tiborsiz qoldirildi")
+            return fn
+        route = Route(attr.replace("_route", ""), fn, func)
+        setattr(self, attr, route)
+        self.routes.append(route)
+        return fn
+
+    def command(self, *names):
+        return lambda fn: self._add("command", self.commands, [name.lower() for name in names], fn)
+
+    def content_type(self, *types):
+        return lambda fn: self._add("content", self.content, types, fn)
+
+    def callback(self, *keys):
+        """To'liq callback data (``"show_stats"``) bo'yicha"""
+        return lambda fn: self._add("callback", self.callbacks, keys, fn)
+
+    def callback_prefix(self, *prefixes):
+        """``prefix:...`` ko'rinishidagi callback data bo'yicha"""
+        return lambda fn: self._add("callback", self.callback_prefixes, prefixes, fn)
+
+    def code(self):
+        return lambda fn: self._set("code_route", fn)
+
+    def text(self):
+        """Boshqa marshrutga tushmagan matn (va noma'lum buyruqlar, alohida handler bo'lmasa)"""
+        return lambda fn: self._set("text_route", fn)
+
+    def unknown(self):
+        return lambda fn: self._set("unknown_command", fn)
+
+    def inline(self, func=None):
+        return lambda fn: self._set("inline_route", fn, func)
+
+    # 2. Yo'naltirish
+    def route_message(self, message):
+        text = message.text
+        if text is not None:
+            if text.startswith("/"):
+                # "/list@bot media" -> "list"
+                name = text[1:].split(maxsplit=1)[0].split("@", 1)[0].lower() if len(text) > 1 else ""
+                return self.commands.get(name) or self.unknown_command or self.text_route
+            if self.code_route is not None and is_code(text):
+                return self.code_route
+            return self.text_route
+        return self.content.get(message.content_type)
+
+    def route_callback(self, call):
+        data = call.data or ""
+        route = self.callbacks.get(data)
+        if route is None:
+            route = self.callback_prefixes.get(data.split(":", 1)[0])
+        return route
+
+    def route_inline(self, inline_query):
+        route = self.inline_route
+        if route is not None and (route.func is None or route.func(inline_query)):
+            return route
+        return None
+
+    def _dispatch(self, route, update):
+        if route is not None:
+            return route(update)
+
+    def handle_message(self, message):
+        return self._dispatch(self.route_message(message), message)
+
+    def handle_callback(self, call):
+        return self._dispatch(self.route_callback(call), call)
+
+    def handle_inline(self, inline_query):
+        return self._dispatch(self.route_inline(inline_query), inline_query)
+
+    def attach(self, bot):
+        """TeleBot ga har bir update turi uchun bitta kirish handlerini qo'shish"""
+        bot.register_message_handler(self.handle_message, content_types=CONTENT_TYPES)
+        bot.register_callback_query_handler(self.handle_callback, func=None)
+        bot.register_inline_handler(self.handle_inline, func=None)
+
+    def stats(self) -> dict:
+        """"tur:handler" -> chaqiruvlar, xatolar, o'rtacha vaqt (ms)"""
+        return {
+            f"{route.kind}:{route.name}": {
+                "calls": route.calls,
+                "errors": route.errors,
+                "avg_ms": round(route.seconds / route.calls * 1000, 3) if route.calls else 0.0,
+            }
+            for route in self.routes
+        }
@@ -0,0 +1,304 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from telebot.handler_backends import HandlerBackend
+
+from db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend:
+    """Jarayonlar o'rtasida bo'lishiladigan holat (rate limit, next-step, kesh avlodlari).
+
+    Voris klasslar get/set/pop/delete/incr va ``gcra`` ni beradi. ``gcra``
+    bitta atomar amal: TAT ni o'qish, tekshirish va yangilash.
+    ``shared`` - holat boshqa jarayonlarga ko'rinadimi.
+    """
+
+    shared = True
+
+    def get(self, key: str, default=None):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    def pop(self, key: str, default=None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        """``incr`` hisoblagichining joriy qiymati"""
+        return self.get(key, 0)
+
+    def gcra(self, key: str, interval: float, tolerance: float, ttl: float) -> float:
+        """Ruxsat bo'lsa 0, aks holda necha sekunddan keyin qayta urinish mumkin"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# 1. XOTIRA (bitta jarayon)
+class MemoryBackend(StateBackend):
+    shared = False
+
+    def __init__(self):
+        self._data = {}        # key -> (value, expires_at | None)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._get(key, time.time())
+        return default if item is None else item[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (value, now + ttl if ttl else None)
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._purge(now)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._get(key, time.time())
+            if item is None:
+                return default
+            del self._data[key]
+            return item[0]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            item = self._get(key, time.time())
+            value = (item[0] if item else 0) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def gcra(self, key, interval, tolerance, ttl):
+        now = time.time()
+        with self._lock:
+            item = self._get(key, now)
+            tat = max(item[0] if item else now, now)
+            if tat - now > tolerance:
+                return tat - tolerance - now
+            self._data[key] = (tat + interval, now + ttl)
+            return 0.0
+
+    def _purge(self, now):
+        expired = [key for key, (_, expires_at) in self._data.items()
+                   if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+
+# 2. SQLITE FAYL (bitta serverdagi bir nechta jarayon)
+class SQLiteBackend(StateBackend):
+    """Umumiy SQLite fayl: WAL rejimi, har bir amal bitta qisqa tranzaksiya"""
+
+    def __init__(self, path: str, purge_every: int = 1000):
+        self.pool = ConnectionPool(path)
+        self.purge_every = purge_every
+        self._writes = 0
+        with self.pool.get() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value BLOB,
+                expires_at REAL
+            ) WITHOUT ROWID""")
+
+    def _write(self, conn, now):
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+
+    def get(self, key, default=None):
+        row = self.pool.get().execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return default if row is None else _loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self.pool.get() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _dumps(value), now + ttl if ttl else None)
+            )
+            self._write(conn, now)
+
+    def pop(self, key, default=None):
+        with self.pool.get() as conn:
+            row = conn.execute(
+                "DELETE FROM state WHERE key = ? RETURNING value, expires_at", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return _loads(row[0])
+
+    def delete(self, key):
+        with self.pool.get() as conn:
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def incr(self, key):
+        with self.pool.get() as conn:
+            return conn.execute(
+                "INSERT INTO state (key, value) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value", (key,)
+            ).fetchone()[0]
+
+    def gcra(self, key, interval, tolerance, ttl):
+        now = time.time()
+        conn = self.pool.get()
+        with conn:
+            # IMMEDIATE: o'qish va yozish orasida boshqa jarayon yoza olmaydi
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value, expires_at FROM state WHERE key = ?", (key,)).fetchone()
+            tat = now if row is None or (row[1] is not None and row[1] <= now) else row[0]
+            tat = max(tat, now)
+            if tat - now > tolerance:
+                return tat - tolerance - now
+            conn.execute(
+                "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, tat + interval, now + ttl)
+            )
+            self._write(conn, now)
+        return 0.0
+
+    def close(self):
+        self.pool.close_all()
+
+
+def _dumps(value):
+    # Sonlar ustunda o'zicha saqlanadi (incr/gcra SQL ichida hisoblaydi)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return sqlite3.Binary(pickle.dumps(value))
+
+
+def _loads(value):
+    return pickle.loads(value) if isinstance(value, bytes) else value
+
+
+# 3. REDIS (bir nechta server)
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+if tat - now > tolerance then return tostring(tat - tolerance - now) end
+redis.call('SET', KEYS[1], tat + interval, 'PX', ARGV[4])
+return '0'
+"""
+
+
+class RedisBackend(StateBackend):
+    """redis-py mijoziga (yoki shu interfeysli soxta mijozga) asoslangan backend"""
+
+    def __init__(self, client, prefix: str = "kino:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis   # ixtiyoriy bog'liqlik: faqat Redis tanlansa kerak
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key, default=None):
+        value = self.client.get(self.prefix + key)
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def pop(self, key, default=None):
+        value = self.client.getdel(self.prefix + key)
+        return default if value is None else pickle.loads(value)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + "n:" + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + "n:" + key) or 0)
+
+    def gcra(self, key, interval, tolerance, ttl):
+        result = self.client.eval(GCRA_SCRIPT, 1, self.prefix + "n:" + key,
+                                  time.time(), interval, tolerance, int(ttl * 1000))
+        return float(result)
+
+    def close(self):
+        self.client.close()
+
+
+def create_backend(url: str) -> StateBackend:
+    """``memory`` | ``sqlite:///yo'l/state.db`` | ``redis://host:6379/0``"""
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Noma'lum STATE_BACKEND: {url}")
+
+
+# 4. TELEBOT NEXT-STEP HANDLERLARI
+class StateHandlerBackend(HandlerBackend):
+    """register_next_step_handler holatini StateBackend da saqlash.
+
+    Handlerlar pickle qilinadi, shuning uchun callback modul darajasidagi
+    funksiya yoki klass metodi bo'lishi kerak. Xabar kelganda avval arzon
+    ``get`` bilan tekshiriladi, faqat bor bo'lsa ``pop``.
+    """
+
+    def __init__(self, backend: StateBackend, prefix: str = "step:", ttl: float = 3600):
+        super().__init__()
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def register_handler(self, handler_group_id, handler):
+        key = self.prefix + str(handler_group_id)
+        handlers = self.backend.get(key) or []
+        handlers.append(handler)
+        self.backend.set(key, handlers, self.ttl)
+
+    def clear_handlers(self, handler_group_id):
+        self.backend.delete(self.prefix + str(handler_group_id))
+
+    def get_handlers(self, handler_group_id):
+        key = self.prefix + str(handler_group_id)
+        if self.backend.get(key) is None:
+            return None
+        return self.backend.pop(key)
+
+
+state = create_backend(os.getenv("STATE_BACKEND", "memory"))
@@ -0,0 +1,667 @@
+import logging
+import os
+import re
+import sys
+
+from dotenv import load_dotenv
+
+from db_pool import ConnectionPool
+from cache import media_cache, search_cache, inline_cache
+from view_counter import ViewCounter
+from user_activity import UserActivityBuffer
+from code_allocator import CodeAllocator
+from metrics import instrument_methods, db_latency
+
+load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "media_bot.db")
+# Yangi kodlarni aralashtirish kaliti; o'zgartirilsa ham band kodlar qayta berilmaydi
+CODE_SECRET = os.getenv("CODE_SECRET") or os.getenv("BOT_TOKEN", "")
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 200))  # bitta so'rov uchun keshlanadigan natijalar
+KEEP_FOREVER = "9999-12-31 23:59:59"  # expires_at: muddatsiz saqlash
+
+logger = logging.getLogger(__name__)
+
+# Admin ko'rish/eksport uchun jadvallar: (keyset kaliti - indekslangan ustun, ustunlar)
+BROWSE_TABLES = {
+    "media": ("id", ("id", "secret_code", "file_type", "file_name", "caption", "views", "user_id", "upload_time")),
+    "users": ("user_id", ("user_id", "username", "first_name", "last_name", "join_date", "last_active", "blocked")),
+}
+
+
+# 1. SXEMA VA MIGRATSIYALAR
+# Har bir migratsiya bir marta, tartib bilan bajariladi; joriy versiya
+# PRAGMA user_version da saqlanadi.
+def _columns(conn, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migration_1(conn):
+    """Boshlang'ich sxema: media, users, admins"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS media (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_id TEXT NOT NULL,
+        file_type TEXT NOT NULL,
+        file_name TEXT,
+        secret_code TEXT UNIQUE NOT NULL,
+        upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        views INTEGER DEFAULT 0
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        last_name TEXT,
+        join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS admins (
+        user_id INTEGER PRIMARY KEY,
+        added_by INTEGER,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_secret_code ON media(secret_code)")
+
+
+def _migration_2(conn):
+    """Reklama: bloklagan foydalanuvchilar va checkpoint jadvali"""
+    if 'blocked' not in _columns(conn, 'users'):
+        conn.execute("ALTER TABLE users ADD COLUMN blocked INTEGER DEFAULT 0")
+    conn.execute("""CREATE TABLE IF NOT EXISTS broadcasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        admin_chat_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        status TEXT DEFAULT 'running',
+        total INTEGER DEFAULT 0,
+        last_user_id INTEGER DEFAULT 0,
+        sent INTEGER DEFAULT 0,
+        blocked INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )""")
+
+
+def _migration_3(conn):
+    """files.db dagi ustunlar media jadvaliga qo'shiladi, kodlar ketma-ketligi"""
+    columns = _columns(conn, 'media')
+    for name, spec in (("user_id", "INTEGER"), ("format", "TEXT"), ("caption", "TEXT")):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE media ADD COLUMN {name} {spec}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS code_sequence (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)"
+    )
+
+
+def _migration_4(conn):
+    """Inline qidiruv: file_name/caption bo'yicha FTS5 indeks, triggerlar bilan sinxron"""
+    conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS media_fts USING fts5(
+        file_name, caption,
+        content='media', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS media_fts_insert AFTER INSERT ON media BEGIN
+        INSERT INTO media_fts(rowid, file_name, caption) VALUES (new.id, new.file_name, new.caption);
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS media_fts_delete AFTER DELETE ON media BEGIN
+        INSERT INTO media_fts(media_fts, rowid, file_name, caption)
+        VALUES ('delete', old.id, old.file_name, old.caption);
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS media_fts_update AFTER UPDATE OF file_name, caption ON media BEGIN
+        INSERT INTO media_fts(media_fts, rowid, file_name, caption)
+        VALUES ('delete', old.id, old.file_name, old.caption);
+        INSERT INTO media_fts(rowid, file_name, caption) VALUES (new.id, new.file_name, new.caption);
+    END""")
+    conn.execute("INSERT INTO media_fts(media_fts) VALUES ('rebuild')")
+
+
+def _migration_5(conn):
+    """Statistika: triggerlar bilan yuritiladigan hisoblagichlar va kunlik jadval"""
+    conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS daily_stats (
+        day TEXT PRIMARY KEY,
+        new_users INTEGER NOT NULL DEFAULT 0,
+        active_users INTEGER NOT NULL DEFAULT 0,
+        uploads INTEGER NOT NULL DEFAULT 0
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_views ON media(views DESC)")
+
+    # Har bir hodisa: bitta hisoblagich va bitta kunlik qatorni oshirish
+    def bump(column, day):
+        return (f"INSERT INTO daily_stats (day, {column}) VALUES ({day}, 1) "
+                f"ON CONFLICT(day) DO UPDATE SET {column} = {column} + 1;")
+
+    triggers = {
+        "stats_media_insert": ("AFTER INSERT ON media",
+                               "UPDATE counters SET value = value + 1 WHERE name = 'media';"
+                               + bump("uploads", "date(new.upload_time)")),
+        "stats_media_delete": ("AFTER DELETE ON media",
+                               "UPDATE counters SET value = value - 1 WHERE name = 'media';"),
+        "stats_users_insert": ("AFTER INSERT ON users",
+                               "UPDATE counters SET value = value + 1 WHERE name = 'users';"
+                               + bump("new_users", "date(new.join_date)")
+                               + bump("active_users", "date(new.last_active)")),
+        "stats_users_delete": ("AFTER DELETE ON users",
+                               "UPDATE counters SET value = value - 1 WHERE name = 'users';"),
+        # last_active kuni o'zgarganda foydalanuvchi o'sha kun uchun bir marta sanaladi
+        "stats_users_active": ("AFTER UPDATE OF last_active ON users "
+                               "WHEN date(new.last_active) IS NOT date(old.last_active)",
+                               bump("active_users", "date(new.last_active)")),
+    }
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    backfill_stats(conn)
+
+
+def backfill_stats(conn):
+    """Hisoblagichlar va kunlik jadvalni mavjud ma'lumotlardan qayta hisoblash.
+
+    Har bir foydalanuvchining faqat oxirgi faol kuni ma'lum, shuning uchun
+    o'tgan kunlar uchun active_users taxminiy bo'ladi.
+    """
+    conn.execute("DELETE FROM counters")
+    conn.execute("""INSERT INTO counters (name, value)
+        SELECT 'media', COUNT(*) FROM media UNION ALL SELECT 'users', COUNT(*) FROM users""")
+    conn.execute("DELETE FROM daily_stats")
+    conn.execute("""INSERT INTO daily_stats (day, new_users, active_users, uploads)
+        SELECT day, SUM(new_users), SUM(active_users), SUM(uploads) FROM (
+            SELECT date(join_date) AS day, 1 AS new_users, 0 AS active_users, 0 AS uploads FROM users
+            UNION ALL SELECT date(last_active), 0, 1, 0 FROM users
+            UNION ALL SELECT date(upload_time), 0, 0, 1 FROM media
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day""")
+
+
+def _migration_6(conn):
+    """Saqlash muddati: indekslangan vaqt ustunlari va kod bo'yicha muddat"""
+    if 'expires_at' not in _columns(conn, 'media'):
+        conn.execute("ALTER TABLE media ADD COLUMN expires_at TIMESTAMP")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_upload_time ON media(upload_time) WHERE expires_at IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_expires_at ON media(expires_at) WHERE expires_at IS NOT NULL")
+
+
+def _migration_7(conn):
+    """Takroriy yuklashlar: file_unique_id bo'yicha noyob indeks, birlashtirilgan kodlar uchun taxalluslar"""
+    if 'file_unique_id' not in _columns(conn, 'media'):
+        conn.execute("ALTER TABLE media ADD COLUMN file_unique_id TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_media_file_unique_id ON media(file_unique_id) "
+                 "WHERE file_unique_id IS NOT NULL")
+    # Birlashtirilgan dublikatlarning eski kodlari asosiy qatorga yo'naltiriladi
+    conn.execute("""CREATE TABLE IF NOT EXISTS code_aliases (
+        secret_code TEXT PRIMARY KEY,
+        media_code TEXT NOT NULL
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_code_aliases_media ON code_aliases(media_code)")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS media_aliases_delete AFTER DELETE ON media BEGIN
+        DELETE FROM code_aliases WHERE media_code = old.secret_code;
+    END""")
+
+
+def _migration_8(conn):
+    """Reklama: bir nechta jarayon bitta reklamani takror yubormasligi uchun egasi va ijara muddati"""
+    columns = _columns(conn, 'broadcasts')
+    for name, spec in (("owner", "TEXT"), ("lease_until", "REAL")):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE broadcasts ADD COLUMN {name} {spec}")
+
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4, _migration_5, _migration_6,
+              _migration_7, _migration_8]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn) -> int:
+    """Bajarilmagan migratsiyalarni qo'llash, yangi versiyani qaytarish"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            conn.execute("BEGIN")
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        logger.info(f"Baza sxemasi {number}-versiyaga yangilandi")
+    return max(version, SCHEMA_VERSION)
+
+
+def fts_query(text: str) -> str:
+    """Foydalanuvchi matnini FTS5 so'roviga aylantirish: har bir so'z prefiks sifatida"""
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# 2. MA'LUMOTLAR BAZASI
+class Database:
+    pool = ConnectionPool(DB_NAME)
+
+    @staticmethod
+    def get_connection():
+        return Database.pool.get()
+
+    @staticmethod
+    def init_db():
+        migrate(Database.get_connection())
+
+    @staticmethod
+    def update_user(user):
+        user_activity.touch(user)
+
+    @staticmethod
+    def flush_users(rows):
+        # join_date saqlanib qoladi, bot qayta ishlatilsa blocked bayrog'i tushadi
+        with Database.get_connection() as conn:
+            conn.executemany("""
+            INSERT INTO users (user_id, username, first_name, last_name, last_active)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                first_name = excluded.first_name,
+                last_name = excluded.last_name,
+                last_active = excluded.last_active,
+                blocked = 0
+            """, rows)
+
+    @staticmethod
+    def allocate_code() -> str:
+        return code_allocator.next()
+
+    @staticmethod
+    def add_media(file_id: str, file_type: str, file_name: str, secret_code: str,
+                  user_id: int = None, format: str = None, caption: str = None,
+                  file_unique_id: str = None) -> str:
+        """Yangi media ni saqlash va uning kodini qaytarish.
+
+        Shu ``file_unique_id`` li fayl allaqachon bo'lsa (parallel yuklash),
+        yangi qator qo'shilmaydi va mavjud kod qaytariladi.
+        """
+        with Database.get_connection() as conn:
+            row = conn.execute(
+                "INSERT INTO media (file_id, file_type, file_name, secret_code, user_id, format, caption, "
+                "file_unique_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_unique_id) WHERE file_unique_id IS NOT NULL DO NOTHING "
+                "RETURNING secret_code",
+                (file_id, file_type, file_name, secret_code, user_id, format, caption, file_unique_id)
+            ).fetchone()
+        if row is None:
+            return Database.get_media_by_unique_id(file_unique_id)['secret_code']
+        media_cache.invalidate(secret_code)
+        Database.clear_search()
+        return secret_code
+
+    @staticmethod
+    def get_media_by_unique_id(file_unique_id: str):
+        """Qayta yuklangan yoki forward qilingan fayl: indeks bo'yicha bitta so'rov"""
+        with Database.get_connection() as conn:
+            return conn.execute(
+                "SELECT * FROM media WHERE file_unique_id = ?", (file_unique_id,)
+            ).fetchone()
+
+    @staticmethod
+    def _load_media(code: str):
+        with Database.get_connection() as conn:
+            cursor = conn.cursor()
+            # Birlashtirilgan dublikat kodi asosiy qatorni qaytaradi (secret_code - asosiy kod)
+            cursor.execute("""
+                SELECT * FROM media WHERE secret_code = ?
+                UNION ALL
+                SELECT m.* FROM code_aliases a JOIN media m ON m.secret_code = a.media_code
+                WHERE a.secret_code = ?
+                LIMIT 1
+            """, (code, code))
+            return cursor.fetchone()
+
+    @staticmethod
+    def get_media_by_code(code: str):
+        return media_cache.get_or_load(code, Database._load_media)
+
+    @staticmethod
+    def _search(query: str) -> list:
+        # Bitta qisqa prefiks minglab qatorga mos keladi: bm25 hammasi uchun hisoblanmasin,
+        # eng yangilari rowid indeksi bo'yicha olinadi
+        ranked = max(len(word) for word in re.findall(r"\w+", query)) >= 3
+        order = "media_fts.rank" if ranked else "media_fts.rowid DESC"
+        with Database.get_connection() as conn:
+            return conn.execute(f"""
+                SELECT m.id, m.secret_code, m.file_id, m.file_type, m.file_name, m.caption, m.views
+                FROM media_fts
+                JOIN media m ON m.id = media_fts.rowid
+                WHERE media_fts MATCH ?
+                ORDER BY {order}
+                LIMIT ?
+            """, (query, SEARCH_MAX_RESULTS)).fetchall()
+
+    @staticmethod
+    def clear_search():
+        search_cache.clear()
+        inline_cache.clear()
+
+    @staticmethod
+    def search_media(text: str, offset: int = 0, limit: int = 20) -> tuple:
+        """Nom/izoh bo'yicha qidirish. Natija: (qatorlar, keyingi offset yoki None)"""
+        query = fts_query(text)
+        if not query:
+            return [], None
+        rows = search_cache.get_or_load(query, Database._search)
+        page = rows[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(rows) else None
+        return page, next_offset
+
+    @staticmethod
+    def increment_views(code: str):
+        view_counter.add(code)
+
+    @staticmethod
+    def pending_views(code: str) -> int:
+        return view_counter.pending(code)
+
+    @staticmethod
+    def flush_views(items):
+        with Database.get_connection() as conn:
+            # Taxallus orqali ochilgan ko'rishlar asosiy qatorga yoziladi
+            canonical = Database._canonical(conn, [code for _, code in items])
+            totals = {}
+            for count, code in items:
+                code = canonical.get(code, code)
+                totals[code] = totals.get(code, 0) + count
+            conn.executemany("UPDATE media SET views = views + ? WHERE secret_code = ?",
+                             [(count, code) for code, count in totals.items()])
+            aliases = Database._alias_map(conn, list(totals))
+        # Keshdagi qator invalidatsiya qilinmaydi (boshqa jarayonlar keshi tozalanmasin):
+        # shu jarayonda yozilgan ko'rishlar mahalliy nusxaga (taxalluslar ostidagilarga ham) qo'shiladi
+        for code, count in totals.items():
+            for key in [code] + aliases.get(code, []):
+                media_cache.patch(key, lambda row, count=count: {**dict(row), 'views': row['views'] + count})
+
+    @staticmethod
+    def delete_media(code: str) -> bool:
+        with Database.get_connection() as conn:
+            # Taxallus berilsa asosiy qator o'chiriladi (taxalluslarni trigger tozalaydi)
+            code = Database._canonical(conn, [code]).get(code, code)
+            aliases = Database._aliases(conn, [code])
+            deleted = conn.execute("DELETE FROM media WHERE secret_code = ?", (code,)).rowcount
+        for key in [code] + aliases:
+            media_cache.invalidate(key)
+        if deleted:
+            Database.clear_search()
+        return deleted > 0
+
+    @staticmethod
+    def set_retention(code: str, hours: int = None) -> bool:
+        """Kod uchun alohida muddat: ``hours`` soatdan keyin o'chadi, None - muddatsiz"""
+        with Database.get_connection() as conn:
+            code = Database._canonical(conn, [code]).get(code, code)
+            if hours is None:
+                updated = conn.execute(
+                    "UPDATE media SET expires_at = ? WHERE secret_code = ?", (KEEP_FOREVER, code)
+                ).rowcount
+            else:
+                updated = conn.execute(
+                    "UPDATE media SET expires_at = datetime(upload_time, ?) WHERE secret_code = ?",
+                    (f"+{hours} hours", code)
+                ).rowcount
+        return updated > 0
+
+    @staticmethod
+    def delete_expired_batch(default_hours: int = None, limit: int = 500) -> list:
+        """Muddati o'tgan qatorlardan bir partiyasini qisqa tranzaksiyada o'chirish.
+
+        Avval alohida muddatli kodlar (expires_at), so'ng ``default_hours``
+        dan eski, muddati belgilanmagan qatorlar; ikkalasi ham indeks bo'yicha.
+        O'chirilgan kodlar ro'yxati qaytariladi.
+        """
+        with Database.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT id, secret_code FROM media WHERE expires_at IS NOT NULL "
+                "AND expires_at <= datetime('now') LIMIT ?", (limit,)
+            ).fetchall()
+            if default_hours and len(rows) < limit:
+                rows += conn.execute(
+                    "SELECT id, secret_code FROM media WHERE expires_at IS NULL "
+                    "AND upload_time < datetime('now', ?) LIMIT ?",
+                    (f"-{default_hours} hours", limit - len(rows))
+                ).fetchall()
+            codes = [row[1] for row in rows]
+            aliases = Database._aliases(conn, codes)
+            if rows:
+                conn.executemany("DELETE FROM media WHERE id = ?", ((row[0],) for row in rows))
+        for code in codes + aliases:
+            media_cache.invalidate(code)
+        if codes:
+            Database.clear_search()
+        return codes
+
+    @staticmethod
+    def _canonical(conn, codes: list) -> dict:
+        """Taxallus -> asosiy kod (taxallus bo'lmagan kodlar natijada yo'q)"""
+        if not codes:
+            return {}
+        placeholders = ",".join("?" * len(codes))
+        return dict(conn.execute(
+            f"SELECT secret_code, media_code FROM code_aliases WHERE secret_code IN ({placeholders})", codes
+        ).fetchall())
+
+    @staticmethod
+    def _alias_map(conn, codes: list) -> dict:
+        """Asosiy kod -> unga yo'naltirilgan taxalluslar ro'yxati"""
+        result = {}
+        if codes:
+            placeholders = ",".join("?" * len(codes))
+            for alias, code in conn.execute(
+                f"SELECT secret_code, media_code FROM code_aliases WHERE media_code IN ({placeholders})", codes
+            ):
+                result.setdefault(code, []).append(alias)
+        return result
+
+    @staticmethod
+    def _aliases(conn, codes: list) -> list:
+        """Kodlarga yo'naltirilgan taxalluslar (keshdan ham o'chirilishi kerak)"""
+        if not codes:
+            return []
+        placeholders = ",".join("?" * len(codes))
+        return [row[0] for row in conn.execute(
+            f"SELECT secret_code FROM code_aliases WHERE media_code IN ({placeholders})", codes
+        )]
+
+    @staticmethod
+    def merge_duplicates() -> tuple:
+        """Mavjud dublikatlarni birlashtirish. Natija: (guruhlar, o'chirilgan qatorlar).
+
+        Bir xil fayl (file_unique_id, u bo'lmasa file_id) ning eng eski qatori
+        qoladi, ko'rishlar unga qo'shiladi, boshqa qatorlarning kodlari
+        ``code_aliases`` orqali unga yo'naltiriladi. Bitta tranzaksiya; bot
+        to'xtatilgan holda ishga tushirish tavsiya etiladi (yozilmagan views
+        eski kodlarga tushmasligi uchun).
+        """
+        conn = Database.get_connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DROP TABLE IF EXISTS temp.duplicates")
+            conn.execute("""CREATE TEMP TABLE duplicates AS
+                SELECT m.id, m.secret_code, m.views, m.file_unique_id, g.keep_id,
+                       (SELECT secret_code FROM media WHERE id = g.keep_id) AS keep_code
+                FROM media m
+                JOIN (SELECT coalesce(file_unique_id, file_id) AS file_key, MIN(id) AS keep_id
+                      FROM media GROUP BY file_key HAVING COUNT(*) > 1) g
+                  ON coalesce(m.file_unique_id, m.file_id) = g.file_key
+                WHERE m.id != g.keep_id""")
+            conn.execute("CREATE INDEX temp.idx_duplicates_code ON duplicates(secret_code)")
+            groups, removed = conn.execute(
+                "SELECT COUNT(DISTINCT keep_id), COUNT(*) FROM duplicates"
+            ).fetchone()
+            if removed:
+                # Avval taxalluslar: o'chirish triggeri dublikatga yo'naltirilganlarini olib tashlamasin
+                conn.execute("""UPDATE code_aliases SET media_code = (
+                    SELECT keep_code FROM duplicates d WHERE d.secret_code = code_aliases.media_code
+                ) WHERE media_code IN (SELECT secret_code FROM duplicates)""")
+                conn.execute("INSERT OR REPLACE INTO code_aliases (secret_code, media_code) "
+                             "SELECT secret_code, keep_code FROM duplicates")
+                conn.execute("DELETE FROM media WHERE id IN (SELECT id FROM duplicates)")
+                conn.execute("""UPDATE media SET
+                    views = views + (SELECT SUM(views) FROM duplicates d WHERE d.keep_id = media.id),
+                    file_unique_id = coalesce(file_unique_id, (
+                        SELECT MAX(file_unique_id) FROM duplicates d WHERE d.keep_id = media.id))
+                WHERE id IN (SELECT keep_id FROM duplicates)""")
+            conn.execute("DROP TABLE temp.duplicates")
+        if removed:
+            media_cache.clear()
+            Database.clear_search()
+        logger.info(f"Dublikatlar: {groups} guruh, {removed} qator birlashtirildi")
+        return groups, removed
+
+    @staticmethod
+    def delete_old_media(max_age_hours: int = 24) -> int:
+        deleted = 0
+        while True:
+            codes = Database.delete_expired_batch(max_age_hours)
+            deleted += len(codes)
+            if not codes:
+                return deleted
+
+    @staticmethod
+    def get_stats():
+        # Triggerlar yuritadigan hisoblagichlar: jadval hajmidan qat'i nazar ikki qator
+        with Database.get_connection() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            return counters.get('media', 0), counters.get('users', 0)
+
+    @staticmethod
+    def get_daily_stats(days: int = 7) -> list:
+        """Oxirgi ``days`` kun: (day, new_users, active_users, uploads), yangilari birinchi"""
+        with Database.get_connection() as conn:
+            return conn.execute(
+                "SELECT day, new_users, active_users, uploads FROM daily_stats ORDER BY day DESC LIMIT ?",
+                (days,)
+            ).fetchall()
+
+    @staticmethod
+    def top_codes(limit: int = 10) -> list:
+        with Database.get_connection() as conn:
+            return conn.execute(
+                "SELECT secret_code, file_name, views FROM media ORDER BY views DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    @staticmethod
+    def backfill_stats():
+        conn = Database.get_connection()
+        with conn:
+            conn.execute("BEGIN")
+            backfill_stats(conn)
+
+    @staticmethod
+    def browse(table: str, cursor: int = None, backward: bool = False, limit: int = 10) -> tuple:
+        """Keyset sahifalash (yangilari birinchi).
+
+        ``cursor`` - oldingi sahifaning chetidagi kalit; ``backward`` bo'lsa
+        undan yangiroq qatorlar olinadi. Natija: (qatorlar, yana bormi).
+        """
+        key, columns = BROWSE_TABLES[table]
+        where, order = "", "DESC"
+        params = []
+        if cursor is not None:
+            where = f"WHERE {key} {'>' if backward else '<'} ?"
+            params.append(cursor)
+            if backward:
+                order = "ASC"
+        params.append(limit + 1)
+        with Database.get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {key} {order} LIMIT ?", params
+            ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+        return rows, has_more
+
+    @staticmethod
+    def iter_rows(table: str, chunk_size: int = 1000):
+        """Jadvalni keyset bo'laklari bilan o'qish: xotirada bir vaqtda faqat bitta bo'lak"""
+        key, columns = BROWSE_TABLES[table]
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?"
+        conn = Database.get_connection()
+        last = -1 << 63
+        while True:
+            rows = conn.execute(sql, (last, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][key]
+
+    @staticmethod
+    def add_admin(user_id: int, added_by: int):
+        with Database.get_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO admins (user_id, added_by) VALUES (?, ?)",
+                (user_id, added_by)
+            )
+
+    @staticmethod
+    def remove_admin(user_id: int) -> bool:
+        with Database.get_connection() as conn:
+            return conn.execute("DELETE FROM admins WHERE user_id = ?", (user_id,)).rowcount > 0
+
+    @staticmethod
+    def close():
+        view_counter.stop()
+        user_activity.stop()
+        Database.pool.close_all()
+
+
+view_counter = ViewCounter(Database.flush_views)
+user_activity = UserActivityBuffer(Database.flush_users)
+code_allocator = CodeAllocator(Database.get_connection, "media", "secret_code", CODE_SECRET,
+                               reserved=[("code_aliases", "secret_code")])
+instrument_methods(Database, db_latency, exclude=("get_connection", "iter_rows", "close"))
+
+
+# 3. ESKI files.db NI KO'CHIRISH
+def import_files_db(path: str = "files.db") -> tuple:
+    """files.db dagi ``files`` qatorlarini ``media`` ga bitta so'rov bilan ko'chirish.
+
+    Kodi allaqachon mavjud qatorlar o'tkazib yuboriladi.
+    Natija: (ko'chirilgan, o'tkazib yuborilgan).
+    """
+    conn = Database.get_connection()
+    migrate(conn)
+    conn.execute("ATTACH DATABASE ? AS legacy", (path,))
+    try:
+        with conn:
+            total = conn.execute("SELECT COUNT(*) FROM legacy.files").fetchone()[0]
+            imported = conn.execute("""
+                INSERT OR IGNORE INTO media
+                    (file_id, file_type, file_name, secret_code, upload_time, views, user_id, format, caption)
+                SELECT file_id, file_type, NULLIF(caption, ''), code,
+                       strftime('%Y-%m-%d %H:%M:%S', created_at), views, user_id, format, caption
+                FROM legacy.files
+                WHERE file_id IS NOT NULL
+            """).rowcount
+    finally:
+        conn.execute("DETACH DATABASE legacy")
+    media_cache.clear()
+    Database.clear_search()
+    return imported, total - imported
+
+
+if __name__ == "__main__":
+    # python storage.py import [files.db] | backfill-stats | merge-duplicates
+    if len(sys.argv) >= 2 and sys.argv[1] == "merge-duplicates":
+        logging.basicConfig(level=logging.INFO)
+        Database.init_db()
+        groups, removed = Database.merge_duplicates()
+        print(f"Birlashtirildi: {groups} guruh, {removed} dublikat o'chirildi")
+        Database.close()
+    elif len(sys.argv) >= 2 and sys.argv[1] == "backfill-stats":
+        logging.basicConfig(level=logging.INFO)
+        Database.init_db()
+        Database.backfill_stats()
+        print("Statistika qayta hisoblandi")
+        Database.close()
+    elif len(sys.argv) >= 2 and sys.argv[1] == "import":
+        logging.basicConfig(level=logging.INFO)
+        source = sys.argv[2] if len(sys.argv) > 2 else "files.db"
+        if not os.path.exists(source):
+            sys.exit(f"{source} topilmadi")
+        imported, skipped = import_files_db(source)
+        print(f"Ko'chirildi: {imported}, o'tkazib yuborildi: {skipped}")
+        Database.close()
+    else:
+        print("Foydalanish: python storage.py import [files.db] | backfill-stats | merge-duplicates")
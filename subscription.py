@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Bitta kalit uchun davom etayotgan ``get_chat_member`` so'rovi"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SubscriptionCache:
+    """Kanal obunasi holatini (channel, user_id) bo'yicha keshlaydi.
+
+    * Obuna bo'lganlar ``positive_ttl``, bo'lmaganlar ``negative_ttl`` davomida
+      yangi hisoblanadi.
+    * Bir vaqtdagi bir xil tekshiruvlar bitta so'rovni kutadi (single-flight).
+    * Muddati o'tgan ijobiy natija ``stale_ttl`` gacha darhol qaytariladi va
+      fonda yangilanadi. Salbiy natija eskirsa qayta so'raladi, chunki
+      foydalanuvchi hozirgina obuna bo'lgan bo'lishi mumkin.
+    * ``start(loader)`` fon threadi har ``refresh_interval`` da eskirgan
+      ijobiy yozuvlarni (eng so'nggi ishlatilgan ``refresh_limit`` tasini)
+      oldindan yangilaydi, foydalanuvchi so'roviga qadar.
+    """
+
+    def __init__(self, positive_ttl: float = 3600, negative_ttl: float = 30,
+                 stale_ttl: float = 86400, maxsize: int = 100000,
+                 refresh_interval: float = 300, refresh_limit: int = 500):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.refresh_interval = refresh_interval
+        self.refresh_limit = refresh_limit
+        self._stop = threading.Event()
+        self._thread = None
+        self._entries = OrderedDict()   # key -> (value, fresh_until, stale_until)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def check(self, channel, user_id: int, loader) -> bool:
+        """Obunani tekshirish; ``loader(channel, user_id)`` faqat kerak bo'lganda chaqiriladi"""
+        key = (channel, user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fresh_until, stale_until = entry
+                if now < fresh_until:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if value and now < stale_until:
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = _Call()
+                        threading.Thread(
+                            target=self._load, args=(key, loader, True), daemon=True
+                        ).start()
+                    return value
+
+            call = self._inflight.get(key)
+            if call is None:
+                self.misses += 1
+                call = self._inflight[key] = _Call()
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if leader:
+            self._load(key, loader, False)
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def _load(self, key, loader, background: bool):
+        with self._lock:
+            call = self._inflight[key]
+        try:
+            call.value = bool(loader(*key))
+            self._store(key, call.value)
+        except Exception as e:
+            call.error = e
+            if background:
+                logger.error(f"Obunani fonda yangilashda xato: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def _store(self, key, value: bool):
+        now = time.monotonic()
+        ttl = self.positive_ttl if value else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (value, now + ttl, now + ttl + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh_stale(self, loader, workers: int = 8, limit: int = None) -> int:
+        """Muddati o'tgan ijobiy yozuvlarni birdaniga (parallel) yangilash.
+
+        ``limit`` berilsa faqat eng so'nggi ishlatilgan shuncha yozuv olinadi.
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = []
+            for key in reversed(self._entries):
+                value, fresh_until, stale_until = self._entries[key]
+                if value and fresh_until <= now < stale_until and key not in self._inflight:
+                    keys.append(key)
+                    if limit is not None and len(keys) >= limit:
+                        break
+            for key in keys:
+                self._inflight[key] = _Call()
+        if keys:
+            with ThreadPoolExecutor(workers) as pool:
+                list(pool.map(lambda k: self._load(k, loader, True), keys))
+        return len(keys)
+
+    # Fon yangilanishi
+    def start(self, loader):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(loader,),
+                                            name="subscription-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, loader):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                refreshed = self.refresh_stale(loader, limit=self.refresh_limit)
+                if refreshed:
+                    logger.info(f"{refreshed} ta obuna holati fonda yangilandi")
+            except Exception as e:
+                logger.error(f"Obunalarni fonda yangilashda xato: {e}")
+
+    def invalidate(self, channel, user_id: int):
+        with self._lock:
+            self._entries.pop((channel, user_id), None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "shared": self.shared,
+        }
+
+
+subscription_cache = SubscriptionCache(
+    positive_ttl=float(os.getenv("SUBSCRIPTION_TTL", 3600)),
+    negative_ttl=float(os.getenv("SUBSCRIPTION_NEGATIVE_TTL", 30)),
+    refresh_interval=float(os.getenv("SUBSCRIPTION_REFRESH_INTERVAL", 300)),
+    refresh_limit=int(os.getenv("SUBSCRIPTION_REFRESH_LIMIT", 500)),
+)
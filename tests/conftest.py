@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modullar import vaqtida env ni o'qiydi: haqiqiy baza va token ishlatilmasin
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("DB_NAME", os.path.join(tempfile.mkdtemp(prefix="kino-tests-"), "bot.db"))
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Bo'sh vaqtinchalik baza, barcha migratsiyalar qo'llangan"""
+    from db_pool import ConnectionPool
+    from storage import migrate
+
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    migrate(pool.get())
+    yield pool
+    pool.close_all()
@@ -0,0 +1,113 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from broadcast import Broadcaster
+
+ADMIN_CHAT = -100
+USERS = list(range(1, 11))
+
+
+class FakeBot:
+    def __init__(self, on_send=None):
+        self.sent = []
+        self.on_send = on_send
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text):
+        if chat_id != ADMIN_CHAT:
+            with self._lock:
+                self.sent.append(chat_id)
+            if self.on_send:
+                self.on_send(chat_id)
+        return SimpleNamespace(message_id=1)
+
+    def edit_message_text(self, text, chat_id, message_id):
+        pass
+
+
+@pytest.fixture
+def db(pool):
+    with pool.get() as conn:
+        conn.executemany("INSERT INTO users (user_id, first_name) VALUES (?, 'test')",
+                         [(user_id,) for user_id in USERS])
+    return pool
+
+
+def add_broadcast(db, owner, lease_until, last_user_id=0):
+    with db.get() as conn:
+        return conn.execute(
+            "INSERT INTO broadcasts (admin_chat_id, text, total, last_user_id, sent, owner, lease_until) "
+            "VALUES (?, 'reklama', ?, ?, ?, ?, ?)",
+            (ADMIN_CHAT, len(USERS), last_user_id, last_user_id, owner, lease_until)
+        ).lastrowid
+
+
+def load(db, broadcast_id):
+    return db.get().execute("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,)).fetchone()
+
+
+def make_broadcaster(db, bot=None, **kwargs):
+    options = dict(rate=1000, workers=2, chunk_size=3)
+    options.update(kwargs)
+    return Broadcaster(bot or FakeBot(), db.get, **options)
+
+
+def test_claim_is_exclusive_until_lease_expires(db):
+    broadcast_id = add_broadcast(db, owner=None, lease_until=None)
+    first, second = make_broadcaster(db), make_broadcaster(db)
+    now = time.time()
+
+    assert first._claim(broadcast_id, now)
+    assert not second._claim(broadcast_id, now)
+    assert load(db, broadcast_id)["owner"] == first.owner
+
+    # Egasi o'lgan: ijara tugagach boshqasi oladi
+    assert second._claim(broadcast_id, now + first.lease + 1)
+    assert load(db, broadcast_id)["owner"] == second.owner
+
+
+def test_resume_continues_expired_lease_from_checkpoint(db):
+    broadcast_id = add_broadcast(db, owner="dead:1:x", lease_until=time.time() - 1, last_user_id=3)
+    bot = FakeBot()
+    broadcaster = make_broadcaster(db, bot)
+
+    broadcaster.resume()
+    broadcaster.join(5)
+
+    assert sorted(bot.sent) == USERS[3:]
+    job = load(db, broadcast_id)
+    assert (job["status"], job["sent"], job["last_user_id"], job["owner"]) == ("done", len(USERS), USERS[-1], None)
+
+
+def test_resume_skips_live_lease(db):
+    broadcast_id = add_broadcast(db, owner="alive:1:x", lease_until=time.time() + 60)
+    bot = FakeBot()
+    broadcaster = make_broadcaster(db, bot)
+
+    broadcaster.resume()
+    broadcaster.join(1)
+
+    assert bot.sent == []
+    assert not broadcaster.is_running()
+    job = load(db, broadcast_id)
+    assert (job["status"], job["owner"]) == ("running", "alive:1:x")
+
+
+def test_run_stops_when_lease_is_lost(db):
+    def steal(chat_id):
+        # Birinchi bo'lak yuborilayotganda boshqa jarayon reklamani egallaydi
+        with db.get() as conn:
+            conn.execute("UPDATE broadcasts SET owner = 'other:1:x'")
+
+    bot = FakeBot(on_send=steal)
+    broadcaster = make_broadcaster(db, bot)
+
+    broadcast_id = broadcaster.start("reklama", ADMIN_CHAT)
+    broadcaster.join(5)
+
+    assert sorted(bot.sent) == USERS[:3]
+    job = load(db, broadcast_id)
+    assert (job["status"], job["owner"], job["last_user_id"]) == ("running", "other:1:x", 0)
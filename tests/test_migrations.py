@@ -0,0 +1,104 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from storage import MIGRATIONS, SCHEMA_VERSION, migrate
+
+BASELINE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_bot.db")
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """Omborda saqlangan eski (user_version = 0) bazaning nusxasi"""
+    path = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def schema(conn):
+    return sorted(tuple(row) for row in conn.execute("SELECT type, name, sql FROM sqlite_master"))
+
+
+def count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_baseline_migrates_to_latest(baseline):
+    assert baseline.execute("PRAGMA user_version").fetchone()[0] == 0
+    media, users = count(baseline, "media"), count(baseline, "users")
+
+    assert migrate(baseline) == SCHEMA_VERSION == 8
+    assert baseline.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+    # Ma'lumotlar saqlanadi, yangi ustunlar qo'shiladi
+    assert (count(baseline, "media"), count(baseline, "users")) == (media, users)
+    assert {"user_id", "format", "caption", "expires_at", "file_unique_id"} <= columns(baseline, "media")
+    assert "blocked" in columns(baseline, "users")
+    assert {"owner", "lease_until"} <= columns(baseline, "broadcasts")
+    for table in ("code_sequence", "counters", "daily_stats", "code_aliases"):
+        assert count(baseline, table) >= 0
+
+
+def test_baseline_data_is_backfilled(baseline):
+    migrate(baseline)
+
+    counters = dict(baseline.execute("SELECT name, value FROM counters").fetchall())
+    assert counters == {"media": count(baseline, "media"), "users": count(baseline, "users")}
+    uploads = baseline.execute("SELECT SUM(uploads) FROM daily_stats").fetchone()[0]
+    assert uploads == count(baseline, "media")
+    # FTS indeksi mavjud qatorlardan qayta qurilgan
+    found = baseline.execute(
+        "SELECT COUNT(*) FROM media_fts WHERE media_fts MATCH '\"video\"*'").fetchone()[0]
+    assert found == baseline.execute(
+        "SELECT COUNT(*) FROM media WHERE file_name LIKE '%video%'").fetchone()[0] > 0
+    assert baseline.execute("SELECT COUNT(*) FROM users WHERE blocked != 0").fetchone()[0] == 0
+
+
+def test_triggers_work_after_migration(baseline):
+    migrate(baseline)
+    media = count(baseline, "media")
+
+    with baseline:
+        baseline.execute("INSERT INTO media (file_id, file_type, file_name, secret_code) "
+                         "VALUES ('f', 'video', 'yangi kino.mp4', 'NEW001')")
+        baseline.execute("INSERT INTO code_aliases (secret_code, media_code) VALUES ('OLD001', 'NEW001')")
+    assert baseline.execute("SELECT value FROM counters WHERE name = 'media'").fetchone()[0] == media + 1
+
+    with baseline:
+        baseline.execute("DELETE FROM media WHERE secret_code = 'NEW001'")
+    assert baseline.execute("SELECT value FROM counters WHERE name = 'media'").fetchone()[0] == media
+    assert count(baseline, "code_aliases") == 0
+
+
+def test_migrate_is_idempotent(baseline):
+    migrate(baseline)
+    before = schema(baseline)
+
+    assert migrate(baseline) == SCHEMA_VERSION
+    assert schema(baseline) == before
+
+
+@pytest.mark.parametrize("applied", range(len(MIGRATIONS)))
+def test_migrate_resumes_from_any_version(baseline, tmp_path, applied):
+    shutil.copy(BASELINE_DB, tmp_path / "expected.db")
+    expected = sqlite3.connect(tmp_path / "expected.db")
+    migrate(expected)
+
+    # Birinchi ``applied`` ta migratsiya avvalroq (eski versiyada) bajarilgan
+    for number, migration in enumerate(MIGRATIONS[:applied], start=1):
+        with baseline:
+            migration(baseline)
+            baseline.execute(f"PRAGMA user_version = {number}")
+
+    assert migrate(baseline) == SCHEMA_VERSION
+    assert schema(baseline) == schema(expected)
+    expected.close()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+from outbound import SendScheduler
+
+
+def too_many_requests(retry_after):
+    return ApiTelegramException("sendMessage", None, {
+        "ok": False, "error_code": 429, "description": "Too Many Requests",
+        "parameters": {"retry_after": retry_after},
+    })
+
+
+class FakeApi:
+    """``make_request`` o'rnida: chat uchun belgilangan sondagi birinchi so'rovlarga 429 qaytaradi"""
+
+    def __init__(self, floods=None, retry_after=0.2, default_floods=0):
+        self.floods = dict(floods or {})
+        self.default_floods = default_floods
+        self.retry_after = retry_after
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, token, method_name, method="post", params=None, files=None):
+        chat_id = params["chat_id"]
+        with self._lock:
+            self.calls.append((time.monotonic(), chat_id))
+            left = self.floods.get(chat_id, self.default_floods)
+            self.floods[chat_id] = left - 1
+        if left > 0:
+            raise too_many_requests(self.retry_after)
+        return {"message_id": len(self.calls), "chat": {"id": chat_id}}
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(api, **kwargs):
+        options = dict(rate=1000, chat_rate=1000, chat_burst=1000, workers=4, backoff=0.01)
+        options.update(kwargs)
+        scheduler = SendScheduler(**options)
+        scheduler.make_request = api
+        scheduler.start()
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop(timeout=1)
+
+
+def send(scheduler, chat_id, text="salom"):
+    return scheduler.submit("1:test", "sendMessage", params={"chat_id": chat_id, "text": text})
+
+
+def test_429_is_retried_after_retry_after(make_scheduler):
+    api = FakeApi(floods={1: 1}, retry_after=0.3)
+    scheduler = make_scheduler(api)
+
+    result = send(scheduler, 1).result(timeout=5)
+
+    assert result["chat"]["id"] == 1
+    (first, _), (second, _) = api.calls
+    assert second - first >= 0.3
+    stats = scheduler.stats()
+    assert (stats["sent"], stats["retried"], stats["failed"]) == (1, 1, 0)
+    assert stats["global_pauses"] == 0
+
+
+def test_chat_429_does_not_pause_other_chats(make_scheduler):
+    api = FakeApi(floods={1: 1}, retry_after=2)
+    scheduler = make_scheduler(api)
+
+    flooded = send(scheduler, 1)
+    time.sleep(0.05)
+    start = time.monotonic()
+    others = [send(scheduler, chat_id) for chat_id in range(2, 12)]
+    for future in others:
+        future.result(timeout=5)
+
+    assert time.monotonic() - start < 1
+    assert not flooded.done()
+    assert scheduler.stats()["global_pauses"] == 0
+    flooded.result(timeout=5)
+
+
+def test_global_flood_pauses_whole_queue(make_scheduler):
+    api = FakeApi(default_floods=1, retry_after=0.3)
+    scheduler = make_scheduler(api, flood_min=3, flood_share=0.5)
+
+    futures = [send(scheduler, chat_id) for chat_id in range(1, 11)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert scheduler.stats()["global_pauses"] >= 1
+    assert scheduler.stats()["failed"] == 0
+
+
+def test_429_fails_after_max_retries(make_scheduler):
+    api = FakeApi(default_floods=100, retry_after=0.05)
+    scheduler = make_scheduler(api, max_retries=2)
+
+    with pytest.raises(ApiTelegramException) as error:
+        send(scheduler, 1).result(timeout=5)
+
+    assert error.value.error_code == 429
+    assert len(api.calls) == 3
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_retry_pending_at_stop_is_failed(make_scheduler):
+    api = FakeApi(floods={1: 1}, retry_after=5)
+    scheduler = make_scheduler(api)
+
+    future = send(scheduler, 1)
+    time.sleep(0.1)
+    scheduler.stop(timeout=0.1)
+
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
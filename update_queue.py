@@ -0,0 +1,111 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def chat_key(update) -> int:
+    """Update qaysi chatga tegishli (tartibni saqlash uchun kalit)"""
+    for name in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        message = getattr(update, name, None)
+        if message is not None:
+            return message.chat.id
+    callback = getattr(update, "callback_query", None)
+    if callback is not None:
+        return callback.message.chat.id if callback.message else callback.from_user.id
+    for name in ("inline_query", "chosen_inline_result", "my_chat_member", "chat_member"):
+        obj = getattr(update, name, None)
+        if obj is not None:
+            return obj.from_user.id
+    return update.update_id
+
+
+class UpdateQueue:
+    """Updatelarni cheklangan navbat orqali ishchi threadlarga tarqatish.
+
+    Har bir chat doim bitta ishchiga tushadi (``chat_id % workers``), shuning
+    uchun bir chat ichidagi tartib saqlanadi, turli chatlar esa parallel
+    ishlanadi. Navbat to'lsa ``submit`` ``block_timeout`` kutadi va False
+    qaytaradi, webhook esa Telegramga keyinroq qayta yuborishni aytadi.
+    """
+
+    def __init__(self, process_fn, workers: int = 8, maxsize: int = 10000,
+                 block_timeout: float = 0.5):
+        self.process_fn = process_fn
+        self.workers = workers
+        self.block_timeout = block_timeout
+        self._queues = [queue.Queue(maxsize=max(1, maxsize // workers)) for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.last_lag = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i, q in enumerate(self._queues):
+                thread = threading.Thread(target=self._worker, args=(q,), name=f"update-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, update, timeout: float = None) -> bool:
+        if not self._threads:
+            self.start()
+        q = self._queues[chat_key(update) % self.workers]
+        try:
+            q.put((time.monotonic(), update),
+                  timeout=self.block_timeout if timeout is None else timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        with self._stats_lock:
+            self.accepted += 1
+        return True
+
+    def _worker(self, q: queue.Queue):
+        while True:
+            item = q.get()
+            if item is _STOP:
+                q.task_done()
+                return
+            enqueued_at, update = item
+            self.last_lag = time.monotonic() - enqueued_at
+            try:
+                self.process_fn([update])
+            except Exception as e:
+                logger.error(f"Update {update.update_id} ni qayta ishlashda xato: {e}")
+            finally:
+                with self._stats_lock:
+                    self.processed += 1
+                q.task_done()
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stop(self, timeout: float = 30):
+        """Navbatdagi barcha updatelarni ishlab bo'lib, ishchilarni to'xtatish"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for q in self._queues:
+            q.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "lag": self.last_lag,
+        }
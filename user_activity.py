@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from write_behind import WriteBehindBuffer
+
+
+class UserActivityBuffer(WriteBehindBuffer):
+    """Foydalanuvchi faolligini yig'ib, ``users`` jadvaliga partiyalab yozadi.
+
+    Bir foydalanuvchining ketma-ket yangilanishlari bitta qatorga
+    birlashtiriladi. Profil o'zgarmagan va oxirgi yozilgan ``last_active``
+    ``active_resolution`` sekunddan yangi bo'lsa, yangilanish tashlab
+    yuboriladi. ``flush_fn`` ``[(user_id, username, first_name, last_name,
+    last_active), ...]`` ro'yxatini bitta tranzaksiyada upsert qilishi kerak.
+    """
+
+    name = "user-activity"
+
+    def __init__(self, flush_fn, interval: float = 10.0, max_pending: int = 500,
+                 active_resolution: float = 300, remember: int = 100000):
+        self.flush_fn = flush_fn
+        self.active_resolution = active_resolution
+        self.remember = remember
+        self._pending = {}              # user_id -> (profil, vaqt)
+        self._written = OrderedDict()   # user_id -> (profil, vaqt), oxirgi yozilgani
+        super().__init__(interval, max_pending)
+
+    def touch(self, user) -> bool:
+        """Foydalanuvchi faolligini qayd etish; yozish kerak bo'lsa True"""
+        now = time.time()
+        profile = (user.username, user.first_name, user.last_name)
+        with self._lock:
+            if user.id not in self._pending:
+                written = self._written.get(user.id)
+                # Kun almashganda ham yoziladi, aks holda kunlik faollik (DAU) sanalmay qoladi
+                if (written and written[0] == profile and now - written[1] < self.active_resolution
+                        and date.fromtimestamp(now) == date.fromtimestamp(written[1])):
+                    return False
+            self._pending[user.id] = (profile, now)
+            pending = len(self._pending)
+        self._notify(pending)
+        return True
+
+    def _take(self):
+        batch, self._pending = self._pending, {}
+        return batch
+
+    def _write(self, batch):
+        self.flush_fn([
+            (user_id, *profile, datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"))
+            for user_id, (profile, ts) in batch.items()
+        ])
+        with self._lock:
+            self._written.update(batch)
+            for user_id in batch:
+                self._written.move_to_end(user_id)
+            while len(self._written) > self.remember:
+                self._written.popitem(last=False)
+
+    def _restore(self, batch):
+        for user_id, item in batch.items():
+            # Yangiroq yozuv bo'lsa, o'shani qoldirish
+            if user_id not in self._pending:
+                self._pending[user_id] = item
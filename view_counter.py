@@ -0,0 +1,45 @@
+from collections import Counter
+
+from write_behind import WriteBehindBuffer
+
+
+class ViewCounter(WriteBehindBuffer):
+    """Ko'rishlar sonini xotirada yig'ib, bazaga partiyalab yozadi.
+
+    ``flush_fn`` ``[(qo'shimcha, kod), ...]`` ro'yxatini bitta tranzaksiyada
+    yozishi kerak. Yozish taymer bo'yicha yoki yig'ilgan ko'rishlar
+    ``max_pending`` ga yetganda bajariladi; dastur to'xtaganda qolgani
+    ham yoziladi.
+    """
+
+    name = "view-counter"
+
+    def __init__(self, flush_fn, interval: float = 5.0, max_pending: int = 1000):
+        self.flush_fn = flush_fn
+        self._pending = Counter()
+        self._total = 0
+        super().__init__(interval, max_pending)
+
+    def add(self, code: str, count: int = 1):
+        with self._lock:
+            self._pending[code] += count
+            self._total += count
+            total = self._total
+        self._notify(total)
+
+    def pending(self, code: str) -> int:
+        """Hali bazaga yozilmagan ko'rishlar soni"""
+        with self._lock:
+            return self._pending.get(code, 0)
+
+    def _take(self):
+        batch, self._pending = self._pending, Counter()
+        self._total = 0
+        return batch
+
+    def _write(self, batch):
+        self.flush_fn([(count, code) for code, count in batch.items()])
+
+    def _restore(self, batch):
+        self._pending.update(batch)
+        self._total += sum(batch.values())
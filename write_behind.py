@@ -0,0 +1,82 @@
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Xotirada yig'ilgan o'zgarishlarni fon threadida partiyalab yozish.
+
+    Voris klasslar ``_take()`` (yig'ilganini olib, buferni bo'shatish),
+    ``_write(batch)`` va ``_restore(batch)`` (yozilmaganini qaytarish)
+    metodlarini beradi. Yozish har ``interval`` sekundda yoki ``_notify``
+    chaqirilganda bajariladi; dastur to'xtaganda qolgani ham yoziladi.
+    """
+
+    name = "write-behind"
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        atexit.register(self.stop)
+
+    def _take(self):
+        raise NotImplementedError
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _restore(self, batch):
+        raise NotImplementedError
+
+    def _notify(self, pending: int):
+        """Yangi yozuv qo'shilgandan keyin chaqiriladi"""
+        if self._thread is None:
+            self.start()
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = self._take()
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"{self.name}: bazaga yozishda xato: {e}")
+                with self._lock:
+                    self._restore(batch)
+                return 0
+            return len(batch)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Fon threadini to'xtatib, qolgan yozuvlarni yozish"""
+        thread = self._thread
+        if thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            thread.join()
+            self._thread = None
+        self.flush()